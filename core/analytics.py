@@ -1,19 +1,18 @@
 import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog
-import sqlite3
-import os
 from datetime import datetime, timedelta
 from tkinter import filedialog
-import sys
 from fpdf import FPDF
 from tkcalendar import DateEntry
 
-if getattr(sys, 'frozen', False):
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+from core.services import AnalyticsService
+from core.pos_server import get_client
+from core.periods import PERIODS, SalesQuery
+from core.drilldown import DrillDownView
+from core.db_reader import get_reader
 
-DB_PATH = os.path.join(BASE_DIR, "db", "IEEE_Shop.db")
+REFRESH_MS = 60000
+FILL_CHUNK = 200  # table rows inserted per Tk idle slice while painting
 
 class AnalyticsClass:
     def __init__(self, parent, back_cmd):
@@ -30,6 +29,10 @@ class AnalyticsClass:
         # State for custom range
         self.custom_start = None
         self.custom_end = None
+        # Last painted results, to skip redraws when nothing changed
+        self.last_snapshot = None
+        self.stats = AnalyticsService(remote=get_client())
+        self.paint_gen = 0  # bumps per paint, so an older chunked fill stops
 
         # --- MODULE HEADER ---
         header = tk.Frame(self.parent, bg=self.clr_bg)
@@ -45,11 +48,14 @@ class AnalyticsClass:
         self.filter_var = tk.StringVar(value="Today")
         
         tk.Label(header, text="FILTER:", font=("Helvetica", 10, "bold"), bg=self.clr_bg, fg=self.clr_dim).pack(side="right", padx=(20, 0))
-        self.filter_cb = ttk.Combobox(header, textvariable=self.filter_var, values=["Today", "Yesterday", "Weekly", "Monthly", "Yearly", "Custom Range"], 
+        self.filter_cb = ttk.Combobox(header, textvariable=self.filter_var, values=PERIODS, 
                                 state="readonly", font=("Helvetica", 10), width=15)
         self.filter_cb.pack(side="right", padx=10)
         self.filter_cb.bind("<<ComboboxSelected>>", self.on_filter_change)
         
+        tk.Button(header, text="🔎 DRILL DOWN", font=("Helvetica", 9, "bold"), bg="#334155", fg="white",
+                 bd=0, padx=10, pady=5, cursor="hand2", command=self.open_drill_down).pack(side="right", padx=10)
+
         tk.Button(header, text="📥 SALES REPORT", font=("Helvetica", 9, "bold"), bg=self.clr_accent, fg=self.clr_bg,
                  bd=0, padx=10, pady=5, cursor="hand2", command=self.download_sales_chart_pdf).pack(side="right", padx=10)
         
@@ -73,6 +79,8 @@ class AnalyticsClass:
         self.lbl_stat_title = tk.Label(self.stat_box, text=f"REVENUE ({self.filter_var.get().upper()})", font=("Helvetica", 9, "bold"), bg=self.clr_card, fg=self.clr_dim)
         self.lbl_stat_title.pack(pady=(25, 5))
         tk.Label(self.stat_box, textvariable=self.total_rev, font=("Helvetica", 22, "bold"), bg=self.clr_card, fg=self.clr_accent).pack()
+        self.lbl_loading = tk.Label(self.stat_box, text="", font=("Helvetica", 8), bg=self.clr_card, fg=self.clr_dim)
+        self.lbl_loading.pack()
 
         # Data Layout Top Row
         data_frame = tk.Frame(main_frame, bg=self.clr_bg)
@@ -139,12 +147,14 @@ class AnalyticsClass:
 
         self.load_analytics()
         # Auto-refresh every 60 seconds
-        self.parent.after(60000, self.auto_refresh)
+        self.parent.after(REFRESH_MS, self.auto_refresh)
 
     def auto_refresh(self):
+        if not self.canvas.winfo_exists():
+            return # Screen closed
         try:
             self.load_analytics()
-            self.parent.after(60000, self.auto_refresh)
+            self.parent.after(REFRESH_MS, self.auto_refresh)
         except: pass
         
     def on_filter_change(self, event):
@@ -185,6 +195,12 @@ class AnalyticsClass:
         tk.Button(dialog, text="Apply Filter", command=set_dates, bg="#10b981", fg="white").pack(pady=20)
         self.parent.wait_window(dialog)
 
+    def open_drill_down(self):
+        # Starts from the period picked in the filter
+        query = SalesQuery(self.filter_var.get(), self.custom_start, self.custom_end)
+        start, end = (query.bounds[0].date(), query.bounds[1].date()) if query.bounds else (None, None)
+        DrillDownView(self.parent, self.stats, start, end, query.label())
+
     def draw_revenue_graph(self, data):
         self.canvas.delete("all")
         if not data:
@@ -226,110 +242,67 @@ class AnalyticsClass:
             self.canvas.create_text(x0 + bar_w/2, y0 - 15, text=f"₹{val:,.0f}", fill=color, font=("Helvetica", 8, "bold"))
 
     def load_analytics(self):
+        # The queries run on the background reader; a newer request (filter
+        # change, refresh) replaces and interrupts one still in flight.
+        # Totals are kept running per period, so the 60s auto_refresh only
+        # reads the sales_log rows added since the last one
+        period, cs, ce = self.filter_var.get(), self.custom_start, self.custom_end
+        self.lbl_loading.config(text="Loading…")
+        get_reader().submit(self.parent, "analytics", lambda: self.stats.live(period, cs, ce),
+                            on_done=self.show_summary, on_error=self.load_failed)
+
+    def load_failed(self, e):
+        self.lbl_loading.config(text="")
+        print(f"Analytics Error: {e}")
+
+    def show_summary(self, summary):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            
-            period = self.filter_var.get()
-            title_text = f"REVENUE ({period.upper()})"
-            if period == "Custom Range" and self.custom_start and self.custom_end:
-                 title_text = f"REV ({self.custom_start.strftime('%d/%m')} - {self.custom_end.strftime('%d/%m')})"
-            self.lbl_stat_title.config(text=title_text)
-            
-            today_str = datetime.now().strftime("%Y-%m-%d")
-            month_str = datetime.now().strftime("%Y-%m")
-            year_str = datetime.now().strftime("%Y")
-            
-            where_clause = ""
-            params = ()
-            
-            if period == "Today" or period == "Daily": # Daily is now Today
-                where_clause = "WHERE s.date LIKE ?"
-                params = (f"{today_str}%",)
-            elif period == "Yesterday":
-                yesterday_str = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-                where_clause = "WHERE s.date LIKE ?"
-                params = (f"{yesterday_str}%",)
-            elif period == "Weekly":
-                start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-                where_clause = "WHERE s.date >= ?"
-                params = (start_date,)
-            elif period == "Monthly":
-                where_clause = "WHERE strftime('%Y-%m', s.date) = ?"
-                params = (month_str,)
-            elif period == "Yearly":
-                where_clause = "WHERE strftime('%Y', s.date) = ?"
-                params = (year_str,)
-            elif period == "Custom Range" and self.custom_start and self.custom_end:
-                # Inclusive range
-                 # Assuming s.date is YYYY-MM-DD HH:MM:SS
-                s_str = self.custom_start.strftime("%Y-%m-%d")
-                e_str = (self.custom_end + timedelta(days=1)).strftime("%Y-%m-%d") # Next day midnight for correct < compare
-                where_clause = "WHERE s.date >= ? AND s.date < ?"
-                params = (s_str, e_str)
-
-            # Total Revenue
-            cur.execute(f"SELECT SUM(s.total) FROM sales_log s {where_clause}", params)
-            rev_res = cur.fetchone()
-            rev = rev_res[0] if rev_res[0] else 0
-            self.total_rev.set(f"₹{rev:,.2f}")
-
-            # 1. Revenue Per Brand Table (Top Left)
-            self.brand_table.delete(*self.brand_table.get_children())
-            query = f"""
-                SELECT COALESCE(i.brand, s.brand), SUM(s.total) 
-                FROM sales_log s
-                LEFT JOIN inventory i ON s.barcode = i.barcode
-                {where_clause} 
-                GROUP BY COALESCE(i.brand, s.brand) 
-                ORDER BY SUM(s.total) DESC
-            """
-            cur.execute(query, params)
-            brands_data = cur.fetchall()
-            for b in brands_data:
-                brand_name = b[0] if b[0] else "Unknown"
-                self.brand_table.insert('', tk.END, values=(brand_name, f"₹{b[1]:,.2f}"))
-
-            # 2. Brand Sales Graph (Bottom)
-            graph_query = f"""
-                SELECT COALESCE(i.brand, s.brand), SUM(s.total) 
-                FROM sales_log s
-                LEFT JOIN inventory i ON s.barcode = i.barcode
-                {where_clause} 
-                GROUP BY COALESCE(i.brand, s.brand) 
-                ORDER BY SUM(s.total) DESC LIMIT 10
-            """
-            cur.execute(graph_query, params)
-            graph_data = cur.fetchall()
+            self.lbl_loading.config(text="")
+            self.lbl_stat_title.config(text=summary["title"])
+
+            if summary == self.last_snapshot:
+                return # Nothing changed since the last paint
+            self.last_snapshot = summary
+            brands_data, graph_data, hist_data = summary["brands"], summary["top_brands"], summary["history"]
+
+            # Cheap parts first: the total and the top-10 graph
+            self.total_rev.set(f"₹{summary['revenue']:,.2f}")
             self.draw_revenue_graph(graph_data)
 
-            # 3. Live Transaction History (Top Right)
-            self.hist_table.delete(*self.hist_table.get_children())
-            query = f"""
-                SELECT s.date, 
-                       COALESCE(i.category, 'Unknown'), 
-                       COALESCE(i.brand, s.brand), 
-                       s.qty, s.total 
-                FROM sales_log s
-                LEFT JOIN inventory i ON s.barcode = i.barcode
-                {where_clause} 
-                ORDER BY s.sid DESC LIMIT 100
-            """
-            cur.execute(query, params)
-            for r in cur.fetchall(): 
-                date, cat, brand, qty, total = r
-                try:
-                    qty_val = float(qty) if str(qty).replace('.','',1).isdigit() else 0
-                    total_val = float(total) if str(total).replace('.','',1).isdigit() else 0
-                    price = total_val / qty_val if qty_val > 0 else 0
-                except:
-                    price = 0
-                self.hist_table.insert('', tk.END, values=(date, cat, brand, qty, f"{price:,.2f}", f"{total:,.2f}"))
-            
-            conn.close()
+            # Then the tables, a chunk per idle slice so thousands of brands
+            # never hold up the event loop
+            self.paint_gen += 1
+            self.fill_table(self.brand_table, brands_data, self.brand_row, self.paint_gen)
+            self.fill_table(self.hist_table, hist_data, self.hist_row, self.paint_gen)
         except Exception as e:
             print(f"Analytics Error: {e}")
 
+    def fill_table(self, table, rows, fmt, gen, start=0):
+        if gen != self.paint_gen or not table.winfo_exists():
+            return # A newer paint took over, or the screen closed
+        if start == 0:
+            table.delete(*table.get_children())
+        for r in rows[start:start + FILL_CHUNK]:
+            table.insert('', tk.END, values=fmt(r))
+        if start + FILL_CHUNK < len(rows):
+            self.parent.after_idle(self.fill_table, table, rows, fmt, gen, start + FILL_CHUNK)
+
+    @staticmethod
+    def brand_row(b):
+        brand_name = b[0] if b[0] else "Unknown"
+        return (brand_name, f"₹{b[1]:,.2f}")
+
+    @staticmethod
+    def hist_row(r):
+        date, cat, brand, qty, total = r
+        try:
+            qty_val = float(qty) if str(qty).replace('.','',1).isdigit() else 0
+            total_val = float(total) if str(total).replace('.','',1).isdigit() else 0
+            price = total_val / qty_val if qty_val > 0 else 0
+        except:
+            price = 0
+        return (date, cat, brand, qty, f"{price:,.2f}", f"{total:,.2f}")
+
     def download_sales_chart_pdf(self):
         try:
             period = self.filter_var.get()
@@ -340,52 +313,8 @@ class AnalyticsClass:
                                                    initialfile=f"VJ_Sale_Chart_{period}_{today_date}.pdf")
             if not file_path: return
 
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            
-            today_str = datetime.now().strftime("%Y-%m-%d")
-            month_str = datetime.now().strftime("%Y-%m")
-            year_str = datetime.now().strftime("%Y")
-            where_clause = ""
-            params = ()
-            if period == "Today" or period == "Daily":
-                where_clause = "WHERE s.date LIKE ?"; params = (f"{today_str}%",)
-            elif period == "Yesterday":
-                yesterday_str = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-                where_clause = "WHERE s.date LIKE ?"; params = (f"{yesterday_str}%",)
-            elif period == "Weekly":
-                start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-                where_clause = "WHERE s.date >= ?"; params = (start_date,)
-            elif period == "Monthly":
-                where_clause = "WHERE strftime('%Y-%m', s.date) = ?"; params = (month_str,)
-            elif period == "Yearly":
-                where_clause = "WHERE strftime('%Y', s.date) = ?"; params = (year_str,)
-            elif period == "Custom Range" and self.custom_start and self.custom_end:
-                s_str = self.custom_start.strftime("%Y-%m-%d")
-                e_str = (self.custom_end + timedelta(days=1)).strftime("%Y-%m-%d")
-                where_clause = "WHERE s.date >= ? AND s.date < ?"
-                params = (s_str, e_str)
-
-            if period in ["Today", "Daily", "Yesterday", "Weekly", "Monthly", "Custom Range"]:
-                query = f"""
-                    SELECT MAX(s.date), COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, '-'), SUM(s.qty) 
-                    FROM sales_log s 
-                    LEFT JOIN inventory i ON s.barcode = i.barcode 
-                    {where_clause} 
-                    GROUP BY COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, '-')
-                    ORDER BY MAX(s.date) DESC
-                """
-            else:
-                query = f"""
-                    SELECT s.date, COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, '-'), s.qty 
-                    FROM sales_log s 
-                    LEFT JOIN inventory i ON s.barcode = i.barcode 
-                    {where_clause} 
-                    ORDER BY s.date DESC
-                """
-            cur.execute(query, params)
-            records = cur.fetchall()
-            conn.close()
+            grouped = period in ["Today", "Daily", "Yesterday", "Weekly", "Monthly", "Custom Range"]
+            records = self.stats.sale_chart(period, self.custom_start, self.custom_end, grouped)
 
             pdf = FPDF()
             pdf.set_auto_page_break(auto=True, margin=15)
@@ -473,9 +402,6 @@ class AnalyticsClass:
                                                    initialfile=file_name)
             if not file_path: return
 
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            
             # Helper to create PDF pages
             def create_page_for_date(pdf_obj, target_date_str, filter_type, custom_title=None):
                 pdf_obj.add_page()
@@ -516,16 +442,8 @@ class AnalyticsClass:
                 
                 pdf_obj.set_font("Arial", size=8)
                 
-            def fetch_and_print(pdf_obj, where, prms):
-                query = f"""
-                    SELECT s.date, COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, ''), s.qty, s.total 
-                    FROM sales_log s 
-                    LEFT JOIN inventory i ON s.barcode = i.barcode 
-                    {where} 
-                    ORDER BY s.date DESC
-                """
-                cur.execute(query, prms)
-                records = cur.fetchall()
+            def fetch_and_print(pdf_obj, q):
+                records = self.stats.detailed(q)
                 
                 grand_total = 0
                 for row in records:
@@ -578,407 +496,13 @@ class AnalyticsClass:
                     create_page_for_date(pdf, day_str, "Custom Range")
                     
                     # Query for this specific day
-                    w_clause = "WHERE s.date LIKE ?"
-                    pms = (f"{day_str}%",)
-                    fetch_and_print(pdf, w_clause, pms)
+                    fetch_and_print(pdf, SalesQuery.for_day(day))
             else:
                 # Standard Logic for other filters
-                # Prepare where clause again (re-using logic from load_analytics basically)
                 today_str = datetime.now().strftime("%Y-%m-%d")
-                month_str = datetime.now().strftime("%Y-%m")
-                year_str = datetime.now().strftime("%Y")
-                
-                where_clause = ""
-                params = ()
-                if period == "Today" or period == "Daily":
-                    where_clause = "WHERE s.date LIKE ?"; params = (f"{today_str}%",)
-                elif period == "Yesterday":
-                    yesterday_str = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-                    where_clause = "WHERE s.date LIKE ?"; params = (f"{yesterday_str}%",)
-                elif period == "Weekly":
-                    start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-                    where_clause = "WHERE s.date >= ?"; params = (start_date,)
-                elif period == "Monthly":
-                    where_clause = "WHERE strftime('%Y-%m', s.date) = ?"; params = (month_str,)
-                elif period == "Yearly":
-                    where_clause = "WHERE strftime('%Y', s.date) = ?"; params = (year_str,)
                 
                 create_page_for_date(pdf, today_str, period)
-                fetch_and_print(pdf, where_clause, params)
-
-            conn.close()
-            pdf.output(file_path)
-            messagebox.showinfo("Success", f"Detailed Report Saved:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to generate PDF: {str(e)}")
-
-    def auto_refresh(self):
-        try:
-            self.load_analytics()
-            self.parent.after(60000, self.auto_refresh)
-        except: pass
-
-    def draw_revenue_graph(self, data):
-        self.canvas.delete("all")
-        if not data:
-            self.canvas.create_text(200, 100, text="No Data Available for this period", fill=self.clr_dim, font=("Helvetica", 10))
-            return
-
-        w = self.canvas.winfo_width()
-        h = self.canvas.winfo_height()
-        if w < 100: w = 800 # Default if hidden
-        if h < 100: h = 250
-
-        padding = 50
-        graph_h = h - padding * 2
-        graph_w = w - padding * 2
-        
-        max_val = max([d[1] for d in data]) if data else 1
-        if max_val == 0: max_val = 1
-        
-        bar_w = graph_w / (len(data) * 2)
-        colors = ["#10b981", "#3b82f6", "#f59e0b", "#ef4444", "#8b5cf6", "#06b6d4", "#f43f5e", "#10b981", "#3b82f6", "#f59e0b"]
-        
-        for i, (brand, val) in enumerate(data):
-            # Calculate bar dimensions
-            bar_h = (val / max_val) * graph_h
-            x0 = padding + (i * 2 * bar_w) + (bar_w / 2)
-            y0 = h - padding - bar_h
-            x1 = x0 + bar_w
-            y1 = h - padding
-            
-            # Draw Bar
-            color = colors[i % len(colors)]
-            self.canvas.create_rectangle(x0, y0, x1, y1, fill=color, outline=color, width=0)
-            
-            # Label
-            label = brand[:12] + ".." if len(brand) > 12 else brand
-            self.canvas.create_text(x0 + bar_w/2, y1 + 15, text=label, fill="white", font=("Helvetica", 8, "bold"))
-            
-            # Value on top
-            self.canvas.create_text(x0 + bar_w/2, y0 - 15, text=f"₹{val:,.0f}", fill=color, font=("Helvetica", 8, "bold"))
-
-    def load_analytics(self):
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            
-            period = self.filter_var.get()
-            self.lbl_stat_title.config(text=f"REVENUE ({period.upper()})")
-            
-            today_str = datetime.now().strftime("%Y-%m-%d")
-            month_str = datetime.now().strftime("%Y-%m")
-            year_str = datetime.now().strftime("%Y")
-            
-            where_clause = ""
-            params = ()
-            
-            if period == "Daily":
-                where_clause = "WHERE s.date LIKE ?"
-                params = (f"{today_str}%",)
-            elif period == "Weekly":
-                start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-                where_clause = "WHERE s.date >= ?"
-                params = (start_date,)
-            elif period == "Monthly":
-                where_clause = "WHERE strftime('%Y-%m', s.date) = ?"
-                params = (month_str,)
-            elif period == "Yearly":
-                where_clause = "WHERE strftime('%Y', s.date) = ?"
-                params = (year_str,)
-
-            # Total Revenue
-            cur.execute(f"SELECT SUM(total) FROM transactions", ()) # Keeping simple for now or use filter
-            # Re-fetch correct total based on filter
-            cur.execute(f"SELECT SUM(s.total) FROM sales_log s {where_clause}", params)
-            rev_res = cur.fetchone()
-            rev = rev_res[0] if rev_res[0] else 0
-            self.total_rev.set(f"₹{rev:,.2f}")
-
-            # 1. Revenue Per Brand Table (Top Left)
-            self.brand_table.delete(*self.brand_table.get_children())
-            query = f"""
-                SELECT COALESCE(i.brand, s.brand), SUM(s.total) 
-                FROM sales_log s
-                LEFT JOIN inventory i ON s.barcode = i.barcode
-                {where_clause} 
-                GROUP BY COALESCE(i.brand, s.brand) 
-                ORDER BY SUM(s.total) DESC
-            """
-            cur.execute(query, params)
-            brands_data = cur.fetchall()
-            for b in brands_data:
-                brand_name = b[0] if b[0] else "Unknown"
-                self.brand_table.insert('', tk.END, values=(brand_name, f"₹{b[1]:,.2f}"))
-
-            # 2. Brand Sales Graph (Bottom)
-            graph_query = f"""
-                SELECT COALESCE(i.brand, s.brand), SUM(s.total) 
-                FROM sales_log s
-                LEFT JOIN inventory i ON s.barcode = i.barcode
-                {where_clause} 
-                GROUP BY COALESCE(i.brand, s.brand) 
-                ORDER BY SUM(s.total) DESC LIMIT 10
-            """
-            cur.execute(graph_query, params)
-            graph_data = cur.fetchall()
-            self.draw_revenue_graph(graph_data)
-
-            # 3. Live Transaction History (Top Right)
-            self.hist_table.delete(*self.hist_table.get_children())
-            query = f"""
-                SELECT s.date, 
-                       COALESCE(i.category, 'Unknown'), 
-                       COALESCE(i.brand, s.brand), 
-                       s.qty, s.total 
-                FROM sales_log s
-                LEFT JOIN inventory i ON s.barcode = i.barcode
-                {where_clause} 
-                ORDER BY s.sid DESC LIMIT 100
-            """
-            cur.execute(query, params)
-            for r in cur.fetchall(): 
-                date, cat, brand, qty, total = r
-                try:
-                    qty_val = float(qty) if str(qty).replace('.','',1).isdigit() else 0
-                    total_val = float(total) if str(total).replace('.','',1).isdigit() else 0
-                    price = total_val / qty_val if qty_val > 0 else 0
-                except:
-                    price = 0
-                self.hist_table.insert('', tk.END, values=(date, cat, brand, qty, f"{price:,.2f}", f"{total:,.2f}"))
-            
-            conn.close()
-        except Exception as e:
-            print(f"Analytics Error: {e}")
-
-    def download_sales_chart_pdf(self):
-        try:
-            period = self.filter_var.get()
-            today_date = datetime.now().strftime("%Y-%m-%d")
-            
-            file_path = filedialog.asksaveasfilename(defaultextension=".pdf", 
-                                                   filetypes=[("PDF files", "*.pdf")],
-                                                   initialfile=f"VJ_Sale_Chart_{period}_{today_date}.pdf")
-            if not file_path: return
-
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            
-            today_str = datetime.now().strftime("%Y-%m-%d")
-            month_str = datetime.now().strftime("%Y-%m")
-            year_str = datetime.now().strftime("%Y")
-            where_clause = ""
-            params = ()
-            if period == "Daily":
-                where_clause = "WHERE s.date LIKE ?"; params = (f"{today_str}%",)
-            elif period == "Weekly":
-                start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-                where_clause = "WHERE s.date >= ?"; params = (start_date,)
-            elif period == "Monthly":
-                where_clause = "WHERE strftime('%Y-%m', s.date) = ?"; params = (month_str,)
-            elif period == "Yearly":
-                where_clause = "WHERE strftime('%Y', s.date) = ?"; params = (year_str,)
-
-            if period in ["Daily", "Weekly", "Monthly"]:
-                query = f"""
-                    SELECT MAX(s.date), COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, '-'), SUM(s.qty) 
-                    FROM sales_log s 
-                    LEFT JOIN inventory i ON s.barcode = i.barcode 
-                    {where_clause} 
-                    GROUP BY COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, '-')
-                    ORDER BY MAX(s.date) DESC
-                """
-            else:
-                query = f"""
-                    SELECT s.date, COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, '-'), s.qty 
-                    FROM sales_log s 
-                    LEFT JOIN inventory i ON s.barcode = i.barcode 
-                    {where_clause} 
-                    ORDER BY s.date DESC
-                """
-            cur.execute(query, params)
-            records = cur.fetchall()
-            conn.close()
-
-            pdf = FPDF()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.add_page()
-            
-            pdf.set_font("Arial", 'B', 10)
-            pdf.cell(190, 5, txt="SHREE GANESHAY NAMAH", ln=True, align='C')
-            pdf.set_font("Arial", 'B', 18)
-            pdf.cell(190, 10, txt="V J BEER SHOPEE", ln=True, align='C')
-            pdf.set_font("Arial", 'B', 14)
-            pdf.cell(190, 10, txt=f"SALE CHART ({period.upper()})", ln=True, align='C')
-            pdf.set_font("Arial", size=10)
-            
-            # Prepare date display for header based on period
-            if period == "Daily":
-                header_date = datetime.now().strftime('%d-%m-%Y')
-                pdf.cell(190, 8, txt=f"DATE: {header_date}", ln=True, align='R')
-            elif period == "Weekly":
-                start_date = (datetime.now() - timedelta(days=7)).strftime('%d-%m')
-                end_date = datetime.now().strftime('%d-%m-%Y')
-                pdf.cell(190, 8, txt=f"DATE RANGE: {start_date} till {end_date}", ln=True, align='R')
-            elif period == "Monthly":
-                month_year = datetime.now().strftime('%B %Y')
-                pdf.cell(190, 8, txt=f"MONTH: {month_year}", ln=True, align='R')
-            elif period == "Yearly":
-                year_val = datetime.now().strftime('%Y')
-                pdf.cell(190, 8, txt=f"YEAR: {year_val}", ln=True, align='R')
-            else:
-                pdf.cell(190, 8, txt=f"GENERATED: {datetime.now().strftime('%d/%m/%Y %I:%M %p')}", ln=True, align='R')
-            pdf.ln(5)
-
-            pdf.set_fill_color(240, 240, 240)
-            pdf.set_font("Arial", 'B', 9)
-            pdf.cell(10, 8, "#", 1, 0, 'C', 1)
-            pdf.cell(40, 8, "CATEGORY", 1, 0, 'C', 1)
-            pdf.cell(60, 8, "BRAND NAME", 1, 0, 'C', 1)
-            pdf.cell(50, 8, "SIZE", 1, 0, 'C', 1)
-            pdf.cell(30, 8, "QTY", 1, 1, 'C', 1)
-            
-            pdf.set_font("Arial", size=9)
-            for i, row in enumerate(records):
-                # Order number starts from #1
-                pdf.cell(10, 7, str(i + 1), 1, 0, 'C')
-                # Skip date column - date info is already in the header
-                pdf.cell(40, 7, str(row[1]), 1, 0, 'C')  # Category
-                pdf.cell(60, 7, str(row[2]), 1, 0, 'L')  # Brand Name
-                pdf.cell(50, 7, str(row[3]), 1, 0, 'C')  # Size
-                pdf.cell(30, 7, str(row[4]), 1, 1, 'C')  # Qty
-
-            if not records:
-                pdf.cell(190, 10, "No sales recorded for this period.", 1, 1, 'C')
-
-            pdf.output(file_path)
-            messagebox.showinfo("Success", f"Sale Chart Saved:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to generate PDF: {str(e)}")
-
-    def download_detailed_report(self):
-        try:
-            period = self.filter_var.get()
-            
-            if period == "Daily":
-                date_suffix = datetime.now().strftime("%d %b")
-            elif period == "Weekly":
-                start_str = (datetime.now() - timedelta(days=7)).strftime("%d %b")
-                end_str = datetime.now().strftime("%d %b")
-                date_suffix = f"{start_str} - {end_str}"
-            elif period == "Monthly":
-                date_suffix = datetime.now().strftime("%B %Y")
-            elif period == "Yearly":
-                date_suffix = datetime.now().strftime("%Y")
-            else:
-                date_suffix = datetime.now().strftime("%Y-%m-%d")
-
-            file_name = f"detailed transaction report {date_suffix}.pdf"
-            
-            file_path = filedialog.asksaveasfilename(defaultextension=".pdf", 
-                                                   filetypes=[("PDF files", "*.pdf")],
-                                                   initialfile=file_name)
-            if not file_path: return
-
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            
-            today_str = datetime.now().strftime("%Y-%m-%d")
-            month_str = datetime.now().strftime("%Y-%m")
-            year_str = datetime.now().strftime("%Y")
-            where_clause = ""
-            params = ()
-            if period == "Daily":
-                where_clause = "WHERE s.date LIKE ?"; params = (f"{today_str}%",)
-            elif period == "Weekly":
-                start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-                where_clause = "WHERE s.date >= ?"; params = (start_date,)
-            elif period == "Monthly":
-                where_clause = "WHERE strftime('%Y-%m', s.date) = ?"; params = (month_str,)
-            elif period == "Yearly":
-                where_clause = "WHERE strftime('%Y', s.date) = ?"; params = (year_str,)
-
-            # Show each individual transaction without grouping
-            query = f"""
-                SELECT s.date, COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, ''), s.qty, s.total 
-                FROM sales_log s 
-                LEFT JOIN inventory i ON s.barcode = i.barcode 
-                {where_clause} 
-                ORDER BY s.date DESC
-            """
-            cur.execute(query, params)
-            records = cur.fetchall()
-            conn.close()
-
-            pdf = FPDF()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.add_page()
-            
-            pdf.set_font("Arial", 'B', 10)
-            pdf.cell(190, 5, txt="SHREE GANESHAY NAMAH", ln=True, align='C')
-            pdf.set_font("Arial", 'B', 18)
-            pdf.cell(190, 10, txt="V J BEER SHOPEE", ln=True, align='C')
-            pdf.set_font("Arial", 'B', 14)
-            pdf.cell(190, 10, txt=f"DETAILED TRANSACTION REPORT ({period.upper()})", ln=True, align='C')
-            pdf.set_font("Arial", size=10)
-            if period in ["Daily", "Weekly", "Monthly"]:
-                pdf.cell(190, 8, txt=f"GENERATED: {datetime.now().strftime('%d/%m/%Y %I:%M %p')}", ln=True, align='R')
-            else:
-                pdf.cell(190, 8, txt=f"GENERATED: {datetime.now().strftime('%d/%m/%Y %H:%M')}", ln=True, align='R')
-            pdf.ln(5)
-
-            pdf.set_fill_color(240, 240, 240)
-            pdf.set_font("Arial", 'B', 8)
-            pdf.cell(35, 8, "TIME", 1, 0, 'C', 1)
-            pdf.cell(25, 8, "CATEGORY", 1, 0, 'C', 1)
-            pdf.cell(60, 8, "BRAND", 1, 0, 'C', 1)
-            pdf.cell(15, 8, "QTY", 1, 0, 'C', 1)
-            pdf.cell(25, 8, "PRICE", 1, 0, 'C', 1)
-            pdf.cell(30, 8, "TOTAL", 1, 1, 'C', 1)
-            
-            pdf.set_font("Arial", size=8)
-            grand_total = 0
-            
-            for row in records:
-                s_date, s_cat, s_brand, s_size, s_qty, s_total = row
-                
-                # Format Brand with Size
-                if s_size and s_size != '-' and s_size != '':
-                    display_brand = f"{s_brand} ({s_size})"
-                else:
-                    display_brand = s_brand
-
-                if period in ["Daily", "Weekly", "Monthly"]:
-                    try:
-                        dt_obj = datetime.strptime(s_date, "%Y-%m-%d %H:%M:%S")
-                        display_time = dt_obj.strftime("%d/%m %I:%M %p")
-                    except:
-                        display_time = str(s_date)
-                else:
-                    display_time = str(s_date)
-
-                try:
-                    qty_val = float(s_qty)
-                    total_val = float(s_total)
-                    brand_price = total_val / qty_val if qty_val > 0 else 0
-                    grand_total += total_val
-                except:
-                    brand_price = 0
-                    total_val = 0
-
-                pdf.cell(35, 7, display_time, 1, 0, 'C')
-                pdf.cell(25, 7, str(s_cat), 1, 0, 'C')
-                pdf.cell(60, 7, str(display_brand)[:35], 1, 0, 'L')
-                pdf.cell(15, 7, str(s_qty), 1, 0, 'C')
-                pdf.cell(25, 7, f"{brand_price:,.2f}", 1, 0, 'R')
-                pdf.cell(30, 7, f"{total_val:,.2f}", 1, 1, 'R')
-
-            pdf.set_font("Arial", 'B', 9)
-            pdf.cell(160, 8, "GRAND TOTAL:", 1, 0, 'R', 1)
-            pdf.cell(30, 8, f"{grand_total:,.2f}", 1, 1, 'R', 1)
-
-            if not records:
-                pdf.cell(190, 10, "No transactions found.", 1, 1, 'C')
+                fetch_and_print(pdf, SalesQuery(period))
 
             pdf.output(file_path)
             messagebox.showinfo("Success", f"Detailed Report Saved:\n{file_path}")
@@ -1,19 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime
-import os
-import sys
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if getattr(sys, 'frozen', False):
-    BASE_DIR = os.path.dirname(sys.executable)
-DB_PATH = os.path.join(BASE_DIR, "db", "IEEE_Shop.db")
+from core.db_writer import get_writer
+from core.pos_server import get_client
+from core.services import ReferenceService
+from core.refdata import get_refdata, invalidate_all
 
 class BrandClass:
     def __init__(self, parent, back_cmd):
         self.parent = parent
         self.back_cmd = back_cmd
+        self.refs = ReferenceService(remote=get_client())
         
         # UI Colors
         self.clr_bg = "#0f172a"
@@ -80,7 +78,6 @@ class BrandClass:
 
         # Initialize Data
         self.setup_table(content)
-        self.db_migration()
         self.load_categories()
         self.show()
 
@@ -102,10 +99,7 @@ class BrandClass:
 
     def load_categories(self):
         try:
-            conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-            cur.execute("CREATE TABLE IF NOT EXISTS categories (cid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)")
-            cur.execute("SELECT name FROM categories")
-            cats = [r[0] for r in cur.fetchall()]
+            cats = list(get_refdata(remote=self.refs.remote).categories())
             if not cats: cats = ["Beer", "Wine"]
             self.txt_cat['values'] = cats
             # Set Beer as default if available
@@ -113,7 +107,6 @@ class BrandClass:
                 self.txt_cat.set("Beer")
             elif cats:
                 self.txt_cat.set(cats[0])
-            conn.close()
         except: pass
 
     def setup_table(self, content):
@@ -134,17 +127,6 @@ class BrandClass:
         tk.Button(table_card, text="DELETE SELECTED BRAND", font=("Helvetica", 10, "bold"), 
                  bg="#ef4444", fg="white", cursor="hand2", bd=0, command=self.delete).pack(fill="x", pady=(20, 0), ipady=10)
 
-    def db_migration(self):
-        try:
-            conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-            # Migration: Ensure table exists and has the category column
-            cur.execute("CREATE TABLE IF NOT EXISTS brands (bid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)")
-            cols = [c[1] for c in cur.execute("PRAGMA table_info(brands)").fetchall()]
-            if 'category' not in cols: 
-                cur.execute("ALTER TABLE brands ADD COLUMN category TEXT")
-            conn.commit(); conn.close()
-        except Exception as e: print(f"Migration Error: {e}")
-
     def add(self):
         name = self.var_name.get()
         if name == "" or name == "Enter Brand Name":
@@ -155,29 +137,22 @@ class BrandClass:
         if cat == "Select Category":
             cat = "" # Fallback or error
 
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            cur.execute("INSERT INTO brands (name, category) VALUES (?, ?)", (name, cat))
-            conn.commit()
-            conn.close()
+        def done(_):
+            invalidate_all()
             messagebox.showinfo("Success", "Brand registered!")
             self.var_name.set(""); self.add_placeholder(self.txt_name, "Enter Brand Name")
             self.var_cat.set("Select Category")
             self.show()
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+
+        get_writer().submit(self.parent, lambda cur: self.refs.add("brands", (name, cat), cur=cur),
+                            on_done=done, transactional=not self.refs.remote)
 
     def show(self):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            cur.execute("SELECT bid, name, category FROM brands")
-            rows = cur.fetchall()
+            rows = self.refs.rows("brands")
             self.brandTable.delete(*self.brandTable.get_children())
             for row in rows:
                 self.brandTable.insert('', tk.END, values=row)
-            conn.close()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -190,15 +165,12 @@ class BrandClass:
             return
         
         if messagebox.askyesno("Confirm", "Do you really want to delete this brand?"):
-            try:
-                conn = sqlite3.connect(DB_PATH)
-                cur = conn.cursor()
-                cur.execute("DELETE FROM brands WHERE bid=?", (row[0],))
-                conn.commit()
-                conn.close()
-                self.show()
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            get_writer().submit(self.parent, lambda cur: self.refs.delete("brands", row[0], cur=cur),
+                                on_done=self.deleted, transactional=not self.refs.remote)
+
+    def deleted(self, _):
+        invalidate_all()
+        self.show()
 
 if __name__ == "__main__":
     root = tk.Tk()
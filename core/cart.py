@@ -0,0 +1,73 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+# Checkout cart model. Lines are keyed by barcode (dict keeps scan order) and
+# money is held in integer paise, so the grand total is updated by the line's
+# delta on every scan instead of re-summing floats over the whole cart.
+
+
+def to_paise(amount):
+    return int(Decimal(str(amount)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def rupees(paise):
+    return paise / 100
+
+
+def format_rupees(paise):
+    return f"₹{paise / 100:,.2f}"
+
+
+class CartLine:
+    __slots__ = ("barcode", "category", "brand", "size", "price_paise", "qty")
+
+    def __init__(self, barcode, category, brand, size, price_paise, qty=0):
+        self.barcode = barcode
+        self.category = category
+        self.brand = brand
+        self.size = size
+        self.price_paise = price_paise
+        self.qty = qty
+
+    @property
+    def total_paise(self):
+        return self.price_paise * self.qty
+
+
+class Cart:
+    def __init__(self):
+        self.lines = {}
+        self.total_paise = 0
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __contains__(self, barcode):
+        return barcode in self.lines
+
+    def qty(self, barcode):
+        line = self.lines.get(barcode)
+        return line.qty if line else 0
+
+    def add(self, barcode, category, brand, size, price, qty):
+        """Add qty of an item (price in rupees) and return its CartLine."""
+        line = self.lines.get(barcode)
+        if line is None:
+            line = self.lines[barcode] = CartLine(barcode, category, brand, size, to_paise(price))
+        line.qty += qty
+        self.total_paise += line.price_paise * qty
+        return line
+
+    def remove(self, barcode):
+        line = self.lines.pop(barcode, None)
+        if line:
+            self.total_paise -= line.total_paise
+        return line
+
+    def clear(self):
+        self.lines.clear()
+        self.total_paise = 0
+
+    def sale_lines(self):
+        """Lines in the shape core.sales.record_sale expects."""
+        return [(l.barcode, l.brand, l.size, rupees(l.price_paise), l.qty, rupees(l.total_paise))
+                for l in self.lines.values()]
@@ -0,0 +1,92 @@
+import threading
+from collections import namedtuple
+
+from core.db import get_conn, DB_PATH
+from core import inventory_feed
+
+# Process-wide barcode -> item cache for the checkout scan path. Loaded in one
+# query on first use, then kept in step two ways:
+#   - writers in this process call invalidate(barcode) after committing, which
+#     re-reads just that row;
+#   - PRAGMA data_version moving (another till or thread committed) re-reads
+#     the rows the inventory change feed lists since our last look; only if
+#     the feed can't say (pruned, missing) is the whole dict reloaded.
+Item = namedtuple("Item", "barcode supplier category brand size price quantity")
+
+ITEM_SQL = "SELECT barcode, supplier, category, brand, size, price, quantity FROM inventory"
+
+
+class Catalog:
+    def __init__(self, path=None, track_external=True):
+        self.path = path or DB_PATH
+        # False when this process is the only writer (core/pos_server.py):
+        # invalidate() then sees every change and data_version is not polled
+        self.track_external = track_external
+        self._items = None
+        self._versions = {}  # connection id -> data_version seen at load
+        self._seq = 0  # inventory_changes seq applied so far
+        self._lock = threading.Lock()
+
+    def _fresh(self, conn):
+        if self._items is not None and not self.track_external:
+            return
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        key = id(conn)
+        if self._items is not None and self._versions.get(key) == version:
+            return
+        if self._items is not None and key in self._versions:
+            # Someone else committed since we looked
+            feed = inventory_feed.changes_since(conn, self._seq)
+            if feed is None:
+                self._items = None
+            else:
+                self._seq, changed = feed
+                self._reread(conn, changed)
+        if self._items is None:
+            # seq first: a commit landing mid-load is just applied again later
+            self._seq = inventory_feed.last_seq(conn)
+            self._items = {row[0]: Item(*row) for row in conn.execute(ITEM_SQL)}
+            self._versions.clear()
+        self._versions[key] = version
+
+    def _reread(self, conn, barcodes):
+        for barcode in barcodes:
+            barcode = str(barcode)
+            row = conn.execute(ITEM_SQL + " WHERE barcode=?", (barcode,)).fetchone()
+            if row:
+                self._items[barcode] = Item(*row)
+            else:
+                self._items.pop(barcode, None)
+
+    def get(self, barcode):
+        """Return the Item for barcode, or None if it is not stocked."""
+        conn = get_conn(self.path)
+        with self._lock:
+            self._fresh(conn)
+            return self._items.get(str(barcode))
+
+    def invalidate(self, *barcodes):
+        """Re-read the given rows after a local write (insert, update or delete)."""
+        conn = get_conn(self.path)
+        with self._lock:
+            if self._items is None:
+                return
+            self._reread(conn, barcodes)
+
+    def clear(self):
+        with self._lock:
+            self._items = None
+            self._versions.clear()
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path=None):
+    path = path or DB_PATH
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None:
+            catalog = _catalogs[path] = Catalog(path)
+        return catalog
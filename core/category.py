@@ -1,18 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import sqlite3
-import os
-import sys
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if getattr(sys, 'frozen', False):
-    BASE_DIR = os.path.dirname(sys.executable)
-DB_PATH = os.path.join(BASE_DIR, "db", "IEEE_Shop.db")
+from core.db_writer import get_writer
+from core.pos_server import get_client
+from core.services import ReferenceService
+from core.refdata import invalidate_all
 
 class CategoryClass:
     def __init__(self, parent, back_cmd=None):
         self.parent = parent
         self.back_cmd = back_cmd
+        self.refs = ReferenceService(remote=get_client())
         
         # Colors
         self.clr_bg = "#0f172a"
@@ -93,30 +91,21 @@ class CategoryClass:
             messagebox.showerror("Error", "Category name is required")
             return
 
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            cur.execute("CREATE TABLE IF NOT EXISTS categories (cid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)")
-            cur.execute("INSERT INTO categories (name) VALUES (?)", (name,))
-            conn.commit()
-            conn.close()
+        def done(_):
+            invalidate_all()
             messagebox.showinfo("Success", "Category added!")
             self.var_name.set(""); self.add_placeholder(self.txt_name, "Enter Category (e.g., Beer, Wine, Soda)")
             self.show()
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+
+        get_writer().submit(self.parent, lambda cur: self.refs.add("categories", (name,), cur=cur),
+                            on_done=done, transactional=not self.refs.remote)
 
     def show(self):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            cur.execute("CREATE TABLE IF NOT EXISTS categories (cid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)")
-            cur.execute("SELECT * FROM categories")
-            rows = cur.fetchall()
+            rows = self.refs.rows("categories")
             self.categoryTable.delete(*self.categoryTable.get_children())
             for row in rows:
                 self.categoryTable.insert('', tk.END, values=row)
-            conn.close()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -137,15 +126,12 @@ class CategoryClass:
             return
         
         if messagebox.askyesno("Confirm", "Do you really want to delete?"):
-            try:
-                conn = sqlite3.connect(DB_PATH)
-                cur = conn.cursor()
-                cur.execute("DELETE FROM categories WHERE cid=?", (row[0],))
-                conn.commit()
-                conn.close()
-                self.show()
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            get_writer().submit(self.parent, lambda cur: self.refs.delete("categories", row[0], cur=cur),
+                                on_done=self.deleted, transactional=not self.refs.remote)
+
+    def deleted(self, _):
+        invalidate_all()
+        self.show()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,18 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-from datetime import datetime
-import os
 
-import sys
-
-# New Pathing
-if getattr(sys, 'frozen', False):
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-DB_PATH = os.path.join(BASE_DIR, "db", "IEEE_Shop.db")
+from core.db_writer import get_writer
+from core.services import SalesService
+from core.pos_server import get_client
+from core.sales import StockShortage
+from core.sales_journal import replay_later
+from core.cart import rupees, format_rupees
+from core.scan_buffer import ScanBuffer, BATCH_MS
 
 class checkoutWindowClass:
     def __init__(self, parent, back_cmd):
@@ -70,6 +65,11 @@ class checkoutWindowClass:
         style.configure("Treeview", background="#1e293b", foreground="white", fieldbackground="#1e293b", borderwidth=0)
         style.map("Treeview", background=[('selected', '#10b981')])
 
+        # Cart and bill logic live in SalesService (core/services.py); the tree
+        # below only renders its cart
+        self.sales = SalesService(remote=get_client())
+        self.cart = self.sales.cart
+        self.scans = ScanBuffer()
         cols = ("Barcode", "Category", "Brand", "Size", "Rate", "Qty", "Total")
         self.tree = ttk.Treeview(right, columns=cols, show="headings")
         
@@ -150,91 +150,115 @@ class checkoutWindowClass:
 
         try:
             q = int(q)
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            # Fetch Supplier, Barcode, Category, Brand, Size, Rate, Stock
-            cur.execute("SELECT supplier, barcode, category, brand, size, price, quantity FROM inventory WHERE barcode=?", (b,))
-            row = cur.fetchone()
-            conn.close()
-
-            if not row:
-                # If product not found (row is None), show clearer error
-                self.msg(f"❌ Product Not Found: {b}", "#f43f5e")
-                # Optional: Clear field to allow retry
-                self.barcode_ent.delete(0, tk.END)
-                return
-
-            sup, barcode, cat, brand, size, rate, stock = row
-            current_cart_qty = 0
-            if self.tree.exists(b):
-                curr = self.tree.item(b)["values"]
-                current_cart_qty = int(curr[5])
-
-            if stock < (q + current_cart_qty):
-                self.msg(f"❌ Shortage: Only {stock}", "#f43f5e")
-                messagebox.showwarning("Out of Stock", f"No stock for {brand}\nAvailable Quantity: {stock}")
-                return
-
-            total = rate * q
-            if self.tree.exists(b):
-                curr = self.tree.item(b)["values"]
-                new_q = int(curr[5]) + q # Qty is at index 5 now (Barcode[0], Cat[1], Brand[2], Size[3], Rate[4], Qty[5])
-                self.tree.item(b, values=(barcode, cat, brand, size, rate, new_q, rate * new_q))
-            else:
-                self.tree.insert("", "end", iid=b, values=(barcode, cat, brand, size, rate, q, total))
-
+        except ValueError:
+            self.msg("❌ Quantity must be a number", "#f43f5e")
+            return
+
+        # Just queue the scan and get the field ready for the next one; the
+        # batch is resolved in flush_scans once the burst settles
+        self.barcode_ent.delete(0, tk.END)
+        self.qty_ent.delete(0, tk.END); self.qty_ent.insert(0, "1")
+        self.barcode_ent.focus()
+        if self.scans.push(b, q):
+            self.parent.after(BATCH_MS, self.flush_scans)
+
+    def flush_scans(self):
+        changed, missing, short = self.sales.scan_batch(self.scans.drain())
+
+        # One round of widget updates per batch
+        for line, new_line in changed.values():
+            self.show_line(line, new_line)
+        if changed:
             self.update_total()
-            self.barcode_ent.delete(0, tk.END) # This triggers focus out -> placeholder? No, focus is still in.
-            # If focus is still in, we want empty field, not placeholder.
-            # My logic in on_focus_out puts placeholder back if empty.
-            # Since focus is effectively still here (we didn't move it), we just want empty.
-            # But wait, self.barcode_ent.focus() is called at end.
-            
-            self.qty_ent.delete(0, tk.END); self.qty_ent.insert(0, "1")
-            self.barcode_ent.focus()
-            self.msg("✅ Added Item", "#10b981")
 
-        except ValueError: self.msg("❌ Quantity must be a number", "#f43f5e")
+        short = [f"{brand} {size}: available {available}" for _, brand, size, _, available in short]
+        rate = self.scans.rate()
+        if missing:
+            self.msg(f"❌ Product Not Found: {', '.join(missing)}", "#f43f5e")
+        elif short:
+            self.msg(f"❌ Shortage: {short[0]}", "#f43f5e")
+        elif changed:
+            self.msg(f"✅ Added {len(changed)} item(s) · {rate:.1f} scans/s", "#10b981")
+        if short:
+            messagebox.showwarning("Out of Stock", "No stock for:\n" + "\n".join(short))
 
     def msg(self, text, color):
         self.lbl_msg.config(text=text, fg=color)
 
+    def show_line(self, line, new_line):
+        # Barcode, Cat, Brand, Size, Rate, Qty, Total
+        values = (line.barcode, line.category, line.brand, line.size,
+                  f"{rupees(line.price_paise):.2f}", line.qty, f"{rupees(line.total_paise):.2f}")
+        if new_line:
+            self.tree.insert("", "end", iid=line.barcode, values=values)
+        else:
+            self.tree.item(line.barcode, values=values)
+
+    def clear_cart(self):
+        self.cart.clear()
+        self.tree.delete(*self.tree.get_children())
+        self.update_total()
+
     def update_total(self):
-        total = sum(float(self.tree.item(item)["values"][6]) for item in self.tree.get_children())
-        self.lbl_total.config(text=f"GRAND TOTAL: ₹{total:,.2f}")
+        self.lbl_total.config(text=f"GRAND TOTAL: {format_rupees(self.cart.total_paise)}")
 
     def finish_sale(self):
-        if not self.tree.get_children(): return
+        if len(self.scans): self.flush_scans() # bill what was scanned just before F12
+        if not self.cart: return
         if messagebox.askyesno("Confirm", "Process Payment & Finalize?"):
-            try:
-                conn = sqlite3.connect(DB_PATH)
-                cur = conn.cursor()
-                cur.execute("CREATE TABLE IF NOT EXISTS transactions (tid INTEGER PRIMARY KEY AUTOINCREMENT, items TEXT, total REAL, date TEXT)")
-                cur.execute("CREATE TABLE IF NOT EXISTS sales_log (sid INTEGER PRIMARY KEY AUTOINCREMENT, barcode TEXT, brand TEXT, supplier TEXT, qty INTEGER, total REAL, date TEXT)")
-                
-                bill_items = []
-                for child in self.tree.get_children():
-                    v = self.tree.item(child)["values"] # Barcode, Cat, Brand, Size, Rate, Qty, Total
-                    bill_items.append(f"{v[2]} {v[3]} x{v[5]}")
-                    
-                    # We need supplier for sales_log, let's fetch it one last time to be sure
-                    cur.execute("SELECT supplier FROM inventory WHERE barcode=?", (v[0],))
-                    db_sup = cur.fetchone()[0]
-                    
-                    cur.execute("INSERT INTO sales_log (barcode, brand, supplier, qty, total, date) VALUES (?, ?, ?, ?, ?, ?)",
-                               (v[0], v[2], db_sup, v[5], v[6], datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-                    
-                    # Update Stock - v[0] is barcode, v[5] is qty
-                    cur.execute("UPDATE inventory SET quantity = quantity - ? WHERE barcode = ?", (v[5], v[0]))
-                
-                total_text = self.lbl_total.cget("text")
-                total_val = float(total_text.split("₹")[1].replace(",", ""))
-                cur.execute("INSERT INTO transactions (items, total, date) VALUES (?, ?, ?)", 
-                           (", ".join(bill_items), total_val, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-                conn.commit(); conn.close()
-                messagebox.showinfo("Success", "Transaction Complete. Stock Adjusted.")
-                self.tree.delete(*self.tree.get_children()); self.update_total()
-            except Exception as e: messagebox.showerror("System Error", str(e))
+            # Journal the bill, hand it to the writer thread and clear the till
+            # straight away, so the next customer can be scanned while this one
+            # is persisted. The writer fsyncs the journal, takes the write lock,
+            # then re-checks stock.
+            bill = self.sales.prepare_bill()
+            self.clear_cart()
+            self.msg("⏳ Saving bill...", "#94a3b8")
+            get_writer().submit(self.parent, lambda cur: self.sales.commit_bill(cur, bill),
+                                on_done=lambda res: self.sale_saved(res, bill),
+                                on_error=lambda e: self.sale_failed(e, bill),
+                                immediate=True, prepare=self.sales.journal.sync,
+                                transactional=not self.sales.remote)
+
+    def sale_saved(self, result, bill):
+        tid, total = result
+        self.sales.bill_saved(bill)
+        self.msg(f"✅ Bill #{tid} saved - ₹{total:,.2f}. Stock Adjusted.", "#10b981")
+
+    def journal_posted(self, posted, rejected):
+        if posted or rejected:
+            self.sales.catalog.clear()
+        if posted:
+            self.msg(f"✅ {posted} journaled bill(s) posted", "#10b981")
+        if rejected:
+            # Stock ran out (another till) before the retry got through
+            self.msg(f"❌ {len(rejected)} journaled bill(s) rejected - shortage", "#f43f5e")
+            messagebox.showwarning("Out of Stock", "Journaled bill(s) could not be posted:\n" + "\n".join(
+                f"{brand} {size}: wanted {wanted}, available {'?' if available is None else available}"
+                for lines in rejected.values() for _, brand, size, wanted, available in lines))
+
+    def sale_failed(self, e, bill):
+        if not isinstance(e, StockShortage):
+            # The bill is safe in the sales journal; keep selling and post it
+            # once the database is reachable again
+            self.msg("⚠ Database busy - bill kept in journal, will post automatically", "#f59e0b")
+            print(f"Bill {bill.bill_id} not committed, queued for replay: {e}")
+            self.sales.bill_failed(bill)
+            replay_later(self.parent, on_done=self.journal_posted, sales=self.sales)
+            return
+        # Nothing was written. Put the bill back if the till is free, and
+        # highlight the short lines so the cashier can fix it
+        restored = self.sales.bill_rejected(bill, e)
+        if restored:
+            for line in restored:
+                self.show_line(line, True)
+            self.update_total()
+            for barcode, *_ in e.lines:
+                if barcode in self.cart:
+                    self.tree.selection_add(barcode)
+        self.msg("❌ Shortage - bill not saved", "#f43f5e")
+        messagebox.showwarning("Out of Stock", "\n".join(
+            f"{brand} {size}: wanted {wanted}, available {'?' if available is None else available}"
+            for _, brand, size, wanted, available in e.lines))
 
 if __name__ == "__main__":
     root = tk.Tk()
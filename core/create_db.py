@@ -1,52 +1,28 @@
-import sqlite3
-import os
+from core.db import get_conn, configure_journal
+from core.migrations import migrate
+from core.sales_journal import replay_at_startup
+from core import inventory_feed
 
-import sys
+def init_db(path=None):
+    conn = get_conn(path)
+    configure_journal(conn)
 
-if getattr(sys, 'frozen', False):
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Tables, columns and indexes are owned by the versioned migrations
+    migrate(conn)
 
-DB_PATH = os.path.join(BASE_DIR, "db", "IEEE_Shop.db")
+    # Bills that were journaled but never reached the DB last session
+    replay_at_startup(conn)
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    # Inventory Table
-    cur.execute("""CREATE TABLE IF NOT EXISTS inventory (
-        barcode TEXT PRIMARY KEY,
-        name TEXT,
-        price REAL,
-        quantity INTEGER,
-        category TEXT,
-        brand TEXT,
-        size TEXT,
-        supplier TEXT,
-        timestamp TEXT
-    )""")
+    # Keep the inventory change feed from growing without bound
+    inventory_feed.prune(conn)
 
-    # Users Table
-    cur.execute("CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT, role TEXT)")
+    # Default users
+    cur = conn.cursor()
     cur.execute("INSERT OR IGNORE INTO users VALUES ('admin', 'admin123', 'Admin')")
     cur.execute("INSERT OR IGNORE INTO users VALUES ('seller', 'seller123', 'Seller')")
 
-    # Categories Table
-    cur.execute("CREATE TABLE IF NOT EXISTS categories (cid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)")
-
-    # Suppliers Table
-    cur.execute("CREATE TABLE IF NOT EXISTS suppliers (sid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, contact TEXT)")
-
-    # Transactions Table
-    cur.execute("CREATE TABLE IF NOT EXISTS transactions (tid INTEGER PRIMARY KEY AUTOINCREMENT, items TEXT, total REAL, date TEXT)")
-
-    # Stock History Table
-    cur.execute("CREATE TABLE IF NOT EXISTS stock_history (id INTEGER PRIMARY KEY AUTOINCREMENT, supplier TEXT, brand TEXT, size TEXT, qty INTEGER, date TEXT)")
-
     conn.commit()
-    conn.close()
     print("Database initialized successfully!")
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
@@ -2,17 +2,10 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 from PIL import Image, ImageTk
 from datetime import datetime
-import sqlite3
 import os
-import sys
 
-# Paths
-if getattr(sys, 'frozen', False):
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-DB_PATH = os.path.join(BASE_DIR, "db", "IEEE_Shop.db")
+from core.pos_server import get_client
+from core.services import InventoryService
 
 # Sub-module imports
 from core.inventory_window import InventoryHub
@@ -29,6 +22,8 @@ class IMS:
         self.root.geometry("1350x750+0+0")
         self.root.title(f"VJ BEER SHOPE - COMMAND CENTER")
         self.root.config(bg="#0f172a")
+        # Local database, or the POS server on a client till
+        self.stock = InventoryService(remote=get_client())
 
         # DESIGN TOKENS
         self.clr_bg = "#0f172a"
@@ -152,10 +147,7 @@ class IMS:
         tk.Label(alert_frame, text="⚠️ CRITICAL STOCK ALERTS", font=("Helvetica", 12, "bold"), bg="#1e293b", fg="#f59e0b").pack(anchor="w", pady=(0, 15))
         
         try:
-            conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-            cur.execute("SELECT brand, name, quantity FROM inventory WHERE quantity < 10 ORDER BY quantity ASC")
-            low_stock = cur.fetchall()
-            conn.close()
+            low_stock = self.stock.low_stock()
             
             if not low_stock:
                 tk.Label(alert_frame, text="✅ All stock levels are healthy.", font=("Helvetica", 10), bg="#1e293b", fg="#94a3b8").pack(anchor="w")
@@ -0,0 +1,211 @@
+import sqlite3
+import threading
+import atexit
+import os
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Shared data-access layer: one long-lived connection per thread instead of
+# a fresh sqlite3.connect() (and schema parse) on every scan / refresh.
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DB_PATH = os.path.join(BASE_DIR, "db", "IEEE_Shop.db")
+
+# Journaling: WAL lets the analytics screen and other tills read while a
+# bill is being written. Use DELETE if the db folder sits on a network share
+# (WAL needs shared memory, which SMB/NFS mounts do not provide).
+JOURNAL_MODE = os.environ.get("VJ_DB_JOURNAL_MODE", "WAL").upper()
+# How long a connection waits for another till's write lock before raising
+# "database is locked"
+BUSY_TIMEOUT_MS = int(os.environ.get("VJ_DB_BUSY_TIMEOUT_MS", "5000"))
+# Checkpoint policy: fold the WAL back into the db every N pages (~4MB),
+# and truncate it on clean shutdown
+WAL_AUTOCHECKPOINT = int(os.environ.get("VJ_DB_WAL_AUTOCHECKPOINT", "1000"))
+# FULL keeps every committed bill durable across a power cut
+SYNCHRONOUS = os.environ.get("VJ_DB_SYNCHRONOUS", "FULL").upper()
+
+# Per-connection pragmas, applied once when the connection is opened
+CONNECTION_PRAGMAS = (
+    "PRAGMA cache_size = -8000",   # ~8MB page cache per connection
+    "PRAGMA temp_store = MEMORY",  # GROUP BY / ORDER BY scratch space in RAM
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    f"PRAGMA synchronous = {SYNCHRONOUS}",
+    f"PRAGMA wal_autocheckpoint = {WAL_AUTOCHECKPOINT}",
+    "PRAGMA foreign_keys = ON",    # transaction_items go with their bill
+)
+
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pool = {}  # (thread id, path) -> connection, so close_all() can reach every thread
+
+
+def connect(path=None):
+    """Open a new configured connection (callers own its lifetime)."""
+    conn = sqlite3.connect(path or DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_conn(path=None):
+    """Return this thread's pooled connection, opening it on first use."""
+    path = path or DB_PATH
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = connect(path)
+        conns[path] = conn
+        with _pool_lock:
+            _pool[(threading.get_ident(), path)] = conn
+    return conn
+
+
+def configure_journal(conn):
+    """Switch the database file to JOURNAL_MODE (persistent, so done once by init_db)."""
+    mode = conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}").fetchone()[0]
+    if mode.upper() != JOURNAL_MODE:
+        print(f"Journal mode {JOURNAL_MODE} unavailable, using {mode}")
+    return mode
+
+
+def checkpoint(mode="PASSIVE", path=None):
+    """Copy WAL frames back into the database. PASSIVE never waits on readers or writers."""
+    conn = get_conn(path)
+    if conn.execute("PRAGMA journal_mode").fetchone()[0].upper() != "WAL":
+        return None
+    return conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+
+@contextmanager
+def transaction(path=None, immediate=False):
+    """Yield a cursor on the pooled connection; commit on success, roll back on error.
+
+    immediate=True takes the write lock up front (BEGIN IMMEDIATE), so reads
+    made inside the block cannot be invalidated by another till's commit.
+    """
+    conn = get_conn(path)
+    cur = conn.cursor()
+    try:
+        if immediate:
+            cur.execute("BEGIN IMMEDIATE")
+        yield cur
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+@contextmanager
+def snapshot(path=None):
+    """Yield a cursor whose reads all see one consistent state of the database.
+
+    Holds a read transaction (under WAL, writers carry on meanwhile).
+    """
+    conn = get_conn(path)
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN")
+        yield cur
+    finally:
+        cur.close()
+        conn.rollback()
+
+
+class QueryCache:
+    """Memoizes read-only query results until the database changes.
+
+    Validity is (PRAGMA data_version, total_changes): data_version moves when
+    any *other* connection (till, thread) commits, total_changes when this
+    one writes. Either moving drops every cached result.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._rows = OrderedDict()
+        self._token = None
+        self.hits = 0
+        self.misses = 0
+
+    def token(self, conn):
+        return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+    def fetchall(self, conn, sql, params=()):
+        token = self.token(conn)
+        if token != self._token:
+            self._rows.clear()
+            self._token = token
+        key = (sql, tuple(params))
+        rows = self._rows.get(key)
+        if rows is None:
+            self.misses += 1
+            rows = conn.execute(sql, params).fetchall()
+            self._rows[key] = rows
+            if len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+        else:
+            self.hits += 1
+            self._rows.move_to_end(key)
+        return rows
+
+
+def get_cache(path=None):
+    """Return the result cache bound to this thread's pooled connection."""
+    path = path or DB_PATH
+    caches = getattr(_local, "caches", None)
+    if caches is None:
+        caches = _local.caches = {}
+    cache = caches.get(path)
+    if cache is None:
+        cache = caches[path] = QueryCache()
+    return cache
+
+
+def cached_fetchall(sql, params=(), path=None):
+    return get_cache(path).fetchall(get_conn(path), sql, params)
+
+
+def close_conn(path=None):
+    """Close the calling thread's pooled connection (e.g. when a worker exits)."""
+    path = path or DB_PATH
+    conns = getattr(_local, "conns", {})
+    conn = conns.pop(path, None)
+    getattr(_local, "caches", {}).pop(path, None)
+    if conn is not None:
+        with _pool_lock:
+            _pool.pop((threading.get_ident(), path), None)
+        conn.close()
+
+
+def close_all():
+    if DB_PATH in getattr(_local, "conns", {}):
+        try:
+            # Let SQLite refresh planner statistics it found missing/stale
+            get_conn().execute("PRAGMA optimize")
+            checkpoint("TRUNCATE")
+        except sqlite3.Error:
+            # Another till still has the WAL open; it will be checkpointed later
+            pass
+    with _pool_lock:
+        conns = list(_pool.values())
+        _pool.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            # Connection belongs to another (still running) thread
+            pass
+    if hasattr(_local, "conns"):
+        _local.conns.clear()
+    if hasattr(_local, "caches"):
+        _local.caches.clear()
+
+
+atexit.register(close_all)
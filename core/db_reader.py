@@ -0,0 +1,131 @@
+import atexit
+import itertools
+import queue
+import sqlite3
+import threading
+import traceback
+
+from core.db import get_conn, close_conn, DB_PATH
+
+# Background reader thread for slow report queries (analytics). Screens hand
+# it a function under a key; only the newest job per key matters, so a newer
+# submit for the same key skips the older one if it is still queued and
+# interrupts it (sqlite3 interrupt) if it is already running. Results come
+# back through a queue drained with after(), like core/db_writer.py, and
+# stale ones are dropped before any callback runs.
+POLL_MS = 20
+
+
+class DBReader:
+    def __init__(self, path=None):
+        self.path = path or DB_PATH
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._callbacks = {}  # job id -> (key, on_done, on_error); Tk thread only
+        self._latest = {}  # key -> newest job id
+        self._running = None  # (job id, key) on the reader right now
+        self._conn = None
+        self._ids = itertools.count(1)
+        self._polling = set()
+        self._thread = threading.Thread(target=self._run, name="db-reader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        self._conn = get_conn(self.path)
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            job_id, key, fn = job
+            if self._latest.get(key) != job_id:
+                self._results.put((job_id, None, None))  # superseded while queued
+                continue
+            self._running = (job_id, key)
+            try:
+                self._results.put((job_id, fn(), None))
+            except sqlite3.OperationalError as e:
+                if "interrupt" in str(e) and self._latest.get(key) == job_id:
+                    # Hit by an interrupt meant for the job before it: run again
+                    self._jobs.put(job)
+                else:
+                    self._results.put((job_id, None, e))
+            except Exception as e:
+                self._results.put((job_id, None, e))
+            finally:
+                self._running = None
+        close_conn(self.path)
+
+    def submit(self, widget, key, fn, on_done=None, on_error=None):
+        """Run fn() on the reader thread, replacing any older job under key.
+
+        Must be called from the Tk thread. on_done gets fn's return value and
+        on_error the exception, both on widget's Tk loop - and only if no newer
+        job for key was submitted (or cancel(key) called) in the meantime.
+        """
+        job_id = next(self._ids)
+        self.cancel(key)
+        self._latest[key] = job_id
+        self._callbacks[job_id] = (key, on_done, on_error)
+        self._jobs.put((job_id, key, fn))
+        root = widget.winfo_toplevel()
+        if root not in self._polling:
+            self._polling.add(root)
+            root.after(POLL_MS, self._poll, root)
+        return job_id
+
+    def cancel(self, key):
+        """Drop the pending job for key, interrupting its query if it is running."""
+        self._latest.pop(key, None)
+        running = self._running
+        if running and running[1] == key and self._conn is not None:
+            self._conn.interrupt()
+
+    def _poll(self, root):
+        while True:
+            try:
+                job_id, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            key, on_done, on_error = self._callbacks.pop(job_id, (None, None, None))
+            if self._latest.get(key) != job_id:
+                continue  # stale or cancelled
+            del self._latest[key]
+            try:
+                if error is None:
+                    if on_done:
+                        on_done(result)
+                elif on_error:
+                    on_error(error)
+                else:
+                    print(f"Background query failed: {error}")
+            except Exception:
+                # A callback touching a screen that has since been closed
+                traceback.print_exc()
+        if self._callbacks:
+            try:
+                root.after(POLL_MS, self._poll, root)
+                return
+            except Exception:
+                pass  # root destroyed; the next submit re-arms polling
+        self._polling.discard(root)
+
+    def stop(self, timeout=5):
+        if self._thread.is_alive():
+            self._latest.clear()
+            self._jobs.put(None)
+            if self._conn is not None:
+                self._conn.interrupt()
+            self._thread.join(timeout)
+
+
+_reader = None
+_reader_lock = threading.Lock()
+
+
+def get_reader():
+    global _reader
+    with _reader_lock:
+        if _reader is None:
+            _reader = DBReader()
+            atexit.register(_reader.stop)
+        return _reader
@@ -0,0 +1,112 @@
+import atexit
+import itertools
+import queue
+import threading
+import traceback
+from tkinter import messagebox
+
+from core.db import transaction, close_conn, DB_PATH
+
+# Single writer thread. Screens hand it a function that takes a cursor; it runs
+# inside transaction() on the writer's own connection, so the commit (and its
+# fsync) never blocks the Tk main loop. Results come back through a queue that
+# the Tk side drains with after(), and callbacks run on the Tk thread.
+POLL_MS = 20
+
+
+class DBWriter:
+    def __init__(self, path=None):
+        self.path = path or DB_PATH
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._callbacks = {}  # job id -> (on_done, on_error); Tk thread only
+        self._ids = itertools.count(1)
+        self._polling = set()  # Tk roots with a poll scheduled
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            job_id, fn, immediate, prepare, transactional = job
+            try:
+                if prepare:
+                    prepare()
+                if transactional:
+                    with transaction(self.path, immediate=immediate) as cur:
+                        result = fn(cur)
+                else:
+                    result = fn(None)
+                self._results.put((job_id, result, None))
+            except Exception as e:
+                self._results.put((job_id, None, e))
+        close_conn(self.path)
+
+    def submit(self, widget, fn, on_done=None, on_error=None, immediate=False, prepare=None, transactional=True):
+        """Queue fn(cursor) for the writer thread; callbacks run on widget's Tk loop.
+
+        Must be called from the Tk thread. on_done gets fn's return value,
+        on_error the exception (the transaction has been rolled back).
+        prepare() runs on the writer before the transaction is opened.
+        transactional=False calls fn(None) with no local transaction (client
+        mode, where the POS server does the writing).
+        """
+        job_id = next(self._ids)
+        self._callbacks[job_id] = (on_done, on_error)
+        self._jobs.put((job_id, fn, immediate, prepare, transactional))
+        root = widget.winfo_toplevel()
+        if root not in self._polling:
+            self._polling.add(root)
+            root.after(POLL_MS, self._poll, root)
+        return job_id
+
+    def pending(self):
+        return len(self._callbacks)
+
+    def _poll(self, root):
+        while True:
+            try:
+                job_id, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            on_done, on_error = self._callbacks.pop(job_id, (None, None))
+            try:
+                if error is None:
+                    if on_done:
+                        on_done(result)
+                elif on_error:
+                    on_error(error)
+                else:
+                    messagebox.showerror("Error", str(error))
+            except Exception:
+                # A callback touching a screen that has since been closed
+                traceback.print_exc()
+        if self._callbacks:
+            try:
+                root.after(POLL_MS, self._poll, root)
+                return
+            except Exception:
+                pass  # root destroyed; the next submit re-arms polling
+        self._polling.discard(root)
+
+    def stop(self, timeout=10):
+        """Finish queued writes and stop the thread (called at exit)."""
+        if self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DBWriter()
+            # Registered after core.db's close_all, so it runs first
+            atexit.register(_writer.stop)
+        return _writer
@@ -0,0 +1,119 @@
+import tkinter as tk
+from tkinter import ttk
+from datetime import date, timedelta
+
+from core.db_reader import get_reader
+from core.sales_cube import TIME
+
+# Drill-down window over the sales cube (core/sales_cube.py). Shows one
+# group-by at a time; double-clicking a row slices on it and moves to the next
+# level: category -> brand -> size -> supplier for the dimensions, and
+# month -> day -> hour (week -> day) when grouped by time.
+DRILL_PATH = ("category", "brand", "size", "supplier")
+GROUP_CHOICES = {"Category": "category", "Brand": "brand", "Size": "size", "Supplier": "supplier", "Time": TIME}
+GRAIN_CHOICES = {"Month": "month", "Week": "week", "Day": "day", "Hour": "hour"}
+FINER = {"month": "day", "week": "day", "day": "hour"}
+
+
+class DrillDownView:
+    def __init__(self, parent, stats, start=None, end=None, title="All time"):
+        self.stats = stats
+        self.win = tk.Toplevel(parent)
+        self.win.title("Sales Drill-Down")
+        self.win.geometry("720x520")
+        self.win.config(bg="#0f172a")
+
+        # Each level: (where, start, end, group, grain, label)
+        self.levels = [({}, start, end, "category", "month", title)]
+        self.rows = []
+
+        top = tk.Frame(self.win, bg="#0f172a", padx=15, pady=10)
+        top.pack(fill="x")
+        tk.Button(top, text="← UP", bg="#334155", fg="white", bd=0, padx=12, command=self.up).pack(side="left")
+        self.lbl_path = tk.Label(top, text="", font=("Helvetica", 10, "bold"), bg="#0f172a", fg="#10b981", padx=10)
+        self.lbl_path.pack(side="left")
+
+        self.var_grain = tk.StringVar(value="Month")
+        self.var_group = tk.StringVar(value="Category")
+        for label, var, values in (("GRAIN", self.var_grain, GRAIN_CHOICES), ("GROUP BY", self.var_group, GROUP_CHOICES)):
+            cb = ttk.Combobox(top, textvariable=var, values=list(values), state="readonly", width=10)
+            cb.pack(side="right", padx=5)
+            cb.bind("<<ComboboxSelected>>", lambda e: self.regroup())
+            tk.Label(top, text=label, font=("Helvetica", 8, "bold"), bg="#0f172a", fg="#94a3b8").pack(side="right")
+
+        self.table = ttk.Treeview(self.win, columns=("label", "qty", "rev"), show="headings")
+        self.table.heading("label", text="")
+        self.table.heading("qty", text="QTY")
+        self.table.heading("rev", text="REVENUE (₹)")
+        self.table.column("qty", width=80, anchor="center")
+        self.table.column("rev", width=120, anchor="e")
+        self.table.pack(fill="both", expand=True, padx=15)
+        self.table.bind("<Double-1>", self.drill)
+
+        self.lbl_status = tk.Label(self.win, text="", font=("Helvetica", 9), bg="#0f172a", fg="#94a3b8", pady=6)
+        self.lbl_status.pack(fill="x")
+        self.win.protocol("WM_DELETE_WINDOW", self.close)
+        self.load()
+
+    def load(self):
+        where, start, end, group, grain, _ = self.levels[-1]
+        self.var_group.set(next(k for k, v in GROUP_CHOICES.items() if v == group))
+        self.var_grain.set(next(k for k, v in GRAIN_CHOICES.items() if v == grain))
+        self.lbl_path.config(text="  ›  ".join(level[5] for level in self.levels))
+        self.table.heading("label", text=self.var_group.get().upper())
+        self.lbl_status.config(text="Loading…")
+        get_reader().submit(self.win, "cube", lambda: self.stats.drill((group,), grain, where, start, end),
+                            on_done=self.show, on_error=lambda e: self.lbl_status.config(text=f"Error: {e}"))
+
+    def show(self, rows):
+        if not self.win.winfo_exists():
+            return
+        self.rows = rows
+        self.table.delete(*self.table.get_children())
+        for i, (labels, qty, revenue) in enumerate(rows):
+            self.table.insert("", tk.END, iid=str(i), values=(labels[0], qty, f"{revenue:,.2f}"))
+        total = sum(r[2] for r in rows)
+        self.lbl_status.config(text=f"{len(rows)} rows  ·  ₹{total:,.2f}  ·  double-click a row to drill down")
+
+    def regroup(self):
+        where, start, end, _, _, label = self.levels[-1]
+        self.levels[-1] = (where, start, end, GROUP_CHOICES[self.var_group.get()],
+                           GRAIN_CHOICES[self.var_grain.get()], label)
+        self.load()
+
+    def drill(self, ev):
+        iid = self.table.focus()
+        if not iid:
+            return
+        value = self.rows[int(iid)][0][0]  # from the result, not the tree (Tk turns "007" into 7)
+        where, start, end, group, grain, _ = self.levels[-1]
+        if group == TIME:
+            if grain not in FINER:
+                return
+            first, last = self.period_days(value, grain)
+            # Stay inside the range being drilled (a month may stick out of it)
+            start, end = max(first, start or first), min(last, end or last)
+            self.levels.append((where, start, end, TIME, FINER[grain], value))
+        else:
+            where = dict(where, **{group: value})
+            remaining = [d for d in DRILL_PATH if d not in where]
+            self.levels.append((where, start, end, remaining[0] if remaining else TIME, grain, value))
+        self.load()
+
+    @staticmethod
+    def period_days(key, grain):
+        """[start, end) days of one period key at a grain."""
+        if grain == "month":
+            first = date.fromisoformat(key + "-01")
+            return first, (first + timedelta(days=32)).replace(day=1)
+        first = date.fromisoformat(key)
+        return first, first + timedelta(days=7 if grain == "week" else 1)
+
+    def up(self):
+        if len(self.levels) > 1:
+            self.levels.pop()
+            self.load()
+
+    def close(self):
+        get_reader().cancel("cube")
+        self.win.destroy()
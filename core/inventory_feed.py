@@ -0,0 +1,44 @@
+import sqlite3
+
+# Reader side of the inventory_changes table (migration v7). Triggers log one
+# row per inventory insert / update / delete with an ever-growing seq; a
+# consumer remembers the last seq it applied and asks for what came after,
+# re-reading just those barcodes instead of the whole table.
+FEED_KEEP = 20000  # rows kept by prune(); readers further behind than this reload
+
+LAST_SEQ_SQL = "SELECT COALESCE(MAX(seq), 0) FROM inventory_changes"
+CHANGES_SQL = "SELECT seq, barcode, op FROM inventory_changes WHERE seq > ? ORDER BY seq"
+
+
+def last_seq(conn):
+    """Newest seq in the feed (0 if empty or the table is missing)."""
+    try:
+        return conn.execute(LAST_SEQ_SQL).fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+
+def changes_since(conn, since):
+    """(seq, {barcode: op}) for rows changed after since, or None if the feed
+    no longer reaches back that far (pruned / new database) - reload instead.
+
+    op is the last thing that happened to the barcode: 'I', 'U' or 'D'.
+    """
+    try:
+        rows = conn.execute(CHANGES_SQL, (since,)).fetchall()
+    except sqlite3.OperationalError:
+        return None
+    if not rows:
+        return since, {}
+    if rows[0][0] != since + 1:
+        return None
+    return rows[-1][0], {barcode: op for _, barcode, op in rows}
+
+
+def prune(conn, keep=FEED_KEEP):
+    """Drop all but the newest keep feed rows (run at startup)."""
+    try:
+        conn.execute("DELETE FROM inventory_changes WHERE seq <= (SELECT MAX(seq) FROM inventory_changes) - ?",
+                     (keep,))
+    except sqlite3.OperationalError:
+        pass
@@ -0,0 +1,69 @@
+import re
+
+# Warehouse search over the inventory_fts index (migration v12). Each word
+# the user types becomes a prefix term ("jack da" -> "jack"* "da"*), all of
+# which must match somewhere in category / brand / name; hits come back
+# best-first by bm25 with brand matches weighted above category ones.
+SEARCH_LIMIT = 2000  # hits kept per query; refine the search to see past them
+RANK_LIMIT = 1000    # bm25 costs per hit, so broader queries (one letter) keep index order
+
+MATCH_FILTER = "barcode IN (SELECT barcode FROM inventory_fts WHERE inventory_fts MATCH ?)"
+HITS_SQL = "SELECT barcode FROM inventory_fts WHERE inventory_fts MATCH ? LIMIT ?"
+# bm25 weights follow the column order: barcode (unindexed), category, brand, name
+RANKED_SQL = ("SELECT barcode FROM inventory_fts WHERE inventory_fts MATCH ? "
+              "ORDER BY bm25(inventory_fts, 0.0, 1.0, 3.0, 2.0), barcode LIMIT ?")
+
+REINDEX_SQL = "INSERT INTO inventory_fts (barcode, category, brand, name) SELECT barcode, category, brand, name FROM inventory"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_fts_tables = {}  # database path -> whether inventory_fts exists
+
+
+def match_query(text):
+    """FTS5 MATCH expression for free text, or None if it has no searchable words."""
+    words = _WORD.findall(text or "")
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def like_filter(text):
+    """(where, params) fallback for databases without inventory_fts."""
+    q = f"%{text}%"
+    return "(category LIKE ? OR brand LIKE ? OR name LIKE ?)", [q, q, q]
+
+
+def has_fts(conn, path):
+    found = _fts_tables.get(path)
+    if found is None:
+        found = _fts_tables[path] = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='inventory_fts'").fetchone() is not None
+    return found
+
+
+def filter_sql(conn, path, text):
+    """(where, params) restricting inventory to rows matching text."""
+    match = match_query(text)
+    if match is None or not has_fts(conn, path):
+        return like_filter(text)
+    return MATCH_FILTER, [match]
+
+
+def reindex(cur):
+    """Refill inventory_fts from inventory (migration / repair). Returns the row count."""
+    cur.execute("DELETE FROM inventory_fts")
+    cur.execute(REINDEX_SQL)
+    return cur.execute("SELECT COUNT(*) FROM inventory_fts").fetchone()[0]
+
+
+def ranked_barcodes(conn, path, text, limit=SEARCH_LIMIT):
+    """Barcodes matching text, best first (at most limit)."""
+    match = match_query(text)
+    if match is None or not has_fts(conn, path):
+        where, params = like_filter(text)
+        return [r[0] for r in conn.execute(f"SELECT barcode FROM inventory WHERE {where} ORDER BY barcode LIMIT ?",
+                                           params + [limit])]
+    hits = conn.execute(HITS_SQL, (match, max(limit, RANK_LIMIT + 1))).fetchall()
+    if len(hits) > RANK_LIMIT:
+        return [r[0] for r in hits[:limit]]
+    return [r[0] for r in conn.execute(RANKED_SQL, (match, limit))]
@@ -1,26 +1,28 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime
-import os
 try:
     from tkcalendar import DateEntry
 except ImportError:
     DateEntry = None
 
-import sys
+from core.pos_server import get_client
+from core.paged_table import PagedTable
+from core.db_writer import get_writer
+from core.services import InventoryService
+from core.refdata import matching
 
-if getattr(sys, 'frozen', False):
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYNC_MS = 2000  # how often the table picks up sales / other tills' changes
+SEARCH_DEBOUNCE_MS = 150  # search-as-you-type waits for a pause in typing
+TYPE_AHEAD_RESET_MS = 1000  # pause after which dropdown typing starts a new word
 
-DB_PATH = os.path.join(BASE_DIR, "db", "IEEE_Shop.db")
 
 class InventoryHub:
     def __init__(self, parent, back_cmd):
         self.parent = parent
         self.back_cmd = back_cmd
+        # Local database, or the POS server when VJ_POS_SERVER is set
+        self.stock = InventoryService(remote=get_client())
         
         # UI Colors
         self.clr_bg = "#0f172a"
@@ -42,6 +44,8 @@ class InventoryHub:
         self.var_brand = tk.StringVar()    
         self.var_sup = tk.StringVar()      
         self.var_search = tk.StringVar()
+        self._search_job = None
+        self.var_search.trace_add("write", lambda *a: self.search_later())
         self.var_arrival_date = tk.StringVar()
 
         # --- MODULE HEADER ---
@@ -112,7 +116,10 @@ class InventoryHub:
         self.var_category.trace('w', lambda *args: self.update_brands_from_cat())
         
         self.add_dropdown(col_left, "🏷️ BRAND NAME", self.var_brand, "var_brand_widget")
-        self.add_dropdown(col_left, "⚖️ BOTTLE SIZE", self.var_size, "var_size_widget", ["650ML", "500ML", "330ML", "180ML"])
+        self.add_dropdown(col_left, "⚖️ BOTTLE SIZE", self.var_size, "var_size_widget")
+        # Long lists narrow as you type
+        self.add_type_ahead(self.var_sup_widget, lambda: self.stock.refs.suppliers())
+        self.add_type_ahead(self.var_brand_widget, lambda: self.stock.brands(self.var_category.get()))
 
         self.add_field(col_left, "💰 RATE PER BOTTLE (₹)", self.var_price, "0.00")
         self.add_field(col_left, "📦 QUANTITY (CURRENT)", self.var_qty, "0")
@@ -138,9 +145,9 @@ class InventoryHub:
 
         self.add_table(right_wrap)
 
-        self.db_migration()
         self.refresh_lists()
-        self.refresh_table()
+        self.view.reload()
+        self.parent.after(SYNC_MS, self.poll_changes)
 
     def add_field(self, parent, label, var, p=""):
         if label:
@@ -162,6 +169,41 @@ class InventoryHub:
         cb.pack(fill="x", pady=5, ipady=10)
         setattr(self, widget_name, cb)
 
+    def add_type_ahead(self, cb, values_fn):
+        # The combobox stays readonly, so only master-list names get saved.
+        # Typing narrows its list and picks the best match, like a listbox;
+        # leaving the field puts the full list back.
+        typed = {"text": "", "job": None}
+
+        def forget():
+            typed["text"], typed["job"] = "", None
+
+        def on_key(e):
+            if e.keysym == "BackSpace":
+                typed["text"] = typed["text"][:-1]
+            elif e.keysym == "Escape":
+                forget()
+                cb['values'] = values_fn()
+                return
+            elif len(e.char) == 1 and e.char.isprintable():
+                typed["text"] += e.char
+            else:
+                return
+            if typed["job"]:
+                cb.after_cancel(typed["job"])
+            typed["job"] = cb.after(TYPE_AHEAD_RESET_MS, forget)
+            values = matching(values_fn(), typed["text"])
+            cb['values'] = values
+            if values and typed["text"]:
+                cb.set(values[0])
+
+        def on_leave(e):
+            forget()
+            cb['values'] = values_fn()
+
+        cb.bind("<KeyPress>", on_key)
+        cb.bind("<FocusOut>", on_leave, add="+")
+
     def add_table(self, parent):
         t_frame = tk.Frame(parent, bg=self.clr_card)
         t_frame.pack(fill="x", pady=(0, 15))
@@ -171,7 +213,11 @@ class InventoryHub:
 
         cols = ("b", "c", "br", "s", "p", "q", "sup", "d")
         head = ("BARCODE", "CATEGORY", "BRAND", "SIZE", "RATE", "QTY", "SUPPLIER", "LATEST ENTRY")
-        self.table = ttk.Treeview(parent, columns=cols, show="headings")
+        t_wrap = tk.Frame(parent, bg=self.clr_card)
+        t_wrap.pack(fill="both", expand=True)
+        t_scroll = ttk.Scrollbar(t_wrap, orient="vertical")
+        t_scroll.pack(side="right", fill="y")
+        self.table = ttk.Treeview(t_wrap, columns=cols, show="headings")
         
         # Optimized Fluid Sizing: Compacted to fit 100% width without horizontal scroll
         config = {
@@ -187,43 +233,21 @@ class InventoryHub:
         self.table.tag_configure('empty', foreground=self.clr_danger)
         self.table.bind("<<TreeviewSelect>>", self.get_data)
 
-    def db_migration(self):
-        try:
-            conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-            # Ensure table exists first
-            cur.execute("CREATE TABLE IF NOT EXISTS inventory (barcode TEXT PRIMARY KEY, name TEXT, price REAL, quantity INTEGER, category TEXT, supplier TEXT, timestamp TEXT)")
-            
-            # Now Check for missing columns
-            cur.execute("PRAGMA table_info(inventory)")
-            cols = [col[1] for col in cur.fetchall()]
-            
-            if 'brand' not in cols:
-                print("Adding brand column...")
-                cur.execute("ALTER TABLE inventory ADD COLUMN brand TEXT")
-            if 'size' not in cols:
-                print("Adding size column...")
-                cur.execute("ALTER TABLE inventory ADD COLUMN size TEXT")
-            
-            cur.execute("CREATE TABLE IF NOT EXISTS stock_history (id INTEGER PRIMARY KEY AUTOINCREMENT, supplier TEXT, brand TEXT, size TEXT, qty INTEGER, date TEXT)")
-            conn.commit(); conn.close()
-        except Exception as e: print(f"DB Error: {e}")
+        # Only the visible rows are ever in the tree; scrolling pages by barcode
+        self.view = PagedTable(self.table, t_scroll, self.stock.pages(), row_tags=self.stock_tag)
 
     def refresh_lists(self):
         try:
-            conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-            cur.execute("SELECT name FROM suppliers"); self.var_sup_widget['values'] = [r[0] for r in cur.fetchall()]
-            cur.execute("SELECT name FROM categories"); cats = [r[0] for r in cur.fetchall()]
+            sups, cats = self.stock.ref_lists()
+            self.var_sup_widget['values'] = sups
             self.var_cat_widget['values'] = cats if cats else ["Beer", "Wine"]
-            conn.close()
+            self.var_size_widget['values'] = self.stock.refs.sizes()
         except: pass
 
     def update_brands_from_cat(self):
         cat = self.var_category.get()
         try:
-            conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-            cur.execute("SELECT name FROM brands WHERE category=?", (cat,))
-            self.var_brand_widget['values'] = [r[0] for r in cur.fetchall()]
-            conn.close()
+            self.var_brand_widget['values'] = self.stock.brands(cat)
         except: pass
 
     def add_stock(self):
@@ -237,46 +261,35 @@ class InventoryHub:
         self.var_name.set(n)
         
         try:
-            conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-            cur.execute("SELECT quantity FROM inventory WHERE barcode=?", (b,))
-            res = cur.fetchone()
             q = int(self.var_qty.get() or 0)
             p = float(self.var_price.get() or 0)
-            d = self.var_arrival_date.get() or datetime.now().strftime("%Y-%m-%d")
-            
-            if res:
-                cur.execute("""UPDATE inventory SET 
-                            quantity=quantity+?, 
-                            name=?, 
-                            price=?, 
-                            category=?, 
-                            brand=?, 
-                            size=?, 
-                            supplier=?, 
-                            timestamp=? 
-                            WHERE barcode=?""", 
-                           (q, n, p, self.var_category.get(), self.var_brand.get(), self.var_size.get(), self.var_sup.get(), d, b))
-            else:
-                cur.execute("""INSERT INTO inventory 
-                            (barcode, name, price, quantity, category, brand, size, supplier, timestamp) 
-                            VALUES (?,?,?,?,?,?,?,?,?)""", 
-                           (b, n, p, q, self.var_category.get(), self.var_brand.get(), self.var_size.get(), self.var_sup.get(), d))
-            
-            cur.execute("INSERT INTO stock_history (supplier, brand, size, qty, date) VALUES (?,?,?,?,?)", 
-                       (self.var_sup.get(), self.var_brand.get(), self.var_size.get(), q, d))
-            
-            conn.commit(); conn.close()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        d = self.var_arrival_date.get() or datetime.now().strftime("%Y-%m-%d")
+        cat, brand, size, sup = self.var_category.get(), self.var_brand.get(), self.var_size.get(), self.var_sup.get()
+
+        def done(_):
+            self.stock.changed(b)
+            self.stock.refs.add_size(size)
             messagebox.showinfo("Success", "Stock updated successfully")
             self.refresh_table()
-        except Exception as e: messagebox.showerror("Error", str(e))
+
+        # Runs on the writer thread - only plain values, no Tk variables
+        get_writer().submit(self.parent, lambda cur: self.stock.receive(b, q, p, cat, brand, size, sup, date=d, cur=cur),
+                            on_done=done, transactional=not self.stock.remote)
 
     def update_price(self):
         b = self.var_barcode.get()
         p = self.var_price.get()
         if not b or not p: return
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("UPDATE inventory SET price=? WHERE barcode=?", (p, b))
-        conn.commit(); conn.close(); self.refresh_table()
+
+        def done(_):
+            self.stock.changed(b)
+            self.refresh_table()
+
+        get_writer().submit(self.parent, lambda cur: self.stock.set_price(b, p, cur=cur), on_done=done,
+                            transactional=not self.stock.remote)
 
     def delete_stock(self):
         b = self.var_barcode.get()
@@ -296,12 +309,8 @@ class InventoryHub:
         if not confirm:
             return
         
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            cur.execute("DELETE FROM inventory WHERE barcode=?", (b,))
-            conn.commit()
-            conn.close()
+        def done(_):
+            self.stock.changed(b)
             
             # Clear form fields
             self.var_barcode.set("")
@@ -314,35 +323,40 @@ class InventoryHub:
             
             messagebox.showinfo("Success", f"Product '{brand} {size}' deleted successfully!")
             self.refresh_table()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete: {str(e)}")
+
+        get_writer().submit(self.parent, lambda cur: self.stock.delete(b, cur=cur), transactional=not self.stock.remote,
+                            on_done=done,
+                            on_error=lambda e: messagebox.showerror("Error", f"Failed to delete: {str(e)}"))
+
+    @staticmethod
+    def stock_tag(r):
+        try:
+            qty = int(r[5]) if r[5] is not None else 0
+        except (TypeError, ValueError):
+            return ()
+        if qty == 0: return ('empty',)
+        if qty < 10: return ('low',)
+        return ()
 
     def refresh_table(self):
+        # Only the rows changed since the last sync are re-read
         try:
-            conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-            # Explicit order: 0:barcode, 1:category, 2:brand, 3:size, 4:price, 5:quantity, 6:supplier, 7:timestamp
-            cur.execute("SELECT barcode, category, brand, size, price, quantity, supplier, timestamp FROM inventory")
-            rows = cur.fetchall()
-            self.table.delete(*self.table.get_children())
-            for r in rows:
-                tag = ''
-                try:
-                    qty = int(r[5]) if r[5] is not None else 0
-                    if qty == 0: tag = 'empty'
-                    elif qty < 10: tag = 'low'
-                except:
-                    qty = 0
-                self.table.insert('', 'end', values=r, tags=(tag,))
-            conn.close()
+            self.view.sync()
         except Exception as e:
             print(f"Refresh Error: {e}")
 
+    def poll_changes(self):
+        if not self.table.winfo_exists():
+            return
+        self.refresh_table()
+        self.parent.after(SYNC_MS, self.poll_changes)
+
     def get_data(self, ev):
         f = self.table.focus()
         d = self.table.item(f)['values']
         if d:
             # Matches SELECT order: barcode(0), category(1), brand(2), size(3), price(4), qty(5), sup(6), date(7)
-            self.var_barcode.set(d[0])
+            self.var_barcode.set(f) # iid is the barcode as stored (values drop leading zeros)
             self.var_category.set(d[1])
             self.var_brand.set(d[2])
             self.var_size.set(d[3])
@@ -352,13 +366,16 @@ class InventoryHub:
             self.var_sup.set(d[6])
             self.var_arrival_date.set(d[7])
 
+    def search_later(self):
+        if self._search_job:
+            self.parent.after_cancel(self._search_job)
+        self._search_job = self.parent.after(SEARCH_DEBOUNCE_MS, self.search)
+
     def search(self):
-        q = f"%{self.var_search.get()}%"
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("SELECT barcode, category, brand, size, price, quantity, supplier, timestamp FROM inventory WHERE category LIKE ? OR brand LIKE ? OR name LIKE ?", (q,q,q))
-        rows = cur.fetchall(); self.table.delete(*self.table.get_children())
-        for r in rows: self.table.insert('', 'end', values=r)
-        conn.close()
+        if self._search_job:
+            self.parent.after_cancel(self._search_job)
+            self._search_job = None
+        self.view.set_source(self.stock.pages(self.var_search.get()))
 
 if __name__ == "__main__":
     root = tk.Tk(); root.geometry("1300x700"); InventoryHub(root, lambda: print("X")); root.mainloop()
\ No newline at end of file
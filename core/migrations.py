@@ -0,0 +1,388 @@
+import sqlite3
+from datetime import datetime
+
+from core.db import get_conn
+from core import sales_rollup, inventory_search
+
+# Versioned schema migrations. Runs once at startup (init_db); screens and
+# checkout no longer issue CREATE TABLE / PRAGMA table_info on every open.
+# Append new steps to MIGRATIONS - never edit or reorder applied ones.
+
+# Managed index set: (name, table, columns). Driven by the WHERE / JOIN /
+# GROUP BY columns of the shipped queries; check coverage with
+# scripts/maintenance/explain_queries.py after changing either side.
+INDEXES = [
+    # Analytics period filters and history (sales_log grows with every bill)
+    ("idx_sales_log_date", "sales_log", "date"),
+    ("idx_sales_log_barcode", "sales_log", "barcode"),
+    # Dashboard stock alerts (quantity < 10)
+    ("idx_inventory_quantity", "inventory", "quantity"),
+    # Warehouse search by category / brand
+    ("idx_inventory_category_brand", "inventory", "category, brand"),
+    ("idx_inventory_brand", "inventory", "brand"),
+    # Brand dropdown filtered by category
+    ("idx_brands_category", "brands", "category, name"),
+]
+
+
+def table_columns(cur, table):
+    return [c[1] for c in cur.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def add_missing_columns(cur, table, columns):
+    existing = table_columns(cur, table)
+    for name, col_type in columns:
+        if name not in existing:
+            print(f"Adding {table}.{name} column...")
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+
+
+def _v1_base_schema(cur):
+    # Same shapes init_db / the screens used to create on demand; IF NOT
+    # EXISTS so databases created by older builds pass through untouched
+    cur.execute("""CREATE TABLE IF NOT EXISTS inventory (
+        barcode TEXT PRIMARY KEY,
+        name TEXT,
+        price REAL,
+        quantity INTEGER,
+        category TEXT,
+        brand TEXT,
+        size TEXT,
+        supplier TEXT,
+        timestamp TEXT
+    )""")
+    cur.execute("CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT, role TEXT)")
+    cur.execute("CREATE TABLE IF NOT EXISTS categories (cid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)")
+    cur.execute("CREATE TABLE IF NOT EXISTS suppliers (sid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, contact TEXT)")
+    cur.execute("CREATE TABLE IF NOT EXISTS brands (bid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, category TEXT)")
+    cur.execute("CREATE TABLE IF NOT EXISTS transactions (tid INTEGER PRIMARY KEY AUTOINCREMENT, items TEXT, total REAL, date TEXT)")
+    cur.execute("CREATE TABLE IF NOT EXISTS stock_history (id INTEGER PRIMARY KEY AUTOINCREMENT, supplier TEXT, brand TEXT, size TEXT, qty INTEGER, date TEXT)")
+    cur.execute("CREATE TABLE IF NOT EXISTS sales_log (sid INTEGER PRIMARY KEY AUTOINCREMENT, barcode TEXT, brand TEXT, supplier TEXT, qty INTEGER, total REAL, date TEXT)")
+
+
+def _v2_legacy_columns(cur):
+    # Columns older builds added lazily (InventoryHub/BrandClass.db_migration,
+    # scripts/maintenance/migrate_db.py)
+    add_missing_columns(cur, "inventory", [("category", "TEXT"), ("brand", "TEXT"), ("size", "TEXT"),
+                                           ("supplier", "TEXT"), ("timestamp", "TEXT")])
+    add_missing_columns(cur, "brands", [("category", "TEXT")])
+    add_missing_columns(cur, "sales_log", [("brand", "TEXT"), ("supplier", "TEXT")])
+
+
+def _v3_backfill_sales_brand(cur):
+    # Old sales rows without a brand (was scripts/maintenance/fix_brands.py)
+    cur.execute("""
+        UPDATE sales_log
+        SET brand = (SELECT brand FROM inventory WHERE inventory.barcode = sales_log.barcode)
+        WHERE (brand IS NULL OR brand = '')
+          AND EXISTS (SELECT 1 FROM inventory WHERE inventory.barcode = sales_log.barcode)
+    """)
+
+
+def _v4_indexes(cur):
+    for name, table, columns in INDEXES:
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def _v5_transaction_items(cur):
+    # One row per bill line, keyed by the parent transaction. transactions.items
+    # stays as a display string; sales_log rows point back via tid.
+    cur.execute("""CREATE TABLE IF NOT EXISTS transaction_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tid INTEGER NOT NULL REFERENCES transactions(tid),
+        barcode TEXT,
+        brand TEXT,
+        size TEXT,
+        unit_price REAL,
+        qty INTEGER,
+        line_total REAL
+    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_transaction_items_tid ON transaction_items (tid)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_transaction_items_barcode ON transaction_items (barcode)")
+    add_missing_columns(cur, "sales_log", [("tid", "INTEGER")])
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sales_log_tid ON sales_log (tid)")
+
+
+def _v6_bill_ids(cur):
+    # Client-generated bill id, so journal replay can tell a bill is on file
+    add_missing_columns(cur, "transactions", [("bill_id", "TEXT")])
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_bill_id ON transactions (bill_id)")
+
+
+def _v7_inventory_changes(cur):
+    # Row-level change feed: one row per inventory insert / update / delete,
+    # so screens and caches can apply just what changed since their last seq
+    cur.execute("""CREATE TABLE IF NOT EXISTS inventory_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        barcode TEXT NOT NULL,
+        op TEXT NOT NULL
+    )""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_inventory_changes_ins AFTER INSERT ON inventory BEGIN
+        INSERT INTO inventory_changes (barcode, op) VALUES (NEW.barcode, 'I');
+    END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_inventory_changes_upd AFTER UPDATE ON inventory BEGIN
+        INSERT INTO inventory_changes (barcode, op) SELECT OLD.barcode, 'D' WHERE OLD.barcode IS NOT NEW.barcode;
+        INSERT INTO inventory_changes (barcode, op) VALUES (NEW.barcode, 'U');
+    END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_inventory_changes_del AFTER DELETE ON inventory BEGIN
+        INSERT INTO inventory_changes (barcode, op) VALUES (OLD.barcode, 'D');
+    END""")
+
+
+def _v8_inventory_fts(cur):
+    # Full-text index over the warehouse search columns (external content:
+    # the text lives in inventory, keyed by its rowid). Quantity updates from
+    # sales don't touch the searched columns, so the update trigger skips them.
+    try:
+        cur.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS inventory_fts USING fts5(
+            barcode UNINDEXED, category, brand, name,
+            content='inventory', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""")
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5: search keeps using LIKE
+        print(f"Skipping inventory_fts: {e}")
+        return
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_inventory_fts_ins AFTER INSERT ON inventory BEGIN
+        INSERT INTO inventory_fts (rowid, barcode, category, brand, name)
+        VALUES (NEW.rowid, NEW.barcode, NEW.category, NEW.brand, NEW.name);
+    END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_inventory_fts_del AFTER DELETE ON inventory BEGIN
+        INSERT INTO inventory_fts (inventory_fts, rowid, barcode, category, brand, name)
+        VALUES ('delete', OLD.rowid, OLD.barcode, OLD.category, OLD.brand, OLD.name);
+    END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_inventory_fts_upd
+        AFTER UPDATE OF barcode, category, brand, name ON inventory BEGIN
+        INSERT INTO inventory_fts (inventory_fts, rowid, barcode, category, brand, name)
+        VALUES ('delete', OLD.rowid, OLD.barcode, OLD.category, OLD.brand, OLD.name);
+        INSERT INTO inventory_fts (rowid, barcode, category, brand, name)
+        VALUES (NEW.rowid, NEW.barcode, NEW.category, NEW.brand, NEW.name);
+    END""")
+    cur.execute("INSERT INTO inventory_fts (inventory_fts) VALUES ('rebuild')")
+
+
+# Rollup trigger bodies: add a sales_log row's amounts to its day x barcode
+# x brand x supplier row, or take them back out (dropping the row once no
+# lines remain). NULL key parts are stored as '' so the upsert can match
+# them. category and size keep the smallest non-NULL value seen, the same
+# MIN() rule sales_rollup.REBUILD_SQL applies, so a backfill and the
+# triggers agree.
+_ROLLUP_ADD = """
+        INSERT INTO sales_daily (day, barcode, brand, category, supplier, size, qty, revenue, lines)
+        SELECT substr(NEW.date, 1, 10), COALESCE(NEW.barcode, ''), COALESCE(NEW.brand, ''), i.category,
+               COALESCE(NEW.supplier, ''), i.size, COALESCE(NEW.qty, 0), COALESCE(NEW.total, 0), 1
+        FROM (SELECT 1) LEFT JOIN inventory i ON i.barcode = NEW.barcode
+        WHERE NEW.date IS NOT NULL
+        ON CONFLICT (day, barcode, brand, supplier) DO UPDATE SET
+            category = COALESCE(min(category, excluded.category), category, excluded.category),
+            size = COALESCE(min(size, excluded.size), size, excluded.size),
+            qty = qty + excluded.qty, revenue = revenue + excluded.revenue, lines = lines + 1;
+"""
+_ROLLUP_KEY = """day = substr(OLD.date, 1, 10) AND barcode = COALESCE(OLD.barcode, '')
+            AND brand = COALESCE(OLD.brand, '') AND supplier = COALESCE(OLD.supplier, '')"""
+_ROLLUP_REMOVE = f"""
+        UPDATE sales_daily SET qty = qty - COALESCE(OLD.qty, 0), revenue = revenue - COALESCE(OLD.total, 0),
+               lines = lines - 1
+        WHERE {_ROLLUP_KEY};
+        DELETE FROM sales_daily WHERE {_ROLLUP_KEY} AND lines <= 0;
+"""
+_SALES_DAILY_TABLE = """CREATE TABLE IF NOT EXISTS {name} (
+        day TEXT NOT NULL,
+        barcode TEXT NOT NULL,
+        brand TEXT NOT NULL DEFAULT '',
+        category TEXT,
+        supplier TEXT NOT NULL DEFAULT '',
+        size TEXT,
+        qty INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        lines INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, barcode, brand, supplier)
+    )"""
+
+
+def _v9_sales_daily(cur):
+    # Sales rollup for the period reports (core/sales_rollup.py). Creates the
+    # current table shape (see v15): the rebuild below fills it by the
+    # current key, which the original (day, barcode) key could not hold.
+    cur.execute(_SALES_DAILY_TABLE.format(name="sales_daily"))
+    _create_rollup_triggers(cur)
+    sales_rollup.rebuild(cur)
+
+
+def _create_rollup_triggers(cur):
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_sales_daily_ins AFTER INSERT ON sales_log BEGIN {_ROLLUP_ADD} END")
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_sales_daily_del AFTER DELETE ON sales_log BEGIN {_ROLLUP_REMOVE} END")
+    cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_sales_daily_upd
+        AFTER UPDATE OF date, barcode, brand, supplier, qty, total ON sales_log
+        BEGIN {_ROLLUP_REMOVE} {_ROLLUP_ADD} END""")
+
+
+def _drop_rollup_triggers(cur):
+    for name in ("trg_sales_daily_ins", "trg_sales_daily_del", "trg_sales_daily_upd"):
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def _v10_transaction_items_cascade(cur):
+    # Rebuild transaction_items with ON DELETE CASCADE (SQLite cannot alter a
+    # foreign key in place). core.db turns foreign_keys on for every
+    # connection, so deleting a bill takes its lines with it and a tid reused
+    # after a sales reset starts with no stale lines. Lines whose bill is
+    # already gone are dropped on the way over.
+    cur.execute("""CREATE TABLE transaction_items_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tid INTEGER NOT NULL REFERENCES transactions(tid) ON DELETE CASCADE,
+        barcode TEXT,
+        brand TEXT,
+        size TEXT,
+        unit_price REAL,
+        qty INTEGER,
+        line_total REAL
+    )""")
+    cur.execute("""INSERT INTO transaction_items_new (id, tid, barcode, brand, size, unit_price, qty, line_total)
+        SELECT id, tid, barcode, brand, size, unit_price, qty, line_total FROM transaction_items
+        WHERE tid IN (SELECT tid FROM transactions)""")
+    cur.execute("DROP TABLE transaction_items")
+    cur.execute("ALTER TABLE transaction_items_new RENAME TO transaction_items")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_transaction_items_tid ON transaction_items (tid)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_transaction_items_barcode ON transaction_items (barcode)")
+
+
+def _v11_drop_supplier_index(cur):
+    # Supplier totals read the sales_daily rollup now (v9), so this index on
+    # sales_log was only slowing every bill down
+    cur.execute("DROP INDEX IF EXISTS idx_sales_log_supplier")
+
+
+def _v12_inventory_fts_by_barcode(cur):
+    # v8 pointed the index at inventory's implicit rowid, which VACUUM may
+    # renumber (barcode is a TEXT key). Rebuild it as a table that keeps its
+    # own copy of the searched text, keyed by barcode: nothing in it depends
+    # on inventory's rowids any more.
+    for name in ("trg_inventory_fts_ins", "trg_inventory_fts_del", "trg_inventory_fts_upd"):
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+    cur.execute("DROP TABLE IF EXISTS inventory_fts")
+    try:
+        cur.execute("""CREATE VIRTUAL TABLE inventory_fts USING fts5(
+            barcode UNINDEXED, category, brand, name,
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""")
+    except sqlite3.OperationalError as e:
+        print(f"Skipping inventory_fts: {e}")
+        return
+    cur.execute("""CREATE TRIGGER trg_inventory_fts_ins AFTER INSERT ON inventory BEGIN
+        INSERT INTO inventory_fts (barcode, category, brand, name)
+        VALUES (NEW.barcode, NEW.category, NEW.brand, NEW.name);
+    END""")
+    cur.execute("""CREATE TRIGGER trg_inventory_fts_del AFTER DELETE ON inventory BEGIN
+        DELETE FROM inventory_fts WHERE barcode = OLD.barcode;
+    END""")
+    # Stock receipts rewrite name / brand / category with the same values;
+    # only a real change touches the index
+    cur.execute("""CREATE TRIGGER trg_inventory_fts_upd
+        AFTER UPDATE OF barcode, category, brand, name ON inventory
+        WHEN OLD.barcode IS NOT NEW.barcode OR OLD.category IS NOT NEW.category
+          OR OLD.brand IS NOT NEW.brand OR OLD.name IS NOT NEW.name BEGIN
+        DELETE FROM inventory_fts WHERE barcode = OLD.barcode;
+        INSERT INTO inventory_fts (barcode, category, brand, name)
+        VALUES (NEW.barcode, NEW.category, NEW.brand, NEW.name);
+    END""")
+    inventory_search.reindex(cur)
+
+
+def _v13_sales_log_edits(cur):
+    # One-row counter bumped by every delete / update of a sales_log row.
+    # Running totals fold new rows in by sid and compare this (an O(1) read)
+    # to know whether rows they already counted changed, instead of
+    # COUNT(*) over the whole log.
+    cur.execute("""CREATE TABLE IF NOT EXISTS sales_log_edits (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        edits INTEGER NOT NULL DEFAULT 0
+    )""")
+    cur.execute("INSERT OR IGNORE INTO sales_log_edits (id, edits) VALUES (1, 0)")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_sales_log_edits_del AFTER DELETE ON sales_log BEGIN
+        UPDATE sales_log_edits SET edits = edits + 1 WHERE id = 1;
+    END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_sales_log_edits_upd AFTER UPDATE ON sales_log BEGIN
+        UPDATE sales_log_edits SET edits = edits + 1 WHERE id = 1;
+    END""")
+
+
+def _v14_rollup_min_labels(cur):
+    # The v9 triggers kept the first row's brand/category/supplier/size per
+    # day x barcode while a rebuild took MIN(); recreate them with the MIN
+    # rule and rebuild so existing rollup rows follow it too.
+    _drop_rollup_triggers(cur)
+    _create_rollup_triggers(cur)
+    sales_rollup.rebuild(cur)
+
+
+def _v15_rollup_by_brand_and_supplier(cur):
+    # One row per day x barcode put a whole day's revenue for a barcode
+    # under one supplier and one brand, though a barcode can be bought from
+    # (or relabelled to) several in a day. Key the rollup by both, and
+    # re-fire the update trigger when either label is edited.
+    _drop_rollup_triggers(cur)
+    cur.execute(_SALES_DAILY_TABLE.format(name="sales_daily_new"))
+    cur.execute("DROP TABLE sales_daily")
+    cur.execute("ALTER TABLE sales_daily_new RENAME TO sales_daily")
+    _create_rollup_triggers(cur)
+    sales_rollup.rebuild(cur)
+
+
+MIGRATIONS = [
+    (1, "base schema", _v1_base_schema),
+    (2, "legacy inventory/brands/sales_log columns", _v2_legacy_columns),
+    (3, "backfill sales_log.brand from inventory", _v3_backfill_sales_brand),
+    (4, "managed index set", _v4_indexes),
+    (5, "transaction_items table and sales_log.tid link", _v5_transaction_items),
+    (6, "transactions.bill_id for idempotent journal replay", _v6_bill_ids),
+    (7, "inventory_changes feed maintained by triggers", _v7_inventory_changes),
+    (8, "inventory_fts full-text search index", _v8_inventory_fts),
+    (9, "sales_daily rollup maintained by triggers", _v9_sales_daily),
+    (10, "transaction_items cascade-delete with their bill", _v10_transaction_items_cascade),
+    (11, "drop idx_sales_log_supplier (supplier stats use sales_daily)", _v11_drop_supplier_index),
+    (12, "inventory_fts keyed by barcode instead of inventory rowid", _v12_inventory_fts_by_barcode),
+    (13, "sales_log_edits counter for incremental readers", _v13_sales_log_edits),
+    (14, "sales_daily triggers keep MIN() labels like the rebuild", _v14_rollup_min_labels),
+    (15, "sales_daily keyed by day x barcode x brand x supplier", _v15_rollup_by_brand_and_supplier),
+]
+
+
+def current_version(conn):
+    conn.execute("""CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TEXT
+    )""")
+    conn.commit()
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn=None):
+    """Apply pending migrations in order, each in its own write transaction."""
+    conn = conn or get_conn()
+    version = current_version(conn)
+    applied = []
+    for number, description, step in MIGRATIONS:
+        if number <= version:
+            continue
+        cur = conn.cursor()
+        try:
+            # Take the write lock up front so two tills starting together
+            # cannot both apply the same step
+            cur.execute("BEGIN IMMEDIATE")
+            if cur.execute("SELECT 1 FROM schema_version WHERE version=?", (number,)).fetchone():
+                conn.rollback()
+                continue
+            step(cur)
+            cur.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                        (number, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            conn.commit()
+            applied.append(number)
+            print(f"Schema migrated to v{number}: {description}")
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    return applied
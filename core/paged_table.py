@@ -0,0 +1,153 @@
+import tkinter as tk
+
+# Virtual scrolling for a ttk.Treeview. Only the rows that fit on screen exist
+# as tree items; scrolling fetches the next / previous rows by keyset
+# (key > last shown / key < first shown) and a scrollbar drag jumps by
+# offset. Open time and memory depend on the window height, not on how many
+# rows the query matches.
+#
+# The source is any object with:
+#   count()                      -> total rows
+#   page(after=..., limit=...)   -> rows with key > after, ascending
+#   page(before=..., limit=...)  -> rows with key < before, ascending
+#   page(offset=..., limit=...)  -> rows starting at offset
+# and optionally, for sync():
+#   seq()                        -> change feed position
+#   changes(since)               -> (seq, {key: op}) or None to force a reload
+#   rows(keys)                   -> current rows for those keys (gone ones absent)
+DEFAULT_ROW_HEIGHT = 20
+SYNC_MAX_KEYS = 500  # a bigger backlog of changes just reloads the window
+
+
+class PagedTable:
+    def __init__(self, tree, scrollbar, source, key_index=0, row_tags=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.source = source
+        self.key_index = key_index
+        self.row_tags = row_tags or (lambda row: ())
+        self.rows = []
+        self.offset = 0
+        self.total = 0
+        self.seq = 0
+
+        scrollbar.config(command=self.yview)
+        tree.bind("<Configure>", lambda e: self.reload(), add="+")
+        tree.bind("<MouseWheel>", self._on_wheel)
+        tree.bind("<Button-4>", lambda e: self._scroll_units(-3))
+        tree.bind("<Button-5>", lambda e: self._scroll_units(3))
+        tree.bind("<Next>", lambda e: self._scroll_units(self.visible()))
+        tree.bind("<Prior>", lambda e: self._scroll_units(-self.visible()))
+
+    def visible(self):
+        height = self.tree.winfo_height()
+        if height <= 1:
+            return int(self.tree.cget("height") or 10)
+        # One row's worth of space goes to the headings
+        return max(height // DEFAULT_ROW_HEIGHT - 1, 1)
+
+    def key(self, row):
+        return row[self.key_index]
+
+    # --- loading ---
+
+    def set_source(self, source):
+        self.source = source
+        self.offset = 0
+        self.reload()
+
+    def reload(self):
+        """Re-read the window at the current offset (after a resize or a big change)."""
+        if hasattr(self.source, "seq"):
+            # Before the read: anything committed in between is applied again by sync()
+            self.seq = self.source.seq()
+        self.total = self.source.count()
+        self.offset = max(min(self.offset, self.total - self.visible()), 0)
+        self.rows = list(self.source.page(offset=self.offset, limit=self.visible()))
+        self.render()
+
+    def render(self):
+        self.tree.delete(*self.tree.get_children())
+        for row in self.rows:
+            self.tree.insert("", "end", iid=str(self.key(row)), values=row, tags=self.row_tags(row))
+        self._set_scrollbar()
+
+    def _set_scrollbar(self):
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, min((self.offset + len(self.rows)) / self.total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def sync(self):
+        """Apply what changed since the last reload / sync.
+
+        Rows on screen are updated in place (values and tags); only an insert or
+        delete inside the visible window re-reads the window, and one elsewhere
+        just recounts for the scrollbar. Off-screen updates are left for the
+        page read that scrolls to them.
+        """
+        if not hasattr(self.source, "changes") or not self.seq:
+            return self.reload()
+        feed = self.source.changes(self.seq)
+        if feed is None or len(feed[1]) > SYNC_MAX_KEYS:
+            return self.reload()  # feed can't say, or re-reading the window is cheaper
+        self.seq, changed = feed
+        if not changed:
+            return
+        shown = {str(self.key(row)): i for i, row in enumerate(self.rows)}
+        fresh = {str(self.key(row)): row for row in self.source.rows(list(changed))}
+        full = len(self.rows) >= self.visible()
+        first = str(self.key(self.rows[0])) if self.rows else None
+        last = str(self.key(self.rows[-1])) if self.rows else None
+        recount = reshape = False
+        for key, op in changed.items():
+            key = str(key)
+            if key in shown:
+                if key not in fresh:
+                    reshape = True  # deleted, or no longer matches the search
+                    continue
+                row = fresh[key]
+                self.rows[shown[key]] = row
+                self.tree.item(key, values=row, tags=self.row_tags(row))
+            elif op != "U":
+                recount = True
+                if key in fresh and (not full or first < key < last):
+                    reshape = True
+        if reshape:
+            self.reload()
+        elif recount:
+            self.total = self.source.count()
+            self._set_scrollbar()
+
+    # --- scrolling ---
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * self.total)
+            self.reload()
+        elif args[0] == "scroll":
+            n = int(args[1])
+            self._scroll_units(n * self.visible() if args[2] == "pages" else n)
+
+    def _on_wheel(self, event):
+        self._scroll_units(-3 if event.delta > 0 else 3)
+        return "break"  # keep the form canvas' bind_all handler from scrolling too
+
+    def _scroll_units(self, n):
+        size = self.visible()
+        if n > 0 and self.rows:
+            more = list(self.source.page(after=self.key(self.rows[-1]), limit=n))
+            if not more:
+                return "break"
+            self.rows = (self.rows + more)[-size:]
+            self.offset = min(self.offset + len(more), max(self.total - len(self.rows), 0))
+        elif n < 0 and self.rows:
+            prev = list(self.source.page(before=self.key(self.rows[0]), limit=-n))
+            if not prev:
+                return "break"
+            self.rows = (prev + self.rows)[:size]
+            self.offset = max(self.offset - len(prev), 0)
+        else:
+            return "break"
+        self.render()
+        return "break"
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, time
+
+# Period engine for the analytics filters. Every period maps to a half-open
+# [start, end) range on sales_log.date ("YYYY-MM-DD HH:MM:SS" text, which
+# sorts chronologically), so filters stay sargable on idx_sales_log_date
+# instead of LIKE 'date%' / strftime(...) full scans.
+PERIODS = ["Today", "Yesterday", "Weekly", "Monthly", "Yearly", "Custom Range"]
+DATE_FMT = "%Y-%m-%d %H:%M:%S"
+DAY_FMT = "%Y-%m-%d"  # sales_daily.day
+
+
+def period_bounds(period, custom_start=None, custom_end=None, now=None):
+    """Return (start, end) datetimes for the period, or None for all time."""
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if period == "Today" or period == "Daily": # Daily is now Today
+        return today, today + timedelta(days=1)
+    if period == "Yesterday":
+        return today - timedelta(days=1), today
+    if period == "Weekly":
+        # Last 7 days up to and including today
+        return today - timedelta(days=7), today + timedelta(days=1)
+    if period == "Monthly":
+        start = today.replace(day=1)
+        end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+        return start, end
+    if period == "Yearly":
+        start = today.replace(month=1, day=1)
+        return start, start.replace(year=start.year + 1)
+    if period == "Custom Range" and custom_start and custom_end:
+        # Inclusive of the end day: run to the next day's midnight
+        start = datetime(custom_start.year, custom_start.month, custom_start.day)
+        end = datetime(custom_end.year, custom_end.month, custom_end.day) + timedelta(days=1)
+        return start, end
+    return None
+
+
+def day_bounds(day):
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=1)
+
+
+def range_predicate(bounds, column="s.date", fmt=DATE_FMT):
+    """Turn (start, end) into a `WHERE column >= ? AND column < ?` clause and params."""
+    if bounds is None:
+        return "", ()
+    start, end = bounds
+    return f"WHERE {column} >= ? AND {column} < ?", (start.strftime(fmt), end.strftime(fmt))
+
+
+class SalesQuery:
+    """Builds the sales_log queries for one analytics filter (period or single day)."""
+
+    def __init__(self, period, custom_start=None, custom_end=None, now=None, bounds=None):
+        self.period = period
+        self.custom_start = custom_start
+        self.custom_end = custom_end
+        self.bounds = bounds if bounds is not None else period_bounds(period, custom_start, custom_end, now)
+        self.where, self.params = range_predicate(self.bounds)
+        # Whole-day ranges (every period above) can be answered from the
+        # sales_daily rollup instead of sales_log line items
+        self.by_day = self.bounds is None or all(b.time() == time(0) for b in self.bounds)
+        self.day_where, self.day_params = range_predicate(self.bounds, "d.day", DAY_FMT)
+
+    @classmethod
+    def for_day(cls, day):
+        return cls("Custom Range", day, day, bounds=day_bounds(day))
+
+    def label(self):
+        if self.period == "Custom Range" and self.custom_start and self.custom_end:
+            return f"{self.custom_start.strftime('%d/%m')} - {self.custom_end.strftime('%d/%m')}"
+        return self.period.upper()
+
+    def title(self):
+        if self.period == "Custom Range" and self.custom_start and self.custom_end:
+            return f"REV ({self.label()})"
+        return f"REVENUE ({self.label()})"
+
+    def brand_totals(self):
+        # Sum per barcode first, then join those few thousand rows (not every
+        # line item) to inventory for the current brand name. Whole-day
+        # periods sum the sales_daily rollup rather than sales_log.
+        if self.by_day:
+            return f"""
+                SELECT COALESCE(i.brand, d.brand), SUM(d.revenue)
+                FROM (SELECT d.barcode, NULLIF(d.brand, '') AS brand, SUM(d.revenue) AS revenue
+                      FROM sales_daily d
+                      {self.day_where}
+                      GROUP BY d.barcode, d.brand) d
+                LEFT JOIN inventory i ON d.barcode = i.barcode
+                GROUP BY COALESCE(i.brand, d.brand)
+                ORDER BY SUM(d.revenue) DESC
+            """, self.day_params
+        return f"""
+            SELECT COALESCE(i.brand, s.brand), SUM(s.total)
+            FROM (SELECT s.barcode, s.brand, SUM(s.total) AS total
+                  FROM sales_log s
+                  {self.where}
+                  GROUP BY s.barcode, s.brand) s
+            LEFT JOIN inventory i ON s.barcode = i.barcode
+            GROUP BY COALESCE(i.brand, s.brand)
+            ORDER BY SUM(s.total) DESC
+        """, self.params
+
+    def history(self, limit=100):
+        # Newest rows straight off idx_sales_log_date (date, then sid) and only
+        # those get joined - no sort of the whole period
+        return f"""
+            SELECT s.date, 
+                   COALESCE(i.category, 'Unknown'), 
+                   COALESCE(i.brand, s.brand), 
+                   s.qty, s.total 
+            FROM (SELECT s.sid, s.date, s.barcode, s.brand, s.qty, s.total
+                  FROM sales_log s
+                  {self.where}
+                  ORDER BY s.date DESC, s.sid DESC LIMIT {int(limit)}) s
+            LEFT JOIN inventory i ON s.barcode = i.barcode
+            ORDER BY s.date DESC, s.sid DESC
+        """, self.params
+
+    def sale_chart(self, grouped=True):
+        if grouped:
+            return f"""
+                SELECT MAX(s.date), COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, '-'), SUM(s.qty) 
+                FROM sales_log s 
+                LEFT JOIN inventory i ON s.barcode = i.barcode 
+                {self.where} 
+                GROUP BY COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, '-')
+                ORDER BY MAX(s.date) DESC
+            """, self.params
+        return f"""
+            SELECT s.date, COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, '-'), s.qty 
+            FROM sales_log s 
+            LEFT JOIN inventory i ON s.barcode = i.barcode 
+            {self.where} 
+            ORDER BY s.date DESC
+        """, self.params
+
+    def detailed(self):
+        return f"""
+            SELECT s.date, COALESCE(i.category, 'Other'), COALESCE(i.brand, s.brand), COALESCE(i.size, ''), s.qty, s.total 
+            FROM sales_log s 
+            LEFT JOIN inventory i ON s.barcode = i.barcode 
+            {self.where} 
+            ORDER BY s.date DESC
+        """, self.params
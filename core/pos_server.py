@@ -0,0 +1,538 @@
+import hmac
+import ipaddress
+import json
+import os
+import queue
+import select
+import socket
+import socketserver
+import sys
+import threading
+from datetime import datetime
+
+from core.db import get_conn, close_conn, DB_PATH
+from core.catalog import Catalog, Item
+from core.create_db import init_db
+from core.sales import record_sale, StockShortage
+from core.sales_journal import post_bills
+from core.services import InventoryService, AnalyticsService, ReferenceService
+from core.periods import SalesQuery, DATE_FMT
+from core.inventory_search import SEARCH_LIMIT
+
+# Optional local POS server. One process owns IEEE_Shop.db; tills on other
+# PCs talk to it instead of opening the database over a shared folder.
+#
+#   VJ_POS_TOKEN=secret python -m core.pos_server [host:port] [path/to/IEEE_Shop.db]
+#   VJ_POS_TOKEN=secret VJ_POS_SERVER=192.168.1.10:8765 python main.py     (client mode)
+#
+# The server refuses to listen beyond loopback without VJ_POS_TOKEN set.
+#
+# Protocol: newline-delimited JSON over TCP, one request per line
+#   {"id": 1, "method": "lookup", "params": {"barcode": "890..."}, "token": "..."}
+#   {"id": 1, "result": {...}}  or  {"id": 1, "error": {"type": ..., "message": ...}}
+#
+# Writes from every till go through one writer thread, which commits
+# whatever has queued up (up to BATCH_SIZE jobs) in a single transaction,
+# each job under its own SAVEPOINT so one short bill cannot sink the rest.
+# Catalog reads are served from memory.
+SERVER_ENV = "VJ_POS_SERVER"
+TOKEN_ENV = "VJ_POS_TOKEN"  # shared secret; set the same value on server and tills
+# (required unless the server only listens on loopback)
+DEFAULT_ADDR = ("127.0.0.1", 8765)
+BATCH_SIZE = 32
+CLIENT_TIMEOUT_S = 10
+# Writes that are not safe to send twice: a repeat adds stock (and a
+# stock_history row) again or creates a second supplier / brand. checkout
+# and replay are deduplicated by bill_id; everything else is a read or
+# sets an absolute value.
+NOT_IDEMPOTENT = frozenset({"receive", "ref_add"})
+
+
+class PosServerError(RuntimeError):
+    pass
+
+
+def parse_addr(text):
+    host, _, port = (text or "").rpartition(":")
+    if not host:
+        return text or DEFAULT_ADDR[0], DEFAULT_ADDR[1]
+    return host, int(port)
+
+
+def _date(text):
+    return datetime.strptime(text, "%Y-%m-%d") if text else None
+
+
+def _day(value):
+    return value.strftime("%Y-%m-%d") if value else None
+
+
+def is_loopback(host):
+    """True if host only ever resolves to this machine ("" / 0.0.0.0 mean every interface)."""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback if host else False
+    except (OSError, ValueError):
+        return False
+
+
+class PosBackend:
+    """Owns the database for the server: serialized, batched writes and in-memory catalog reads."""
+
+    def __init__(self, path=None, batch_size=BATCH_SIZE):
+        self.path = path or DB_PATH
+        self.batch_size = batch_size
+        init_db(self.path)
+        # Only this process writes, so invalidate() alone keeps it exact
+        self.catalog = Catalog(self.path, track_external=False)
+        self.inventory = InventoryService(self.path, catalog=self.catalog)
+        self.analytics = AnalyticsService(self.path)
+        self.refs = ReferenceService(self.path)
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="pos-writer", daemon=True)
+        self._thread.start()
+
+    # --- writer ---
+
+    def _write(self, fn, barcodes=()):
+        """Run fn(cursor) on the writer thread and wait for its batch to commit."""
+        slot = {"done": threading.Event()}
+        self._jobs.put((fn, list(barcodes), slot))
+        slot["done"].wait()
+        if "error" in slot:
+            raise slot["error"]
+        return slot["result"]
+
+    def _run(self):
+        conn = get_conn(self.path)
+        stopping = False
+        while not stopping:
+            job = self._jobs.get()
+            if job is None:
+                break
+            batch = [job]
+            while len(batch) < self.batch_size:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+
+            cur = conn.cursor()
+            try:
+                cur.execute("BEGIN IMMEDIATE")
+                for fn, _, slot in batch:
+                    cur.execute("SAVEPOINT job")
+                    try:
+                        slot["result"] = fn(cur)
+                        cur.execute("RELEASE job")
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO job")
+                        cur.execute("RELEASE job")
+                        slot["error"] = e
+                conn.commit()
+            except Exception as e:
+                # The batch itself failed (locked, disk full): nobody's write landed
+                conn.rollback()
+                for _, _, slot in batch:
+                    slot.pop("result", None)
+                    slot["error"] = e
+            finally:
+                cur.close()
+
+            for _, barcodes, slot in batch:
+                if "error" not in slot and barcodes:
+                    self.catalog.invalidate(*barcodes)
+                slot["done"].set()
+        close_conn(self.path)
+
+    def stop(self):
+        self._jobs.put(None)
+        self._thread.join(10)
+
+    # --- API (called from request handler threads) ---
+
+    def lookup(self, barcode):
+        item = self.catalog.get(barcode)
+        return item._asdict() if item else None
+
+    def checkout(self, bill_id, when, lines, total):
+        lines = [tuple(l) for l in lines]
+        return list(self._write(lambda cur: record_sale(cur, lines, when=when, total=total, bill_id=bill_id),
+                                [l[0] for l in lines]))
+
+    def replay(self, bills, strict=True):
+        """Post journaled bills from a till (see sales_journal.post_bills)."""
+        barcodes = {str(l[0]) for bill in bills for l in bill["lines"]}
+        return self._write(lambda cur: post_bills(cur, bills, strict), barcodes)
+
+    def receive(self, barcode, qty, price, category, brand, size, supplier, date=None):
+        return self._write(lambda cur: self.inventory.receive(barcode, qty, price, category, brand, size,
+                                                              supplier, date=date, cur=cur), [barcode])
+
+    def set_price(self, barcode, price):
+        return self._write(lambda cur: self.inventory.set_price(barcode, price, cur=cur), [barcode])
+
+    def delete(self, barcode):
+        return self._write(lambda cur: self.inventory.delete(barcode, cur=cur), [barcode])
+
+    def inventory_rows(self, search=None):
+        return self.inventory.rows(search)
+
+    def inventory_count(self, search=None):
+        return self.inventory.count(search)
+
+    def inventory_page(self, after=None, before=None, offset=None, limit=50, search=None):
+        return self.inventory.page(after, before, offset, limit, search)
+
+    def inventory_search(self, search, limit=None):
+        return self.inventory.search_keys(search, limit or SEARCH_LIMIT)
+
+    def inventory_seq(self):
+        return self.inventory.feed_seq()
+
+    def inventory_changes(self, seq):
+        return self.inventory.changes_since(seq)
+
+    def inventory_rows_for(self, barcodes, search=None):
+        return self.inventory.rows_for(barcodes, search)
+
+    def ref_lists(self):
+        return self.inventory.ref_lists()
+
+    def brands(self, category):
+        return self.inventory.brands(category)
+
+    def refdata(self):
+        return self.inventory.refs.data()
+
+    def low_stock(self):
+        return self.inventory.low_stock()
+
+    def ref_rows(self, kind):
+        return self.refs.rows(kind)
+
+    def _ref_write(self, fn):
+        result = self._write(fn)
+        self.inventory.refs.invalidate()  # tills reload it on their next refdata()
+        return result
+
+    def ref_add(self, kind, values):
+        return self._ref_write(lambda cur: self.refs.add(kind, values, cur=cur))
+
+    def ref_delete(self, kind, key):
+        return self._ref_write(lambda cur: self.refs.delete(kind, key, cur=cur))
+
+    def supplier_sales(self):
+        return self.refs.supplier_sales()
+
+    def report(self, period, start=None, end=None):
+        return self.analytics.summary(period, _date(start), _date(end))
+
+    def drill(self, by, grain="day", where=None, start=None, end=None):
+        return self.analytics.drill(tuple(by), grain, where, start, end)
+
+    def sale_chart(self, period, start=None, end=None, grouped=True):
+        return self.analytics.sale_chart(period, _date(start), _date(end), grouped)
+
+    def detailed(self, period, bounds=None):
+        if bounds:
+            bounds = tuple(datetime.strptime(b, DATE_FMT) for b in bounds)
+        return self.analytics.detailed(SalesQuery(period, bounds=bounds))
+
+    def login(self, username, password):
+        row = get_conn(self.path).execute("SELECT role FROM users WHERE username=? AND password=?",
+                                          (username, password)).fetchone()
+        return row[0] if row else None
+
+    METHODS = {
+        "lookup": lookup, "checkout": checkout, "replay": replay, "receive": receive,
+        "set_price": set_price, "delete": delete, "inventory": inventory_rows,
+        "inventory_count": inventory_count, "inventory_page": inventory_page,
+        "inventory_search": inventory_search, "inventory_seq": inventory_seq, "inventory_changes": inventory_changes,
+        "inventory_rows_for": inventory_rows_for,
+        "ref_lists": ref_lists, "brands": brands, "refdata": refdata, "report": report, "login": login,
+        "low_stock": low_stock, "ref_rows": ref_rows, "ref_add": ref_add, "ref_delete": ref_delete,
+        "supplier_sales": supplier_sales, "drill": drill, "sale_chart": sale_chart, "detailed": detailed,
+    }
+
+    def handle(self, request):
+        """Dispatch one decoded request; always returns a response dict."""
+        response = {"id": request.get("id")}
+        token = os.environ.get(TOKEN_ENV)
+        try:
+            if token and not hmac.compare_digest(str(request.get("token", "")), token):
+                raise PermissionError("bad token")
+            method = self.METHODS.get(request.get("method"))
+            if method is None:
+                raise ValueError(f"unknown method {request.get('method')!r}")
+            response["result"] = method(self, **request.get("params", {}))
+        except StockShortage as e:
+            response["error"] = {"type": "StockShortage", "message": str(e), "lines": e.lines}
+        except Exception as e:
+            response["error"] = {"type": type(e).__name__, "message": str(e)}
+        return response
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            for raw in self.rfile:
+                if not raw.strip():
+                    continue
+                try:
+                    response = self.server.backend.handle(json.loads(raw))
+                except ValueError as e:
+                    response = {"id": None, "error": {"type": "ValueError", "message": str(e)}}
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+        finally:
+            # One handler thread per till connection; release its DB connection
+            close_conn(self.server.backend.path)
+
+
+class PosServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, addr=DEFAULT_ADDR, path=None, backend=None):
+        # Without a token anyone on the LAN could log in, reprice or delete stock
+        if not os.environ.get(TOKEN_ENV) and not is_loopback(addr[0]):
+            raise PosServerError(f"set {TOKEN_ENV} (same value on every till) to serve on {addr[0] or 'all interfaces'}")
+        self.backend = backend or PosBackend(path)
+        super().__init__(addr, _Handler)
+
+
+# --- clients ---
+
+class PosClient:
+    """Till-side API. Subclasses only implement _send(request) -> response."""
+
+    def __init__(self):
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def call(self, method, **params):
+        with self._lock:
+            self._ids += 1
+            request = {"id": self._ids, "method": method, "params": params}
+            token = os.environ.get(TOKEN_ENV)
+            if token:
+                request["token"] = token
+            response = self._send(request)
+        error = response.get("error")
+        if error:
+            if error["type"] == "StockShortage":
+                raise StockShortage([tuple(l) for l in error["lines"]])
+            raise PosServerError(f"{error['type']}: {error['message']}")
+        return response.get("result")
+
+    def _send(self, request):
+        raise NotImplementedError
+
+    def catalog(self):
+        return RemoteCatalog(self)
+
+    def lookup(self, barcode):
+        row = self.call("lookup", barcode=str(barcode))
+        return Item(**row) if row else None
+
+    def checkout(self, bill):
+        return tuple(self.call("checkout", bill_id=bill.bill_id, when=bill.when,
+                               lines=[list(l) for l in bill.lines], total=bill.total))
+
+    def replay(self, bills, strict=True):
+        if not bills:
+            return {"posted": 0, "settled": [], "rejected": {}}
+        return self.call("replay", bills=bills, strict=strict)
+
+    def receive(self, barcode, qty, price, category, brand, size, supplier, date=None):
+        return self.call("receive", barcode=barcode, qty=qty, price=price, category=category,
+                         brand=brand, size=size, supplier=supplier, date=date)
+
+    def set_price(self, barcode, price):
+        return self.call("set_price", barcode=barcode, price=price)
+
+    def delete(self, barcode):
+        return self.call("delete", barcode=barcode)
+
+    def inventory(self, search=None):
+        return [tuple(r) for r in self.call("inventory", search=search)]
+
+    def inventory_count(self, search=None):
+        return self.call("inventory_count", search=search)
+
+    def inventory_page(self, after=None, before=None, offset=None, limit=50, search=None):
+        return [tuple(r) for r in self.call("inventory_page", after=after, before=before, offset=offset,
+                                            limit=limit, search=search)]
+
+    def inventory_search(self, search, limit=None):
+        return self.call("inventory_search", search=search, limit=limit)
+
+    def inventory_seq(self):
+        return self.call("inventory_seq")
+
+    def inventory_changes(self, seq):
+        feed = self.call("inventory_changes", seq=seq)
+        return tuple(feed) if feed is not None else None
+
+    def inventory_rows_for(self, barcodes, search=None):
+        return [tuple(r) for r in self.call("inventory_rows_for", barcodes=barcodes, search=search)]
+
+    def ref_lists(self):
+        suppliers, categories = self.call("ref_lists")
+        return suppliers, categories
+
+    def brands(self, category):
+        return self.call("brands", category=category)
+
+    def refdata(self):
+        return self.call("refdata")
+
+    def low_stock(self):
+        return self.call("low_stock")
+
+    def ref_rows(self, kind):
+        return self.call("ref_rows", kind=kind)
+
+    def ref_add(self, kind, values):
+        return self.call("ref_add", kind=kind, values=values)
+
+    def ref_delete(self, kind, key):
+        return self.call("ref_delete", kind=kind, key=key)
+
+    def supplier_sales(self):
+        return self.call("supplier_sales")
+
+    def report(self, period, start=None, end=None):
+        return self.call("report", period=period, start=_day(start), end=_day(end))
+
+    def drill(self, by, grain="day", where=None, start=None, end=None):
+        return self.call("drill", by=by, grain=grain, where=where, start=_day(start), end=_day(end))
+
+    def sale_chart(self, period, start=None, end=None, grouped=True):
+        return self.call("sale_chart", period=period, start=_day(start), end=_day(end), grouped=grouped)
+
+    def detailed(self, period, bounds=None):
+        return self.call("detailed", period=period, bounds=bounds)
+
+    def login(self, username, password):
+        return self.call("login", username=username, password=password)
+
+
+class RemoteClient(PosClient):
+    """Talks to a PosServer over TCP; reconnects once if the link dropped.
+
+    A request is only sent again if it never reached the socket, or if
+    repeating it is harmless (not in NOT_IDEMPOTENT): after a timeout the
+    server may still be committing the first copy.
+    """
+
+    def __init__(self, addr=DEFAULT_ADDR, timeout=CLIENT_TIMEOUT_S):
+        super().__init__()
+        self.addr = addr
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.addr, timeout=self.timeout)
+        self._file = self._sock.makefile("rwb")
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            finally:
+                self._sock = self._file = None
+
+    def _peer_closed(self):
+        """True if the server already closed this (idle) connection."""
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+            return bool(readable) and not self._sock.recv(1, socket.MSG_PEEK)
+        except OSError:
+            return True
+
+    def _send(self, request):
+        payload = json.dumps(request).encode() + b"\n"
+        repeatable = request.get("method") not in NOT_IDEMPOTENT
+        for attempt in (1, 2):
+            sent = False
+            try:
+                if self._sock is not None and not repeatable and self._peer_closed():
+                    self.close()  # reconnect before sending rather than guess afterwards
+                if self._sock is None:
+                    self._connect()
+                self._file.write(payload)
+                self._file.flush()
+                sent = True
+                raw = self._file.readline()
+                if not raw:
+                    raise ConnectionError("server closed the connection")
+                return json.loads(raw)
+            except OSError:
+                self.close()
+                if attempt == 2 or (sent and not repeatable):
+                    raise
+
+
+class LoopbackClient(PosClient):
+    """In-process stand-in for RemoteClient: same JSON round trip, no sockets."""
+
+    def __init__(self, backend=None, path=None):
+        super().__init__()
+        self.backend = backend or PosBackend(path)
+
+    def _send(self, request):
+        return json.loads(json.dumps(self.backend.handle(json.loads(json.dumps(request)))))
+
+
+class RemoteCatalog:
+    """Catalog interface for SalesService backed by the server's in-memory catalog."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, barcode):
+        return self.client.lookup(barcode)
+
+    def invalidate(self, *barcodes):
+        pass  # the server invalidates on commit
+
+    def clear(self):
+        pass
+
+
+_client = None
+
+
+def get_client():
+    """The RemoteClient for VJ_POS_SERVER, or None when this till uses the local database."""
+    global _client
+    if _client is None and os.environ.get(SERVER_ENV):
+        _client = RemoteClient(parse_addr(os.environ[SERVER_ENV]))
+    return _client
+
+
+def serve(addr=DEFAULT_ADDR, path=None):
+    server = PosServer(addr, path)
+    print(f"POS server on {addr[0]}:{addr[1]} using {server.backend.path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.backend.stop()
+
+
+if __name__ == "__main__":
+    try:
+        serve(parse_addr(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ADDR,
+              sys.argv[2] if len(sys.argv) > 2 else None)
+    except PosServerError as e:
+        sys.exit(f"POS server not started: {e}")
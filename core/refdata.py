@@ -0,0 +1,107 @@
+import threading
+
+from core.db import get_conn, DB_PATH
+
+# Shared reference data for the stock forms: categories, suppliers, brands
+# grouped by category and bottle sizes. Loaded in one go on first use and kept
+# until a manager screen (brand / supplier / category add or delete) calls
+# invalidate_all(), so dropdowns repopulate from memory on every category change.
+DEFAULT_SIZES = ["650ML", "500ML", "330ML", "180ML"]
+TYPE_AHEAD_MAX = 200  # most suggestions a filtered dropdown shows
+
+BRANDS_SQL = "SELECT category, name FROM brands ORDER BY bid"
+SIZES_SQL = "SELECT DISTINCT size FROM inventory WHERE size IS NOT NULL AND size <> ''"
+CATEGORIES_SQL = "SELECT name FROM categories ORDER BY cid"
+SUPPLIERS_SQL = "SELECT name FROM suppliers ORDER BY sid"
+
+
+class RefData:
+    def __init__(self, path=None, remote=None):
+        self.path = path or DB_PATH
+        self.remote = remote
+        self._data = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.remote:
+            return self.remote.refdata()
+        conn = get_conn(self.path)
+        brands = {}
+        for category, name in conn.execute(BRANDS_SQL):
+            brands.setdefault(category, []).append(name)
+        sizes = list(DEFAULT_SIZES)
+        for (size,) in conn.execute(SIZES_SQL):
+            if size not in sizes:
+                sizes.append(size)
+        return {
+            "categories": [r[0] for r in conn.execute(CATEGORIES_SQL)],
+            "suppliers": [r[0] for r in conn.execute(SUPPLIERS_SQL)],
+            "brands": brands,
+            "sizes": sizes,
+        }
+
+    def data(self):
+        """All reference lists as a dict (what the POS server hands to tills)."""
+        with self._lock:
+            if self._data is None:
+                self._data = self._load()
+            return self._data
+
+    def categories(self):
+        return self.data()["categories"]
+
+    def suppliers(self):
+        return self.data()["suppliers"]
+
+    def brands(self, category=None):
+        """Brands of one category, or every brand when category is None."""
+        brands = self.data()["brands"]
+        if category is None:
+            return [name for names in brands.values() for name in names]
+        return brands.get(category, [])
+
+    def sizes(self):
+        return self.data()["sizes"]
+
+    def add_size(self, size):
+        """Remember a size typed into the stock form without reloading."""
+        with self._lock:
+            if self._data is not None and size and size not in self._data["sizes"]:
+                self._data["sizes"].append(size)
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+
+def matching(values, text, limit=TYPE_AHEAD_MAX):
+    """Type-ahead filter: values starting with text first, then ones containing it."""
+    text = (text or "").strip().lower()
+    if not text:
+        return values
+    starts = [v for v in values if v.lower().startswith(text)]
+    if len(starts) >= limit:
+        return starts[:limit]
+    contains = [v for v in values if text in v.lower() and not v.lower().startswith(text)]
+    return (starts + contains)[:limit]
+
+
+_refdata = {}
+_refdata_lock = threading.Lock()
+
+
+def get_refdata(path=None, remote=None):
+    path = path or DB_PATH
+    with _refdata_lock:
+        refs = _refdata.get((path, remote))
+        if refs is None:
+            refs = _refdata[(path, remote)] = RefData(path, remote)
+        return refs
+
+
+def invalidate_all():
+    """Drop every cached copy (local and server-backed) after a manager screen edit."""
+    with _refdata_lock:
+        refs = list(_refdata.values())
+    for r in refs:
+        r.invalidate()
@@ -0,0 +1,93 @@
+from collections import deque
+
+from core.db import snapshot
+from core.periods import DATE_FMT
+
+# In-memory running aggregates for the analytics auto-refresh. Seeded once
+# with the full period queries, then each refresh reads only sales_log rows
+# past the highest sid already folded in (an indexed rowid range) and adds
+# them to the total, the per-brand sums and the newest-first history. A full
+# reseed happens when the period's bounds move (midnight, new month) or rows
+# already counted were deleted / edited: triggers bump sales_log_edits
+# (migration v13) for those, so checking costs one row read, not a COUNT(*).
+EDITS_SQL = "SELECT edits FROM sales_log_edits WHERE id = 1"
+NEW_ROWS_SQL = """
+    SELECT s.sid, s.date, COALESCE(i.category, 'Unknown'), COALESCE(i.brand, s.brand), s.qty, s.total
+    FROM sales_log s
+    LEFT JOIN inventory i ON s.barcode = i.barcode
+    WHERE s.sid > ?
+    ORDER BY s.sid
+"""
+
+
+def edits(cur):
+    """sales_log_edits counter: moves whenever an existing sales_log row is deleted or updated."""
+    return cur.execute(EDITS_SQL).fetchone()[0]
+
+
+class RunningSummary:
+    def __init__(self, query, path=None, history_len=100):
+        self.query = query
+        self.path = path
+        self.history_len = history_len
+        self.bounds = query.bounds
+        self.seeded = False
+        self.seeds = 0  # full recomputes so far
+        self.folded = 0  # rows added incrementally so far
+
+    def _seed(self, cur):
+        # Read everything first: if a query is interrupted (DBReader.cancel)
+        # the old watermark stays with the old totals and the next refresh
+        # reseeds, instead of a new watermark hiding rows the totals miss
+        high_water = cur.execute("SELECT COALESCE(MAX(sid), 0) FROM sales_log").fetchone()[0]
+        seen_edits = edits(cur)
+        brands = dict(cur.execute(*self.query.brand_totals()).fetchall())
+        history = cur.execute(*self.query.history(self.history_len)).fetchall()
+        self.high_water, self.edits, self.brands = high_water, seen_edits, brands
+        self.revenue = sum(total or 0 for total in brands.values())
+        self.history = deque(history, maxlen=self.history_len)
+        self.seeded = True
+        self.seeds += 1
+
+    def _in_period(self, date):
+        if self.bounds is None:
+            return True
+        start, end = self.bounds
+        return start.strftime(DATE_FMT) <= (date or "") < end.strftime(DATE_FMT)
+
+    def refresh(self):
+        """Bring the aggregates up to date; returns the number of rows folded in."""
+        with snapshot(self.path) as cur:
+            if not self.seeded:
+                self._seed(cur)
+                return 0
+            new = cur.execute(NEW_ROWS_SQL, (self.high_water,)).fetchall()
+            if edits(cur) != self.edits:
+                self._seed(cur)  # rows we already counted were deleted or changed
+                return 0
+            fresh = []
+            for sid, date, category, brand, qty, total in new:
+                self.high_water = sid
+                if not self._in_period(date):
+                    continue  # e.g. a replayed bill from an earlier day
+                self.brands[brand] = self.brands.get(brand, 0) + (total or 0)
+                self.revenue += total or 0
+                fresh.append((date, category, brand, qty, total))
+            if fresh:
+                # Same order as the history query (date, then sid, newest first);
+                # the stable sort keeps the newer sid first on equal dates
+                merged = sorted(fresh[::-1] + list(self.history), key=lambda r: r[0] or "", reverse=True)
+                self.history = deque(merged[:self.history_len], maxlen=self.history_len)
+            folded = len(fresh)
+            self.folded += folded
+            return folded
+
+    def summary(self):
+        brands = sorted(self.brands.items(), key=lambda b: b[1] or 0, reverse=True)
+        return {
+            "title": self.query.title(),
+            "revenue": self.revenue,
+            "brands": brands,
+            "top_brands": brands[:10],
+            "history": list(self.history),
+        }
@@ -0,0 +1,137 @@
+import uuid
+from datetime import datetime
+
+# Bill commit path. One transaction per bill: header row, one executemany
+# each for transaction_items and sales_log, and a single UPDATE for the
+# stock decrement, all built from the bill's own lines - a constant number
+# of statements whether the cart has 1 line or 50. Nothing is read back out of
+# transaction_items, so stale rows under a reused tid cannot leak into a bill.
+#
+# Run it under transaction(immediate=True): stock is re-read after the write
+# lock is taken, so two tills can never both sell the last crate.
+#
+# Bills carry a bill_id (UNIQUE in transactions) so the sales journal can
+# replay them any number of times without double counting.
+
+
+class StockShortage(Exception):
+    """Raised when a bill asks for more than is in stock; nothing is written."""
+
+    def __init__(self, lines):
+        # (barcode, brand, size, wanted, available)
+        self.lines = lines
+        super().__init__("Insufficient stock for " + ", ".join(
+            f"{brand} {size} (wanted {wanted}, have {'?' if available is None else available})"
+            for _, brand, size, wanted, available in lines))
+
+
+def bill_total(lines):
+    return round(sum(float(line[5]) for line in lines), 2)
+
+
+STOCK_SQL = "SELECT barcode, quantity, supplier FROM inventory WHERE barcode IN ({marks})"
+FIND_BILL_SQL = "SELECT tid, total FROM transactions WHERE bill_id=?"
+INSERT_BILL_SQL = "INSERT INTO transactions (bill_id, items, total, date) VALUES (?, ?, ?, ?)"
+INSERT_ITEM_SQL = ("INSERT INTO transaction_items (tid, barcode, brand, size, unit_price, qty, line_total) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?)")
+INSERT_SALE_SQL = "INSERT INTO sales_log (tid, barcode, brand, supplier, qty, total, date) VALUES (?, ?, ?, ?, ?, ?, ?)"
+# Stock decrement for the whole bill in one statement: {rows} is one
+# "(?, ?)" (barcode, qty) per line, summed per barcode in the CTE
+BILL_QTY_CTE = """
+    WITH bill(barcode, qty) AS (
+        SELECT column1, SUM(column2) FROM (VALUES {rows}) GROUP BY column1
+    )"""
+# Guarded: a row only moves if it still covers its line
+DECREMENT_SQL = BILL_QTY_CTE + """
+    UPDATE inventory SET quantity = quantity - (SELECT qty FROM bill WHERE bill.barcode = inventory.barcode)
+    WHERE barcode IN (SELECT barcode FROM bill)
+      AND quantity >= (SELECT qty FROM bill WHERE bill.barcode = inventory.barcode)
+"""
+# Replay of goods that already left the shop: never below zero
+DECREMENT_FLOOR_SQL = BILL_QTY_CTE + """
+    UPDATE inventory SET quantity = MAX(quantity - (SELECT qty FROM bill WHERE bill.barcode = inventory.barcode), 0)
+    WHERE barcode IN (SELECT barcode FROM bill)
+"""
+
+
+def stock_rows(cur, lines):
+    """{barcode: (quantity, supplier)} for the bill's barcodes, in one read."""
+    marks = ",".join("?" * len(lines))
+    return {barcode: (qty, supplier) for barcode, qty, supplier in
+            cur.execute(STOCK_SQL.format(marks=marks), [str(line[0]) for line in lines]).fetchall()}
+
+
+def decrement(cur, sql, lines):
+    """Run DECREMENT_SQL / DECREMENT_FLOOR_SQL for the bill; returns the number of inventory rows changed."""
+    params = [v for line in lines for v in (str(line[0]), int(line[4]))]
+    cur.execute(sql.format(rows=", ".join(["(?, ?)"] * len(lines))), params)
+    # cursor.rowcount is -1 for a statement starting with WITH (before
+    # Python 3.12); changes() counts the same rows, leaving out what the
+    # inventory triggers wrote
+    return cur.execute("SELECT changes()").fetchone()[0]
+
+
+def check_stock(cur, lines, stock=None):
+    """Return the lines the inventory cannot cover, as StockShortage tuples."""
+    stock = stock if stock is not None else stock_rows(cur, lines)
+    short = []
+    for barcode, brand, size, _, qty, _ in lines:
+        available = stock.get(str(barcode), (0, None))[0] or 0
+        if available < int(qty):
+            short.append((str(barcode), brand, size, int(qty), available))
+    return short
+
+
+def new_bill_id():
+    return uuid.uuid4().hex
+
+
+def find_bill(cur, bill_id):
+    row = cur.execute(FIND_BILL_SQL, (bill_id,)).fetchone()
+    return tuple(row) if row else None
+
+
+def record_sale(cur, lines, when=None, total=None, bill_id=None, strict=True):
+    """Write one bill inside the caller's transaction.
+
+    lines are (barcode, brand, size, unit_price, qty, line_total), one per
+    barcode; total defaults to their sum. Returns (tid, total); raises
+    StockShortage for the whole bill. A bill_id already on file is not
+    written again. strict=False (journal replay of goods that already left
+    the shop) records the sale even if stock ran out, flooring stock at 0.
+    """
+    when = when or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    total = bill_total(lines) if total is None else total
+    items = ", ".join(f"{brand} {size} x{qty}" for _, brand, size, _, qty, _ in lines)
+
+    if bill_id:
+        existing = find_bill(cur, bill_id)
+        if existing:
+            return existing
+
+    stock = stock_rows(cur, lines)
+    short = check_stock(cur, lines, stock)
+    if short and strict:
+        raise StockShortage(short)
+
+    cur.execute(INSERT_BILL_SQL, (bill_id, items, total, when))
+    tid = cur.lastrowid
+
+    cur.executemany(INSERT_ITEM_SQL, [(tid, str(barcode), brand, size, price, int(qty), line_total)
+                                      for barcode, brand, size, price, qty, line_total in lines])
+    # Supplier comes from the stock read above rather than one SELECT per line
+    cur.executemany(INSERT_SALE_SQL, [(tid, str(barcode), brand, stock.get(str(barcode), (0, None))[1],
+                                       int(qty), line_total, when)
+                                      for barcode, brand, _, _, qty, line_total in lines])
+
+    if not strict:
+        decrement(cur, DECREMENT_FLOOR_SQL, lines)
+        return tid, total
+
+    # Under an immediate transaction check_stock already guarantees every
+    # line is covered; outside one, a short row is left alone and the
+    # rowcount check fails the bill
+    if decrement(cur, DECREMENT_SQL, lines) != len({str(line[0]) for line in lines}):
+        # Stock moved between check and update; the caller rolls the bill back
+        raise StockShortage([(str(barcode), brand, size, int(qty), None) for barcode, brand, size, _, qty, _ in lines])
+    return tid, total
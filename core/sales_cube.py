@@ -0,0 +1,209 @@
+import threading
+from datetime import date, timedelta
+
+from core.db import snapshot, DB_PATH
+from core.running_sales import edits
+
+# In-memory sales cube for the analytics drill-down. Measures are qty and
+# revenue; dimensions are brand, category, supplier and size, at an hour,
+# day, week or month grain.
+#
+# Base cuboids hold every dimension at one grain: day comes from the
+# sales_daily rollup (all history), week and month are rolled up from day,
+# and hour is read from sales_log for the last HOURLY_DAYS only (the rollup
+# has no time of day). Any other group-by is derived from its grain's base
+# cuboid once and memoized, so a slice like "650ML beer by supplier last
+# month" filters a few thousand pre-summed rows instead of scanning sales.
+# New sales_log rows are folded in by sid like core/running_sales.py; a
+# deleted or edited row (sales_log_edits moved) reloads everything.
+DIMENSIONS = ("brand", "category", "supplier", "size")
+GRAINS = ("hour", "day", "week", "month")
+HOURLY_DAYS = 31
+TIME = "time"  # pseudo-dimension: group by the grain's period
+
+DAY_SQL = """
+    SELECT day, COALESCE(NULLIF(brand, ''), 'Unknown'), COALESCE(category, 'Unknown'),
+           COALESCE(NULLIF(supplier, ''), 'Unknown'), COALESCE(size, '-'), SUM(qty), SUM(revenue)
+    FROM sales_daily
+    GROUP BY 1, 2, 3, 4, 5
+"""
+HOUR_SQL = """
+    SELECT substr(s.date, 1, 13), COALESCE(s.brand, 'Unknown'), COALESCE(i.category, 'Unknown'),
+           COALESCE(s.supplier, 'Unknown'), COALESCE(i.size, '-'), SUM(COALESCE(s.qty, 0)), SUM(COALESCE(s.total, 0))
+    FROM sales_log s
+    LEFT JOIN inventory i ON i.barcode = s.barcode
+    WHERE s.date >= ?
+    GROUP BY 1, 2, 3, 4, 5
+"""
+NEW_ROWS_SQL = """
+    SELECT s.sid, s.date, COALESCE(s.brand, 'Unknown'), COALESCE(i.category, 'Unknown'),
+           COALESCE(s.supplier, 'Unknown'), COALESCE(i.size, '-'), COALESCE(s.qty, 0), COALESCE(s.total, 0)
+    FROM sales_log s
+    LEFT JOIN inventory i ON i.barcode = s.barcode
+    WHERE s.sid > ?
+    ORDER BY s.sid
+"""
+
+
+def week_of(day):
+    """Monday (YYYY-MM-DD) of the week a YYYY-MM-DD day falls in."""
+    d = date.fromisoformat(day[:10])
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+def period_of(day_or_hour, grain):
+    if grain == "hour":
+        return day_or_hour[:13]
+    if grain == "day":
+        return day_or_hour[:10]
+    if grain == "week":
+        return week_of(day_or_hour)
+    return day_or_hour[:7]
+
+
+def _add(cuboid, key, qty, revenue):
+    cell = cuboid.get(key)
+    if cell is None:
+        cuboid[key] = [qty or 0, revenue or 0]
+    else:
+        cell[0] += qty or 0
+        cell[1] += revenue or 0
+
+
+class SalesCube:
+    def __init__(self, path=None):
+        self.path = path or DB_PATH
+        self._lock = threading.Lock()
+        self._base = None  # grain -> {(period, brand, category, supplier, size): [qty, revenue]}
+        self._derived = {}  # (grain, dims) -> {(period, *dims): [qty, revenue]}
+        self.loads = 0
+
+    # --- loading ---
+
+    def _load(self, cur):
+        # Nothing is stored until every query has finished: an interrupted
+        # load (drill-down closed or re-submitted) leaves the previous state
+        # whole, watermark included, and the next refresh loads again
+        high_water = cur.execute("SELECT COALESCE(MAX(sid), 0) FROM sales_log").fetchone()[0]
+        seen_edits = edits(cur)
+        hour_start = (date.today() - timedelta(days=HOURLY_DAYS - 1)).isoformat()
+        day = {tuple(r[:5]): [r[5], r[6]] for r in cur.execute(DAY_SQL)}
+        hour = {tuple(r[:5]): [r[5], r[6]] for r in cur.execute(HOUR_SQL, (hour_start,))}
+        week, month = {}, {}
+        for (d, *dims), (qty, revenue) in day.items():
+            _add(week, (week_of(d), *dims), qty, revenue)
+            _add(month, (d[:7], *dims), qty, revenue)
+        self.high_water, self.edits, self.hour_start = high_water, seen_edits, hour_start
+        self._base = {"hour": hour, "day": day, "week": week, "month": month}
+        self._derived = {}
+        self.loads += 1
+
+    def refresh(self):
+        """Load on first use, then fold in sales_log rows added since."""
+        with self._lock, snapshot(self.path) as cur:
+            if self._base is None or self.hour_start != (date.today() - timedelta(days=HOURLY_DAYS - 1)).isoformat():
+                self._load(cur)
+                return
+            new = cur.execute(NEW_ROWS_SQL, (self.high_water,)).fetchall()
+            if edits(cur) != self.edits:
+                self._load(cur)  # rows already in the cube were deleted or changed
+                return
+            for sid, when, brand, category, supplier, size, qty, revenue in new:
+                self.high_water = sid
+                if not when:
+                    continue
+                for grain, cuboid in self._base.items():
+                    if grain == "hour" and when < self.hour_start:
+                        continue
+                    _add(cuboid, (period_of(when, grain), brand, category, supplier, size), qty, revenue)
+            if new:
+                self._derived = {}
+
+    # --- queries ---
+
+    def _cuboid(self, grain, dims):
+        """Base cuboid rolled up to (period, *dims), memoized until the next change."""
+        key = (grain, dims)
+        cuboid = self._derived.get(key)
+        if cuboid is None:
+            idx = [DIMENSIONS.index(d) + 1 for d in dims]
+            cuboid = {}
+            for row, (qty, revenue) in self._base[grain].items():
+                _add(cuboid, (row[0], *(row[i] for i in idx)), qty, revenue)
+            self._derived[key] = cuboid
+        return cuboid
+
+    def query(self, by=(), grain="day", where=None, start=None, end=None):
+        """Group-by / slice the cube.
+
+        by: dimensions to group by, in order; TIME groups by the grain's period.
+        where: {dimension: value} slice. start / end: half-open YYYY-MM-DD day
+        range; at week / month grain whole periods overlapping it are counted,
+        and hour grain only covers the last HOURLY_DAYS days.
+        Returns [(labels, qty, revenue)], time ascending when grouped by time,
+        otherwise biggest revenue first.
+        """
+        if grain not in GRAINS:
+            raise ValueError(f"unknown grain {grain!r}")
+        where = where or {}
+        for d in list(by) + list(where):
+            if d != TIME and d not in DIMENSIONS:
+                raise ValueError(f"unknown dimension {d!r}")
+        self.refresh()
+        dims = tuple(d for d in DIMENSIONS if d in by or d in where)
+        lo, hi = self._period_range(grain, start, end)
+        pos = {d: i + 1 for i, d in enumerate(dims)}
+        slice_on = [(pos[d], v) for d, v in where.items()]
+        out_idx = [0 if d == TIME else pos[d] for d in by]
+        with self._lock:
+            cuboid = self._cuboid(grain, dims)
+            result = {}
+            for row, (qty, revenue) in cuboid.items():
+                if (lo and row[0] < lo) or (hi and row[0] >= hi):
+                    continue
+                if any(row[i] != v for i, v in slice_on):
+                    continue
+                _add(result, tuple(row[i] for i in out_idx), qty, revenue)
+        rows = [(labels, qty, revenue) for labels, (qty, revenue) in result.items()]
+        if by and by[0] == TIME:
+            rows.sort(key=lambda r: r[0])
+        else:
+            rows.sort(key=lambda r: r[2], reverse=True)
+        return rows
+
+    @staticmethod
+    def _period_range(grain, start, end):
+        """Period keys [lo, hi) covering days [start, end) at this grain."""
+        if start is not None:
+            start = start.isoformat() if isinstance(start, date) else str(start)[:10]
+        if end is not None:
+            end = end.isoformat() if isinstance(end, date) else str(end)[:10]
+        if grain == "hour":
+            return (start and start + " 00"), (end and end + " 00")
+        if grain == "day":
+            return start, end
+        if grain == "week":
+            return (start and week_of(start)), end
+        # month: up to and including the month of the last day
+        last = end and (date.fromisoformat(end) - timedelta(days=1)).isoformat()[:7]
+        return (start and start[:7]), (last and last + "~")  # "~" sorts after "YYYY-MM"
+
+    def values(self, dimension):
+        """Distinct members of a dimension, for slice pickers."""
+        self.refresh()
+        i = DIMENSIONS.index(dimension) + 1
+        with self._lock:
+            return sorted({row[i] for row in self._base["month"]})
+
+
+_cubes = {}
+_cubes_lock = threading.Lock()
+
+
+def get_cube(path=None):
+    path = path or DB_PATH
+    with _cubes_lock:
+        cube = _cubes.get(path)
+        if cube is None:
+            cube = _cubes[path] = SalesCube(path)
+        return cube
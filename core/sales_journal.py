@@ -0,0 +1,301 @@
+import json
+import os
+import re
+import socket
+import threading
+
+from core.db import BASE_DIR, get_conn
+from core.db_writer import get_writer
+from core.sales import record_sale, find_bill, StockShortage
+
+# Write-ahead journal for completed bills. finish_sale appends the bill here
+# (one JSON line, flushed to the OS) before handing it to the writer thread;
+# the writer fsyncs the journal before opening the DB transaction, so one
+# fsync covers every bill appended since the last one. If the DB commit
+# fails (locked, disk full, share dropped) the bill is still on disk and is
+# posted later: by replay_later while this session runs, or at the next
+# startup. Posting is idempotent through transactions.bill_id.
+#
+# Each till keeps its own file (the db folder may be shared by several),
+# and only this process's own bills are ever retried or compacted away.
+TERMINAL_ID = re.sub(r"[^\w.-]", "_", os.environ.get("VJ_TERMINAL_ID") or socket.gethostname() or "till")
+JOURNAL_PATH = os.environ.get("VJ_SALES_JOURNAL",
+                              os.path.join(BASE_DIR, "db", f"sales_journal_{TERMINAL_ID}.jsonl"))
+# Shared journal written by older builds; posted once at startup, then removed
+LEGACY_JOURNAL_PATH = os.path.join(BASE_DIR, "db", "sales_journal.jsonl")
+RETRY_MS = 5000
+
+
+def post_bills(cur, bills, strict=True):
+    """Write journaled bills that are not on file yet, each under its own savepoint.
+
+    Run inside an immediate transaction. strict=False is for bills from an
+    earlier session (the goods already left the shop): they are recorded
+    even if stock ran out. A strict bill that is short is skipped.
+    Returns {"posted": n, "settled": [bill_id on file], "rejected": {bill_id: shortage lines}}.
+    """
+    result = {"posted": 0, "settled": [], "rejected": {}}
+    for bill in bills:
+        bill_id = bill["bill_id"]
+        if not find_bill(cur, bill_id):
+            cur.execute("SAVEPOINT replay_bill")
+            try:
+                record_sale(cur, [tuple(l) for l in bill["lines"]], when=bill["date"], total=bill["total"],
+                            bill_id=bill_id, strict=strict)
+            except StockShortage as e:
+                cur.execute("ROLLBACK TO replay_bill")
+                cur.execute("RELEASE replay_bill")
+                result["rejected"][bill_id] = e.lines
+                continue
+            except Exception:
+                cur.execute("ROLLBACK TO replay_bill")
+                cur.execute("RELEASE replay_bill")
+                raise
+            cur.execute("RELEASE replay_bill")
+            result["posted"] += 1
+        result["settled"].append(bill_id)
+    return result
+
+
+class SalesJournal:
+    def __init__(self, path=None):
+        self.path = path or JOURNAL_PATH
+        self._lock = threading.Lock()
+        self._file = None
+        self._dirty = False
+        # Bookkeeping for this process only
+        self._open = {}       # bill_id -> record journaled this session, not yet settled
+        self._failed = set()  # of those, bills whose commit failed for a non-stock reason
+        self._settled = set()  # bill_ids confirmed committed or voided; compact() drops them
+
+    def _open_file(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a+", encoding="utf-8")
+            # A crash mid-write leaves a torn last line; start on a fresh one
+            # so it cannot swallow the next record
+            if self._file.tell():
+                self._file.seek(self._file.tell() - 1)
+                last = self._file.read(1)
+                if last != "\n":
+                    self._file.write("\n")
+        return self._file
+
+    def _write(self, record):
+        with self._lock:
+            f = self._open_file()
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            self._dirty = True
+
+    def append(self, bill_id, lines, total, when):
+        """Record a completed bill (flushed, not yet fsynced). Returns False if the disk refused it."""
+        record = {"bill_id": bill_id, "date": when, "total": total, "lines": [list(l) for l in lines]}
+        with self._lock:
+            self._open[bill_id] = record
+        try:
+            self._write(record)
+            return True
+        except OSError as e:
+            # The DB commit still goes ahead; the journal is the safety net
+            print(f"Sales journal append failed: {e}")
+            return False
+
+    def void(self, bill_id):
+        """Mark a journaled bill as not sold (e.g. rejected for stock)."""
+        try:
+            self._write({"void": bill_id})
+        except OSError as e:
+            print(f"Sales journal void failed: {e}")
+            return
+        self.settled(bill_id)
+
+    def settled(self, *bill_ids):
+        """The bills are on file (or voided): no retry, and compact() may drop them."""
+        with self._lock:
+            for bill_id in bill_ids:
+                self._open.pop(bill_id, None)
+                self._failed.discard(bill_id)
+                self._settled.add(bill_id)
+
+    def failed(self, bill_id):
+        """The bill's own commit failed (not for stock); replay_later retries it."""
+        with self._lock:
+            if bill_id in self._open:
+                self._failed.add(bill_id)
+
+    def retry_bills(self):
+        """Records of this session's failed bills, oldest first.
+
+        Bills still waiting on their own writer job are not in here: they
+        only join once that job has reported its failure.
+        """
+        with self._lock:
+            return [record for bill_id, record in self._open.items() if bill_id in self._failed]
+
+    def apply(self, result):
+        """Book a post_bills() result once its transaction committed."""
+        self.settled(*result["settled"])
+        for bill_id in result["rejected"]:
+            self.void(bill_id)
+
+    def sync(self):
+        """fsync everything appended so far. Called by the writer before committing."""
+        with self._lock:
+            if not self._dirty or self._file is None:
+                return
+            self._file.flush()
+            fd = self._file.fileno()
+            self._dirty = False
+        try:
+            # Outside the lock: the till can keep appending while the disk catches up
+            os.fsync(fd)
+        except OSError as e:
+            print(f"Sales journal sync failed: {e}")
+
+    def _records(self):
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for raw in f:
+                try:
+                    records.append(json.loads(raw))
+                except ValueError:
+                    continue  # torn last line from a crash mid-write
+        return records
+
+    def entries(self):
+        """Bills in the journal that were not voided, oldest first."""
+        bills, voided = {}, set()
+        for record in self._records():
+            if "void" in record:
+                voided.add(record["void"])
+            else:
+                bills[record["bill_id"]] = record
+        # Voids are confirmed too: compact() can drop them with their bill
+        with self._lock:
+            self._settled.update(voided)
+        return [b for bill_id, b in bills.items() if bill_id not in voided]
+
+    def compact(self):
+        """Rewrite the journal without the bills this process confirmed settled."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._dirty = False
+            keep = [r for r in self._records() if r.get("bill_id", r.get("void")) not in self._settled]
+            if not os.path.exists(self.path):
+                return len(keep)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in keep:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._settled.clear()
+            return len(keep)
+
+
+_journal = None
+
+
+def get_journal():
+    global _journal
+    if _journal is None:
+        _journal = SalesJournal()
+    return _journal
+
+
+def _startup_journals(journal):
+    journals = [journal]
+    if journal.path == JOURNAL_PATH and os.path.exists(LEGACY_JOURNAL_PATH):
+        journals.append(SalesJournal(LEGACY_JOURNAL_PATH))
+    return journals
+
+
+def _finish_startup(journal, result):
+    journal.apply(result)
+    if result["posted"]:
+        print(f"Posted {result['posted']} bill(s) from {os.path.basename(journal.path)}")
+    if journal.compact() == 0 and journal.path == LEGACY_JOURNAL_PATH:
+        os.remove(journal.path)
+
+
+def replay_at_startup(conn=None, journal=None):
+    """Post bills an earlier session of this till journaled but never committed."""
+    conn = conn or get_conn()
+    for journal in _startup_journals(journal or get_journal()):
+        cur = conn.cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            # Nothing of this session is in flight yet, so every entry is an
+            # earlier session's bill: the goods already left the shop
+            result = post_bills(cur, journal.entries(), strict=False)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Sales journal replay failed, will retry: {e}")
+            continue
+        finally:
+            cur.close()
+        _finish_startup(journal, result)
+
+
+_retry_scheduled = False
+
+
+def replay_remote_at_startup(client, journal=None):
+    """Client-mode startup: hand earlier sessions' journaled bills to the POS server."""
+    for journal in _startup_journals(journal or get_journal()):
+        try:
+            result = client.replay(journal.entries(), strict=False)
+        except Exception as e:
+            print(f"Sales journal replay failed, will retry: {e}")
+            continue
+        _finish_startup(journal, result)
+
+
+def replay_later(widget, on_done=None, sales=None):
+    """Retry this session's failed bills through the writer until the DB accepts them.
+
+    Only bills whose own commit failed for a non-stock reason are retried,
+    with the normal stock check. Pass the till's SalesService so client-mode
+    tills replay to the POS server. on_done gets (posted, rejected) once a
+    retry commits; rejected maps bill_id to the lines stock could not cover.
+    """
+    global _retry_scheduled
+    if _retry_scheduled:
+        return  # one retry loop covers every failed bill
+    journal = sales.journal if sales is not None else get_journal()
+
+    def finished(result):
+        global _retry_scheduled
+        _retry_scheduled = False
+        journal.apply(result)
+        if on_done:
+            on_done(result["posted"], result["rejected"])
+
+    def failed(_e):
+        global _retry_scheduled
+        _retry_scheduled = False
+        try:
+            replay_later(widget, on_done, sales)
+        except Exception:
+            pass  # screen closed; startup replay will pick the bills up
+
+    def fire():
+        global _retry_scheduled
+        bills = journal.retry_bills()
+        if not bills:
+            _retry_scheduled = False
+            return
+        remote = sales is not None and sales.remote
+        replay = sales.replay_journal if sales is not None else post_bills
+        get_writer().submit(widget, lambda cur: replay(cur, bills), on_done=finished, on_error=failed,
+                            immediate=True, transactional=not remote)
+
+    _retry_scheduled = True
+    widget.after(RETRY_MS, fire)
@@ -0,0 +1,54 @@
+# sales_daily: one row per day x barcode x brand x supplier with qty,
+# revenue and line count, kept in step with sales_log by triggers (migration
+# v9, re-keyed in v15). Period reports read a few hundred of these rows
+# instead of every line item. brand and supplier are copied from the
+# sales_log row ('' when NULL, as they are part of the key), category and
+# size from inventory at sale time; when a key has several rows those two
+# keep their smallest non-NULL value, here and in the triggers alike.
+ROLLUP_COLUMNS = "day, barcode, brand, category, supplier, size, qty, revenue, lines"
+
+REBUILD_SQL = f"""
+    INSERT INTO sales_daily ({ROLLUP_COLUMNS})
+    SELECT substr(s.date, 1, 10), COALESCE(s.barcode, ''), COALESCE(s.brand, ''), MIN(i.category),
+           COALESCE(s.supplier, ''), MIN(i.size), SUM(COALESCE(s.qty, 0)), SUM(COALESCE(s.total, 0)), COUNT(*)
+    FROM sales_log s
+    LEFT JOIN inventory i ON i.barcode = s.barcode
+    WHERE s.date IS NOT NULL
+    GROUP BY substr(s.date, 1, 10), COALESCE(s.barcode, ''), COALESCE(s.brand, ''), COALESCE(s.supplier, '')
+"""
+# sales_log summed by the rollup key, left-joined to the rollup; plus rollup
+# rows whose key no longer occurs in sales_log on that day
+CHECK_SQL = """
+    SELECT r.day, r.barcode, r.brand, r.supplier, r.lines, r.revenue, d.lines, d.revenue
+    FROM (SELECT substr(date, 1, 10) AS day, COALESCE(barcode, '') AS barcode, COALESCE(brand, '') AS brand,
+                 COALESCE(supplier, '') AS supplier, COUNT(*) AS lines, SUM(COALESCE(total, 0)) AS revenue
+          FROM sales_log WHERE date IS NOT NULL GROUP BY 1, 2, 3, 4) r
+    LEFT JOIN sales_daily d
+        ON d.day = r.day AND d.barcode = r.barcode AND d.brand = r.brand AND d.supplier = r.supplier
+    WHERE d.day IS NULL OR d.lines != r.lines OR abs(d.revenue - r.revenue) > 0.005
+    UNION ALL
+    SELECT d.day, d.barcode, d.brand, d.supplier, 0, 0, d.lines, d.revenue
+    FROM sales_daily d
+    WHERE NOT EXISTS (SELECT 1 FROM sales_log s
+                      WHERE s.date >= d.day AND s.date < date(d.day, '+1 day')
+                        AND COALESCE(s.barcode, '') = d.barcode AND COALESCE(s.brand, '') = d.brand
+                        AND COALESCE(s.supplier, '') = d.supplier)
+"""
+
+
+def rebuild(cur):
+    """Recompute sales_daily from sales_log (backfill / repair). Returns the row count."""
+    cur.execute("DELETE FROM sales_daily")
+    cur.execute(REBUILD_SQL)
+    return cur.execute("SELECT COUNT(*) FROM sales_daily").fetchone()[0]
+
+
+def check(cur):
+    """Rollup keys whose line count or revenue disagrees with sales_log.
+
+    Rows are (day, barcode, brand, supplier, lines, revenue, rollup lines,
+    rollup revenue); a key missing on one side shows NULL / 0 there. brand
+    and supplier are compared as part of the key; category and size are
+    not (they follow inventory, which may have changed since the sale).
+    """
+    return cur.execute(CHECK_SQL).fetchall()
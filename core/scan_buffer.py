@@ -0,0 +1,54 @@
+import time
+from collections import deque
+
+# Scan input buffer for the checkout. The Return handler only timestamps and
+# queues the raw scan (so a fast HID burst never waits on lookups or widget
+# redraws); the screen drains the queue once per batch, resolving every
+# barcode against the catalog and coalescing repeats into one quantity bump.
+BATCH_MS = 40        # how long to gather a burst before resolving it
+RATE_WINDOW_S = 5.0  # scans/sec is measured over this trailing window
+
+
+class ScanBuffer:
+    def __init__(self):
+        self._pending = deque()  # (timestamp, barcode, qty)
+        self._recent = deque()   # timestamps of recent scans, for the rate
+        self.scans = 0
+        self.batches = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def push(self, barcode, qty=1, ts=None):
+        """Queue one raw scan. Returns True if it opened a new batch."""
+        ts = time.perf_counter() if ts is None else ts
+        first = not self._pending
+        self._pending.append((ts, barcode, qty))
+        self._recent.append(ts)
+        self.scans += 1
+        return first
+
+    def drain(self):
+        """Take the queued scans as [(barcode, qty, scans)], repeats merged, in first-scan order."""
+        merged = {}
+        while self._pending:
+            _, barcode, qty = self._pending.popleft()
+            entry = merged.get(barcode)
+            if entry is None:
+                merged[barcode] = [qty, 1]
+            else:
+                entry[0] += qty
+                entry[1] += 1
+        if merged:
+            self.batches += 1
+        return [(barcode, qty, count) for barcode, (qty, count) in merged.items()]
+
+    def rate(self, now=None):
+        """Scans per second over the last RATE_WINDOW_S seconds."""
+        now = time.perf_counter() if now is None else now
+        while self._recent and now - self._recent[0] > RATE_WINDOW_S:
+            self._recent.popleft()
+        if len(self._recent) < 2:
+            return float(len(self._recent))
+        span = max(now - self._recent[0], 1e-6)
+        return len(self._recent) / span
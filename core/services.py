@@ -0,0 +1,491 @@
+from collections import namedtuple
+from datetime import datetime
+
+from core.db import transaction, cached_fetchall, get_conn
+from core.catalog import get_catalog
+from core.refdata import get_refdata
+from core.running_sales import RunningSummary
+from core.sales_cube import get_cube
+from core.cart import Cart, rupees
+from core.periods import SalesQuery, DATE_FMT
+from core.sales import record_sale, new_bill_id, StockShortage
+from core.sales_journal import get_journal, post_bills
+from core import inventory_feed, inventory_search
+
+# Headless business logic behind the Tk screens. The screens own widgets and
+# threading (the writer queue); everything that touches the cart, catalog,
+# journal or database lives here, so load tests, batch jobs and remote tills
+# drive exactly the code the counter runs.
+#
+# Write methods take an optional cursor: with one they write inside the
+# caller's transaction (e.g. the writer thread) and the caller reports the
+# commit back (bill_saved / changed); without one they run their own
+# transaction and finish synchronously.
+#
+# Given a remote client (core/pos_server.py) every service sends its reads
+# and writes to the POS server instead; the cursor is then ignored. Screens
+# on a client till must go through these, never get_conn().
+
+
+class ProductNotFound(LookupError):
+    pass
+
+
+# A bill handed off for commit: lines as record_sale takes them, plus the cart
+# lines (held) so a rejected bill can be put back
+Bill = namedtuple("Bill", "bill_id when lines total held")
+
+
+class SalesService:
+    def __init__(self, path=None, catalog=None, journal=None, remote=None):
+        self.path = path
+        self.remote = remote
+        self.catalog = catalog or (remote.catalog() if remote else get_catalog(path))
+        self.journal = journal or get_journal()
+        self.cart = Cart()
+
+    def lookup(self, barcode):
+        item = self.catalog.get(barcode)
+        if item is None:
+            raise ProductNotFound(barcode)
+        return item
+
+    def scan(self, barcode, qty=1):
+        """Add qty of barcode to the cart. Returns (CartLine, new_line)."""
+        item = self.lookup(barcode)
+        if item.quantity < qty + self.cart.qty(item.barcode):
+            raise StockShortage([(item.barcode, item.brand, item.size, qty + self.cart.qty(item.barcode), item.quantity)])
+        new_line = item.barcode not in self.cart
+        return self.cart.add(item.barcode, item.category, item.brand, item.size, item.price, qty), new_line
+
+    def scan_batch(self, scans):
+        """Apply [(barcode, qty, ...)] scans. Returns (changed, missing, short).
+
+        changed maps barcode -> (CartLine, new_line); short holds StockShortage
+        tuples. Problem scans are skipped, the rest still go in.
+        """
+        changed, missing, short = {}, [], []
+        for barcode, qty, *_ in scans:
+            try:
+                line, new_line = self.scan(barcode, qty)
+            except ProductNotFound:
+                missing.append(barcode)
+                continue
+            except StockShortage as e:
+                short.extend(e.lines)
+                continue
+            if line.barcode in changed:
+                new_line = changed[line.barcode][1]
+            changed[line.barcode] = (line, new_line)
+        return changed, missing, short
+
+    def prepare_bill(self):
+        """Journal the cart as a bill and empty the cart. Commit it with commit_bill."""
+        when = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        bill = Bill(new_bill_id(), when, self.cart.sale_lines(), rupees(self.cart.total_paise),
+                    list(self.cart.lines.values()))
+        self.journal.append(bill.bill_id, bill.lines, bill.total, bill.when)
+        self.cart.clear()
+        return bill
+
+    def commit_bill(self, cur, bill):
+        """Write a prepared bill in the caller's (immediate) transaction. Returns (tid, total)."""
+        if self.remote:
+            return self.remote.checkout(bill)
+        return record_sale(cur, bill.lines, when=bill.when, total=bill.total, bill_id=bill.bill_id)
+
+    def replay_journal(self, cur, bills, strict=True):
+        """Post journaled bills (see sales_journal.post_bills) in the caller's immediate transaction."""
+        if self.remote:
+            return self.remote.replay(bills, strict)
+        return post_bills(cur, bills, strict)
+
+    def bill_saved(self, bill):
+        self.journal.settled(bill.bill_id)
+        self.catalog.invalidate(*(line.barcode for line in bill.held))
+
+    def bill_failed(self, bill):
+        """The commit failed for a non-stock reason; the journal keeps it for replay_later."""
+        self.journal.failed(bill.bill_id)
+
+    def bill_rejected(self, bill, shortage):
+        """Void a bill that failed its stock check; put it back if the cart is free.
+
+        Returns the CartLines restored (empty if the cart was in use).
+        """
+        self.journal.void(bill.bill_id)
+        self.catalog.invalidate(*(line[0] for line in shortage.lines))
+        if self.cart:
+            return []
+        return [self.cart.add(l.barcode, l.category, l.brand, l.size, rupees(l.price_paise), l.qty)
+                for l in bill.held]
+
+    def checkout(self):
+        """Synchronous bill commit (headless callers). Returns (tid, total)."""
+        bill = self.prepare_bill()
+        self.journal.sync()
+        try:
+            if self.remote:
+                result = self.commit_bill(None, bill)
+            else:
+                with transaction(self.path, immediate=True) as cur:
+                    result = self.commit_bill(cur, bill)
+        except StockShortage as e:
+            self.bill_rejected(bill, e)
+            raise
+        except Exception:
+            self.bill_failed(bill)
+            raise
+        self.bill_saved(bill)
+        return result
+
+
+class InventoryService:
+    def __init__(self, path=None, catalog=None, remote=None):
+        self.path = path
+        self.remote = remote
+        self.catalog = catalog or (remote.catalog() if remote else get_catalog(path))
+        self.refs = get_refdata(path, remote)
+
+    def _write(self, cur, barcode, fn):
+        if cur is not None:
+            return fn(cur)
+        with transaction(self.path) as own:
+            result = fn(own)
+        self.changed(barcode)
+        return result
+
+    def changed(self, barcode):
+        """Tell the catalog a row was committed by someone holding the cursor."""
+        self.catalog.invalidate(barcode)
+
+    LOW_STOCK_SQL = "SELECT brand, name, quantity FROM inventory WHERE quantity < 10 ORDER BY quantity ASC"
+
+    def low_stock(self):
+        """(brand, name, quantity) running low, emptiest first (dashboard alerts)."""
+        if self.remote:
+            return [tuple(r) for r in self.remote.low_stock()]
+        return get_conn(self.path).execute(self.LOW_STOCK_SQL).fetchall()
+
+    # Columns: 0:barcode, 1:category, 2:brand, 3:size, 4:price, 5:quantity, 6:supplier, 7:timestamp
+    ROW_SQL = "SELECT barcode, category, brand, size, price, quantity, supplier, timestamp FROM inventory"
+
+    def rows(self, search=None):
+        """Warehouse table rows, optionally filtered by category / brand / name."""
+        if self.remote:
+            return self.remote.inventory(search)
+        conn = get_conn(self.path)
+        if not search:
+            return conn.execute(self.ROW_SQL).fetchall()
+        where, params = inventory_search.filter_sql(conn, self.path, search)
+        return conn.execute(self.ROW_SQL + " WHERE " + where, params).fetchall()
+
+    def _filter(self, search):
+        if not search:
+            return [], []
+        where, params = inventory_search.filter_sql(get_conn(self.path), self.path, search)
+        return [where], params
+
+    # SQL builders for the page source behind core/paged_table.py, shared
+    # with scripts/maintenance/explain_queries.py. where / params are the
+    # search filter from _filter().
+
+    @staticmethod
+    def count_sql(where=(), params=()):
+        return "SELECT COUNT(*) FROM inventory" + (" WHERE " + " AND ".join(where) if where else ""), list(params)
+
+    @classmethod
+    def page_sql(cls, where=(), params=(), after=None, before=None, offset=None, limit=50):
+        """(sql, params) for one window in barcode order; a before= window comes back descending."""
+        where, params = list(where), list(params)
+        if after is not None:
+            where.append("barcode > ?"); params.append(str(after))
+        if before is not None:
+            where.append("barcode < ?"); params.append(str(before))
+        sql = cls.ROW_SQL + (" WHERE " + " AND ".join(where) if where else "")
+        if before is not None:
+            return sql + " ORDER BY barcode DESC LIMIT ?", params + [limit]
+        sql += " ORDER BY barcode LIMIT ?"
+        params.append(limit)
+        if offset:
+            sql += " OFFSET ?"
+            params.append(offset)
+        return sql, params
+
+    @classmethod
+    def rows_for_sql(cls, barcodes, where=(), params=()):
+        where = list(where) + [f"barcode IN ({','.join('?' * len(barcodes))})"]
+        return cls.ROW_SQL + " WHERE " + " AND ".join(where), list(params) + [str(b) for b in barcodes]
+
+    def count(self, search=None):
+        if self.remote:
+            return self.remote.inventory_count(search)
+        return get_conn(self.path).execute(*self.count_sql(*self._filter(search))).fetchone()[0]
+
+    def page(self, after=None, before=None, offset=None, limit=50, search=None):
+        """One window of warehouse rows in barcode order, by keyset (after / before) or offset."""
+        if self.remote:
+            return self.remote.inventory_page(after, before, offset, limit, search)
+        rows = get_conn(self.path).execute(*self.page_sql(*self._filter(search), after=after, before=before,
+                                                          offset=offset, limit=limit)).fetchall()
+        # A before= window walks backwards from the key; put it back in display order
+        return rows[::-1] if before is not None else rows
+
+    def search_keys(self, search, limit=inventory_search.SEARCH_LIMIT):
+        """Barcodes matching search, best match first."""
+        if self.remote:
+            return self.remote.inventory_search(search, limit)
+        return inventory_search.ranked_barcodes(get_conn(self.path), self.path, search, limit)
+
+    def pages(self, search=None):
+        """Page source for core.paged_table.PagedTable (ranked hits when searching)."""
+        if search and search.strip():
+            return SearchPages(self, search)
+        return InventoryPages(self)
+
+    def feed_seq(self):
+        """Current position of the inventory change feed."""
+        if self.remote:
+            return self.remote.inventory_seq()
+        return inventory_feed.last_seq(get_conn(self.path))
+
+    def changes_since(self, seq):
+        """(seq, {barcode: op}) changed after seq, or None if the caller must reload."""
+        if self.remote:
+            return self.remote.inventory_changes(seq)
+        return inventory_feed.changes_since(get_conn(self.path), seq)
+
+    def rows_for(self, barcodes, search=None):
+        """Current warehouse rows for the given barcodes (missing / filtered out ones are absent)."""
+        barcodes = [str(b) for b in barcodes]
+        if not barcodes:
+            return []
+        if self.remote:
+            return self.remote.inventory_rows_for(barcodes, search)
+        return get_conn(self.path).execute(*self.rows_for_sql(barcodes, *self._filter(search))).fetchall()
+
+    def ref_lists(self):
+        """(suppliers, categories) names for the stock-entry dropdowns (cached, see core/refdata.py)."""
+        return self.refs.suppliers(), self.refs.categories()
+
+    def brands(self, category):
+        return self.refs.brands(category)
+
+    def receive(self, barcode, qty, price, category, brand, size, supplier, date=None, cur=None):
+        """Book in a delivery: add to (or create) the item and log it in stock_history."""
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        if self.remote:
+            return self.remote.receive(barcode, qty, price, category, brand, size, supplier, date)
+        name = f"{brand} {size}"
+
+        def write(cur):
+            cur.execute("SELECT quantity FROM inventory WHERE barcode=?", (barcode,))
+            if cur.fetchone():
+                cur.execute("""UPDATE inventory SET
+                            quantity=quantity+?,
+                            name=?,
+                            price=?,
+                            category=?,
+                            brand=?,
+                            size=?,
+                            supplier=?,
+                            timestamp=?
+                            WHERE barcode=?""",
+                           (qty, name, price, category, brand, size, supplier, date, barcode))
+            else:
+                cur.execute("""INSERT INTO inventory
+                            (barcode, name, price, quantity, category, brand, size, supplier, timestamp)
+                            VALUES (?,?,?,?,?,?,?,?,?)""",
+                           (barcode, name, price, qty, category, brand, size, supplier, date))
+            cur.execute("INSERT INTO stock_history (supplier, brand, size, qty, date) VALUES (?,?,?,?,?)",
+                       (supplier, brand, size, qty, date))
+
+        return self._write(cur, barcode, write)
+
+    def set_price(self, barcode, price, cur=None):
+        if self.remote:
+            return self.remote.set_price(barcode, price)
+        return self._write(cur, barcode, lambda c: c.execute("UPDATE inventory SET price=? WHERE barcode=?", (price, barcode)).rowcount)
+
+    def delete(self, barcode, cur=None):
+        if self.remote:
+            return self.remote.delete(barcode)
+        return self._write(cur, barcode, lambda c: c.execute("DELETE FROM inventory WHERE barcode=?", (barcode,)).rowcount)
+
+
+class ReferenceService:
+    """Master lists behind the brand / supplier / category managers: rows, add, delete.
+
+    Screens still call refdata.invalidate_all() once a write is reported
+    done; the POS server drops its own cached refdata itself.
+    """
+
+    # kind -> (rows, insert, delete by id)
+    TABLES = {
+        "suppliers": ("SELECT sid, name, contact FROM suppliers",
+                      "INSERT INTO suppliers (name, contact) VALUES (?, ?)", "DELETE FROM suppliers WHERE sid=?"),
+        "brands": ("SELECT bid, name, category FROM brands",
+                   "INSERT INTO brands (name, category) VALUES (?, ?)", "DELETE FROM brands WHERE bid=?"),
+        "categories": ("SELECT cid, name FROM categories",
+                       "INSERT INTO categories (name) VALUES (?)", "DELETE FROM categories WHERE cid=?"),
+    }
+    SUPPLIER_SALES_SQL = ("SELECT NULLIF(supplier, ''), SUM(revenue) FROM sales_daily "
+                          "GROUP BY supplier ORDER BY SUM(revenue) DESC")
+
+    def __init__(self, path=None, remote=None):
+        self.path = path
+        self.remote = remote
+
+    def _write(self, cur, sql, params):
+        if cur is not None:
+            return cur.execute(sql, params).rowcount
+        with transaction(self.path) as own:
+            return own.execute(sql, params).rowcount
+
+    def rows(self, kind):
+        if self.remote:
+            return [tuple(r) for r in self.remote.ref_rows(kind)]
+        return get_conn(self.path).execute(self.TABLES[kind][0]).fetchall()
+
+    def add(self, kind, values, cur=None):
+        if self.remote:
+            return self.remote.ref_add(kind, list(values))
+        return self._write(cur, self.TABLES[kind][1], tuple(values))
+
+    def delete(self, kind, key, cur=None):
+        if self.remote:
+            return self.remote.ref_delete(kind, key)
+        return self._write(cur, self.TABLES[kind][2], (key,))
+
+    def supplier_sales(self):
+        """(supplier, revenue) best first, from the sales_daily rollup."""
+        if self.remote:
+            return [tuple(r) for r in self.remote.supplier_sales()]
+        return get_conn(self.path).execute(self.SUPPLIER_SALES_SQL).fetchall()
+
+
+class InventoryPages:
+    def __init__(self, service, search=None):
+        self.service = service
+        self.search = search or None
+
+    def count(self):
+        return self.service.count(self.search)
+
+    def page(self, after=None, before=None, offset=None, limit=50):
+        return self.service.page(after, before, offset, limit, self.search)
+
+    def seq(self):
+        return self.service.feed_seq()
+
+    def changes(self, since):
+        return self.service.changes_since(since)
+
+    def rows(self, keys):
+        return self.service.rows_for(keys, self.search)
+
+
+class SearchPages:
+    """Ranked search hits as a page source.
+
+    count() runs the search (PagedTable calls it on every reload) and keeps
+    the best barcodes in rank order; pages are slices of that list, so keyset
+    scrolling works by position instead of by barcode.
+    """
+
+    def __init__(self, service, search):
+        self.service = service
+        self.search = search
+        self.keys = []
+        self._pos = {}
+
+    def count(self):
+        self.keys = [str(k) for k in self.service.search_keys(self.search)]
+        self._pos = {k: i for i, k in enumerate(self.keys)}
+        return len(self.keys)
+
+    def page(self, after=None, before=None, offset=None, limit=50):
+        if after is not None:
+            start = self._pos.get(str(after), len(self.keys)) + 1
+        elif before is not None:
+            start = max(self._pos.get(str(before), 0) - limit, 0)
+            limit = min(limit, self._pos.get(str(before), 0))
+        else:
+            start = offset or 0
+        keys = self.keys[start:start + limit]
+        found = {str(r[0]): r for r in self.service.rows_for(keys)}
+        return [found[k] for k in keys if k in found]
+
+    def seq(self):
+        return self.service.feed_seq()
+
+    def changes(self, since):
+        feed = self.service.changes_since(since)
+        if feed is not None and any(op != "U" for op in feed[1].values()):
+            return None  # an insert / delete can change the hits: search again
+        return feed
+
+    def rows(self, keys):
+        return self.service.rows_for([k for k in keys if str(k) in self._pos])
+
+
+class AnalyticsService:
+    def __init__(self, path=None, remote=None):
+        self.path = path
+        self.remote = remote
+        self.running = None  # RunningSummary behind live()
+
+    def summary(self, period, custom_start=None, custom_end=None):
+        """Everything the analytics dashboard shows for one period, as plain data.
+
+        Results are memoized until a sale / stock change bumps data_version.
+        """
+        if self.remote:
+            return self.remote.report(period, custom_start, custom_end)
+        q = SalesQuery(period, custom_start, custom_end)
+        # One pass over sales_log: the total and the graph's top 10 fall out
+        # of the per-brand sums (already sorted by revenue)
+        brands = cached_fetchall(*q.brand_totals(), path=self.path)
+        return {
+            "title": q.title(),
+            "revenue": sum(total or 0 for _, total in brands),
+            "brands": brands,
+            "top_brands": brands[:10],
+            "history": cached_fetchall(*q.history(), path=self.path),
+        }
+
+    def live(self, period, custom_start=None, custom_end=None):
+        """summary() for a screen that refreshes the same period over and over.
+
+        The first call seeds running totals; later calls only fold in the
+        sales_log rows added since. Not thread-safe: call from one thread.
+        A client till gets the server's (data_version-cached) summary instead.
+        """
+        if self.remote:
+            return self.summary(period, custom_start, custom_end)
+        q = SalesQuery(period, custom_start, custom_end)
+        running = self.running
+        if running is None or running.bounds != q.bounds or running.query.title() != q.title():
+            running = self.running = RunningSummary(q, self.path)
+        running.refresh()
+        return running.summary()
+
+    def drill(self, by, grain="day", where=None, start=None, end=None):
+        """Group-by / slice over the sales cube; see SalesCube.query."""
+        if self.remote:
+            return [(tuple(labels), qty, revenue) for labels, qty, revenue in
+                    self.remote.drill(list(by), grain, where, start, end)]
+        return get_cube(self.path).query(by, grain, where, start, end)
+
+    def sale_chart(self, period, custom_start=None, custom_end=None, grouped=True):
+        # Report exports bypass the cache (large, one-off result sets)
+        if self.remote:
+            return [tuple(r) for r in self.remote.sale_chart(period, custom_start, custom_end, grouped)]
+        q = SalesQuery(period, custom_start, custom_end)
+        return get_conn(self.path).execute(*q.sale_chart(grouped)).fetchall()
+
+    def detailed(self, q):
+        if self.remote:
+            bounds = [b.strftime(DATE_FMT) for b in q.bounds] if q.bounds else None
+            return [tuple(r) for r in self.remote.detailed(q.period, bounds)]
+        return get_conn(self.path).execute(*q.detailed()).fetchall()
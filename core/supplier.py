@@ -1,18 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import sqlite3
-import os
-import sys
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if getattr(sys, 'frozen', False):
-    BASE_DIR = os.path.dirname(sys.executable)
-DB_PATH = os.path.join(BASE_DIR, "db", "IEEE_Shop.db")
+from core.db_writer import get_writer
+from core.pos_server import get_client
+from core.services import ReferenceService
+from core.refdata import invalidate_all
 
 class SupplierClass:
     def __init__(self, parent, back_cmd):
         self.parent = parent
         self.back_cmd = back_cmd
+        self.refs = ReferenceService(remote=get_client())
         
         # UI Colors
         self.clr_bg = "#0f172a"
@@ -128,49 +126,34 @@ class SupplierClass:
         if n=="" or n=="Enter Supplier Name" or c=="" or c=="Enter Phone Number":
             messagebox.showerror("Error", "All fields are required")
             return
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            cur.execute("CREATE TABLE IF NOT EXISTS suppliers (sid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, contact TEXT)")
-            cur.execute("INSERT INTO suppliers (name, contact) VALUES (?,?)", (n, c))
-            conn.commit()
-            conn.close()
+
+        def done(_):
+            invalidate_all()
             messagebox.showinfo("Success", "Supplier added!")
             self.var_name.set(""); self.add_placeholder(self.txt_name, "Enter Supplier Name")
             self.var_contact.set(""); self.add_placeholder(self.txt_contact, "Enter Phone Number")
             self.show()
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+
+        get_writer().submit(self.parent, lambda cur: self.refs.add("suppliers", (n, c), cur=cur),
+                            on_done=done, transactional=not self.refs.remote)
 
     def show(self):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            
             # Load Suppliers
-            cur.execute("CREATE TABLE IF NOT EXISTS suppliers (sid INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, contact TEXT)")
-            cur.execute("SELECT * FROM suppliers")
-            rows = cur.fetchall()
+            rows = self.refs.rows("suppliers")
             self.table.delete(*self.table.get_children())
             for row in rows:
                 self.table.insert('', tk.END, values=row)
             
-            # Load Sales Stats
-            # Ensure sales_log exists (it's created in checkout but good to be safe)
-            # We need to handle the case where column might not exist if user hasn't run checkout update yet, 
-            # but since I updated checkout, let's assume it catches up or we handle the error gracefully or create table.
-            # Best to check/add col like in checkout, but for display let's standard query.
+            # Load Sales Stats from the daily rollup (sales_daily, kept by triggers on sales_log)
             try:
-                cur.execute("SELECT supplier, SUM(total) FROM sales_log GROUP BY supplier ORDER BY SUM(total) DESC")
-                stats = cur.fetchall()
+                stats = self.refs.supplier_sales()
                 self.stats_table.delete(*self.stats_table.get_children())
                 for s in stats:
                     sup_name = s[0] if s[0] else "Unknown"
                     self.stats_table.insert('', tk.END, values=(sup_name, f"₹{s[1]:,.2f}"))
             except:
                 pass # Table might not exist yet or no supplier column
-
-            conn.close()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -180,15 +163,12 @@ class SupplierClass:
         if not row:
             messagebox.showerror("Error", "Select a supplier")
             return
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            cur.execute("DELETE FROM suppliers WHERE sid=?", (row[0],))
-            conn.commit()
-            conn.close()
-            self.show()
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        get_writer().submit(self.parent, lambda cur: self.refs.delete("suppliers", row[0], cur=cur),
+                            on_done=self.deleted, transactional=not self.refs.remote)
+
+    def deleted(self, _):
+        invalidate_all()
+        self.show()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,6 +1,5 @@
 import tkinter as tk
 from tkinter import messagebox
-import sqlite3
 import os
 import sys
 
@@ -18,7 +17,15 @@ if not os.path.exists(db_dir):
 
 # Auto-initialize database if missing
 from core.create_db import init_db
-init_db() # This will create tables and default users if not present
+from core.db import get_conn
+from core.pos_server import get_client
+from core.sales_journal import replay_remote_at_startup
+client = get_client()
+if client:
+    # Client mode: the POS server owns the database
+    replay_remote_at_startup(client)
+else:
+    init_db() # This will create tables and default users if not present
     
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "core"))
 
@@ -136,14 +143,13 @@ class PremiumLogin:
             return
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            cur.execute("SELECT role FROM users WHERE username=? AND password=?", (u, p))
-            user = cur.fetchone()
-            conn.close()
-
-            if user:
-                role = user[0]
+            if client:
+                role = client.login(u, p)
+            else:
+                user = get_conn().execute("SELECT role FROM users WHERE username=? AND password=?", (u, p)).fetchone()
+                role = user[0] if user else None
+
+            if role:
                 self.root.destroy()
                 from core.dashboard import IMS
                 new_root = tk.Tk()
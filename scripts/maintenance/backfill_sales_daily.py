@@ -0,0 +1,43 @@
+import os
+import sys
+
+# Rebuilds the sales_daily rollup (core/sales_rollup.py) from sales_log, e.g.
+# after bulk-importing or hand-editing sales with the triggers bypassed.
+# Usage: python scripts/maintenance/backfill_sales_daily.py [--check] [path/to/IEEE_Shop.db]
+#   --check only lists the days where the rollup and sales_log disagree
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from core.db import connect, DB_PATH
+from core.migrations import migrate
+from core import sales_rollup
+
+def run(db_path, check_only=False):
+    if not os.path.exists(db_path):
+        print("Database not found.")
+        return
+
+    conn = connect(db_path)
+    try:
+        migrate(conn)
+        cur = conn.cursor()
+        if check_only:
+            bad = sales_rollup.check(cur)
+            for day, barcode, brand, supplier, lines, revenue, r_lines, r_revenue in bad:
+                print(f"{day} {barcode} {brand or '-'} / {supplier or '-'}: sales_log {lines} lines / {revenue:,.2f}, "
+                      f"rollup {r_lines or 0} lines / {r_revenue or 0:,.2f}")
+            print(f"{len(bad)} rollup row(s) out of step." if bad else "Rollup matches sales_log.")
+            return
+        cur.execute("BEGIN IMMEDIATE")
+        rows = sales_rollup.rebuild(cur)
+        conn.commit()
+        print(f"sales_daily rebuilt: {rows} rows.")
+    except Exception as e:
+        conn.rollback()
+        print(f"Backfill failed: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--check"]
+    run(args[0] if args else DB_PATH, check_only="--check" in sys.argv[1:])
@@ -0,0 +1,107 @@
+import os
+import sys
+
+# Runs EXPLAIN QUERY PLAN on every query the app ships and flags full-table
+# scans. Usage: python scripts/maintenance/explain_queries.py [path/to/IEEE_Shop.db]
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from core.db import connect, DB_PATH
+from core import sales, inventory_search, inventory_feed, refdata, sales_cube
+from core.catalog import ITEM_SQL
+from core.periods import SalesQuery
+from core.running_sales import EDITS_SQL, NEW_ROWS_SQL
+from core.services import InventoryService, ReferenceService
+
+# Every entry is built from the SQL the code itself runs (constants and
+# builders imported above), so a query change shows up here on the next run.
+# (where it runs, sql, params, scan_ok). scan_ok marks queries that read a
+# whole (small or intentionally unfiltered) table by design.
+_bill = [("x", "KF", "650ML", 100.0, 1, 100.0)] * 2
+_fts_where, _fts_params = [inventory_search.MATCH_FILTER], ['"x"*']
+SHIPPED_QUERIES = [
+    ("catalog.load", ITEM_SQL, (), True),
+    ("catalog.invalidate", ITEM_SQL + " WHERE barcode=?", ("x",), False),
+    ("sales.find_bill", sales.FIND_BILL_SQL, ("x",), False),
+    ("sales.stock_rows", sales.STOCK_SQL.format(marks="?,?"), ("x", "y"), False),
+    ("sales.record_sale", sales.INSERT_BILL_SQL, ("x", "", 0, ""), False),
+    ("sales.record_sale", sales.INSERT_ITEM_SQL, (1, "x", "", "", 0, 1, 0), False),
+    ("sales.record_sale", sales.INSERT_SALE_SQL, (1, "x", "", "", 1, 0, ""), False),
+    ("sales.record_sale", sales.DECREMENT_SQL.format(rows="(?, ?), (?, ?)"), ("x", 1, "y", 2), False),
+    ("sales.record_sale", sales.DECREMENT_FLOOR_SQL.format(rows="(?, ?), (?, ?)"), ("x", 1, "y", 2), False),
+    # Lookups the transaction_items indexes are kept for (receipts, basket reports)
+    ("receipt.lines", "SELECT barcode, brand, size, unit_price, qty, line_total FROM transaction_items WHERE tid=? ORDER BY id", (1,), False),
+    ("basket.bills_with_item", "SELECT DISTINCT tid FROM transaction_items WHERE barcode=?", ("x",), False),
+    ("dashboard.show_home", InventoryService.LOW_STOCK_SQL, (), False),
+    # Reference data: loaded once per session (core/refdata.py)
+    ("refdata.load", refdata.SUPPLIERS_SQL, (), True),
+    ("refdata.load", refdata.CATEGORIES_SQL, (), True),
+    ("refdata.load", refdata.BRANDS_SQL, (), True),
+    ("refdata.load", refdata.SIZES_SQL, (), True),
+    ("inventory.add_stock", "SELECT quantity FROM inventory WHERE barcode=?", ("x",), False),
+    # Warehouse table pages (the source behind core/paged_table.py)
+    ("inventory.page", *InventoryService.page_sql(after="x", limit=30), False),
+    ("inventory.page", *InventoryService.page_sql(before="x", limit=30), False),
+    ("inventory.count", *InventoryService.count_sql(), True),
+    ("inventory.rows_for", *InventoryService.rows_for_sql(["x", "y"]), False),
+    ("inventory.search", *InventoryService.page_sql(_fts_where, _fts_params, after="x", limit=30), False),
+    ("inventory_feed.changes_since", inventory_feed.CHANGES_SQL, (0,), False),
+    ("inventory_feed.last_seq", inventory_feed.LAST_SEQ_SQL, (), False),
+    ("inventory_search.ranked_barcodes", inventory_search.HITS_SQL, ('"x"*', 10), False),
+    ("inventory_search.ranked_barcodes", inventory_search.RANKED_SQL, ('"x"*', 10), False),
+    ("supplier.show", ReferenceService.SUPPLIER_SALES_SQL, (), True),
+]
+# Manager screens' master lists (small tables, read whole)
+SHIPPED_QUERIES += [(f"{kind}.show", sql, (), True) for kind, (sql, _, _) in ReferenceService.TABLES.items()]
+
+# Analytics queries come straight from the shared builder
+_q = SalesQuery("Monthly")
+SHIPPED_QUERIES += [
+    ("analytics.brands", *_q.brand_totals(), False),
+    ("analytics.history", *_q.history(), False),
+    ("analytics.live", NEW_ROWS_SQL, (0,), False),
+    ("analytics.live", EDITS_SQL, (), False),
+    # Drill-down cube: loaded once (rollup scan by design), then refreshed by sid
+    ("sales_cube.load", sales_cube.DAY_SQL, (), True),
+    ("sales_cube.load", sales_cube.HOUR_SQL, ("2000-01-01",), False),
+    ("sales_cube.refresh", sales_cube.NEW_ROWS_SQL, (0,), False),
+    ("analytics.sales_chart", *_q.sale_chart(), False),
+    ("analytics.detailed_report", *_q.detailed(), False),
+]
+
+
+def is_full_scan(detail, subqueries=()):
+    # "SCAN t" is a table scan; "SCAN t USING [COVERING] INDEX" walks an index
+    # instead, and "SCAN fts VIRTUAL TABLE INDEX 0:M.." is an FTS MATCH lookup
+    if " VIRTUAL TABLE INDEX " in detail and ":M" in detail:
+        return False
+    # Reading back a subquery's own (already filtered) rows, or a VALUES
+    # list ("SCAN 2 CONSTANT ROWS"), is not a table scan
+    if detail.startswith("SCAN ") and detail.split(" ")[1] in subqueries:
+        return False
+    if detail.startswith("SCAN ") and detail.endswith(" CONSTANT ROWS"):
+        return False
+    return detail.startswith("SCAN ") and " USING " not in detail
+
+
+def explain_all(db_path=None):
+    conn = connect(db_path or DB_PATH)
+    flagged = 0
+    for where, sql, params, scan_ok in SHIPPED_QUERIES:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+        subqueries = {d.split(" ")[1] for d in plan if d.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+        scans = [d for d in plan if is_full_scan(d, subqueries)]
+        status = "OK  "
+        if scans and not scan_ok:
+            status = "SCAN"
+            flagged += 1
+        print(f"[{status}] {where}: {' '.join(sql.split())[:90]}")
+        for detail in plan:
+            print(f"         {detail}")
+    conn.close()
+    print(f"\n{flagged} quer{'y' if flagged == 1 else 'ies'} with full-table scans")
+    return flagged
+
+
+if __name__ == "__main__":
+    sys.exit(1 if explain_all(sys.argv[1] if len(sys.argv) > 1 else None) else 0)
@@ -10,12 +10,16 @@ def reset_db_data():
     # 1. Clear current corrupted sales data
     print("Clearing corrupted sales data...")
     cur.execute("DELETE FROM sales_log")
+    # Bill lines first: this connection does not enforce the cascade, and a
+    # reused tid must not pick up the old lines
+    cur.execute("DELETE FROM transaction_items")
     cur.execute("DELETE FROM transactions")
     
     # 2. Reset ID auto-increment to 1
     print("Resetting ID sequence...")
     cur.execute("UPDATE sqlite_sequence SET seq = 0 WHERE name = 'sales_log'")
     cur.execute("UPDATE sqlite_sequence SET seq = 0 WHERE name = 'transactions'")
+    cur.execute("UPDATE sqlite_sequence SET seq = 0 WHERE name = 'transaction_items'")
     
     conn.commit()
     conn.close()
@@ -19,6 +19,7 @@ def reset_data():
         tables = [
             'inventory',
             'sales_log',
+            'transaction_items',
             'transactions',
             'brands',
             'categories',
@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# core.sales_journal reads these at import time: keep the tests away from the
+# real db/sales_journal_<till>.jsonl and from any POS server in the shell
+os.environ["VJ_SALES_JOURNAL"] = os.path.join(tempfile.mkdtemp(prefix="vj_tests_"), "sales_journal.jsonl")
+os.environ["VJ_TERMINAL_ID"] = "test"
+os.environ.pop("VJ_POS_SERVER", None)
+os.environ.pop("VJ_POS_TOKEN", None)
+
+import pytest
+
+from core.create_db import init_db
+from core.db import close_all, get_conn
+
+# barcode, name, price, quantity, category, brand, size, supplier
+ITEMS = [
+    ("1001", "Kingfisher 650ML", 180.0, 5, "Beer", "Kingfisher", "650ML", "S1"),
+    ("1002", "Tuborg 330ML", 110.0, 20, "Beer", "Tuborg", "330ML", "S2"),
+]
+
+
+def line(barcode, qty):
+    """A bill line for one of ITEMS: (barcode, brand, size, unit_price, qty, line_total)."""
+    _, _, price, _, _, brand, size, _ = next(i for i in ITEMS if i[0] == barcode)
+    return (barcode, brand, size, price, qty, price * qty)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "IEEE_Shop.db")
+    init_db(path)
+    conn = get_conn(path)
+    conn.executemany("INSERT INTO inventory (barcode, name, price, quantity, category, brand, size, supplier) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", ITEMS)
+    conn.commit()
+    yield path
+    close_all()
+
+
+def stock(path, barcode):
+    return get_conn(path).execute("SELECT quantity FROM inventory WHERE barcode=?", (barcode,)).fetchone()[0]
@@ -0,0 +1,134 @@
+import json
+import socketserver
+import threading
+import time
+
+import pytest
+
+from conftest import line
+from core.pos_server import TOKEN_ENV, LoopbackClient, PosBackend, PosServer, PosServerError, RemoteClient
+from core.sales import StockShortage
+from core.services import Bill, ReferenceService
+
+WHEN = "2026-10-18 12:00:00"
+
+
+@pytest.fixture
+def backend(db_path):
+    backend = PosBackend(db_path)
+    yield backend
+    backend.stop()
+
+
+def test_loopback_round_trip(backend):
+    client = LoopbackClient(backend)
+    assert client.lookup("1001").quantity == 5
+
+    bill = Bill("b1", WHEN, [line("1001", 2), line("1002", 1)], 470.0, False)
+    tid, total = client.checkout(bill)
+    assert total == 470.0
+    # The server invalidated its catalog on commit, and a resent bill is not sold twice
+    assert client.lookup("1001").quantity == 3
+    assert client.checkout(bill) == (tid, total)
+    assert client.lookup("1001").quantity == 3
+
+    with pytest.raises(StockShortage) as short:
+        client.checkout(Bill("b2", WHEN, [line("1001", 4)], 720.0, False))
+    assert short.value.lines == [("1001", "Kingfisher", "650ML", 4, 3)]
+
+    refs = ReferenceService(remote=client)
+    refs.add("suppliers", ("S3", "98200"))
+    assert [r[1:] for r in refs.rows("suppliers")] == [("S3", "98200")]
+
+
+def test_token_is_required_when_set(backend, monkeypatch):
+    monkeypatch.setenv(TOKEN_ENV, "s3cret")
+    # The client sends the same env token
+    assert LoopbackClient(backend).lookup("1002").quantity == 20
+
+    for request in ({"id": 1, "method": "lookup", "params": {"barcode": "1002"}, "token": "wrong"},
+                    {"id": 2, "method": "lookup", "params": {"barcode": "1002"}}):
+        response = backend.handle(request)
+        assert "result" not in response
+        assert response["error"]["type"] == "PermissionError"
+
+
+def test_server_refuses_lan_without_token(backend):
+    with pytest.raises(PosServerError):
+        PosServer(("0.0.0.0", 0), backend=backend)
+
+
+def test_remote_client_over_loopback_socket(backend):
+    server = PosServer(("127.0.0.1", 0), backend=backend)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = RemoteClient(server.server_address)
+    try:
+        assert client.lookup("1002").brand == "Tuborg"
+        assert client.login("seller", "seller123") == "Seller"
+        assert client.login("seller", "nope") is None
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+class _CountingServer(socketserver.ThreadingTCPServer):
+    """Records each request's method; answers only when told to, and can hang up after answering."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, answer=True, hang_up=False):
+        self.answer, self.hang_up, self.seen = answer, hang_up, []
+        super().__init__(("127.0.0.1", 0), _CountingHandler)
+
+
+class _CountingHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            request = json.loads(raw)
+            self.server.seen.append(request["method"])
+            if not self.server.answer:
+                continue
+            self.wfile.write(json.dumps({"id": request["id"], "result": "ok"}).encode() + b"\n")
+            self.wfile.flush()
+            if self.server.hang_up:
+                return
+
+
+@pytest.fixture
+def counting_server():
+    servers = []
+
+    def start(**kwargs):
+        server = _CountingServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_timed_out_write_is_not_resent(counting_server):
+    server = counting_server(answer=False)
+    client = RemoteClient(server.server_address, timeout=0.3)
+    with pytest.raises(OSError):
+        client.receive("1001", 5, 180.0, "Beer", "Kingfisher", "650ML", "S1")
+    with pytest.raises(OSError):
+        client.inventory_seq()
+    client.close()
+    # The stock delivery went out once; the read was retried
+    assert server.seen == ["receive", "inventory_seq", "inventory_seq"]
+
+
+def test_write_reconnects_when_the_server_hung_up(counting_server):
+    server = counting_server(hang_up=True)
+    client = RemoteClient(server.server_address, timeout=2)
+    assert client.inventory_seq() == "ok"
+    time.sleep(0.1)  # let the server's close reach us
+    assert client.ref_add("suppliers", ["S3", "98200"]) == "ok"
+    client.close()
+    assert server.seen == ["inventory_seq", "ref_add"]
@@ -0,0 +1,47 @@
+import sqlite3
+
+import pytest
+
+from conftest import line
+from core.db import get_conn, transaction
+from core.periods import SalesQuery
+from core.running_sales import RunningSummary
+from core.sales import record_sale
+
+
+def sell(path, barcode, qty):
+    with transaction(path, immediate=True) as cur:
+        record_sale(cur, [line(barcode, qty)])
+
+
+def test_incremental_refresh_folds_new_sales(db_path):
+    summary = RunningSummary(SalesQuery("Today"), path=db_path)
+    sell(db_path, "1002", 1)
+    summary.refresh()
+    sell(db_path, "1001", 2)
+    assert summary.refresh() == 1
+    assert summary.revenue == 470.0 and summary.seeds == 1
+
+
+def test_interrupted_reseed_keeps_the_old_watermark(db_path, monkeypatch):
+    summary = RunningSummary(SalesQuery("Today"), path=db_path)
+    sell(db_path, "1002", 1)
+    sell(db_path, "1001", 1)
+    summary.refresh()
+
+    conn = get_conn(db_path)
+    conn.execute("DELETE FROM sales_log WHERE barcode='1002'")
+    conn.commit()
+    sell(db_path, "1002", 2)
+
+    def interrupted():
+        raise sqlite3.OperationalError("interrupted")
+
+    # The deletion forces a reseed, which is cut short after the watermark read
+    monkeypatch.setattr(summary.query, "brand_totals", interrupted)
+    with pytest.raises(sqlite3.OperationalError):
+        summary.refresh()
+    monkeypatch.undo()
+
+    summary.refresh()
+    assert summary.revenue == 400.0
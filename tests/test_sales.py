@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from conftest import line, stock
+from core import sales
+from core.db import get_conn, transaction
+from core.sales import StockShortage, record_sale
+
+
+def test_concurrent_tills_cannot_oversell(db_path):
+    # Eight tills each sell one of the last five crates at the same moment
+    tills = 8
+    start = threading.Barrier(tills)
+    sold, short, errors = [], [], []
+
+    def till():
+        start.wait()
+        try:
+            with transaction(db_path, immediate=True) as cur:
+                sold.append(record_sale(cur, [line("1001", 1)]))
+        except StockShortage:
+            short.append(1)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=till) for _ in range(tills)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(sold) == 5 and len(short) == 3
+    assert stock(db_path, "1001") == 0
+    conn = get_conn(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM sales_log WHERE barcode='1001'").fetchone()[0] == 5
+    assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 5
+
+
+def test_stale_stock_read_fails_the_whole_bill(db_path, monkeypatch):
+    # Outside an immediate transaction another till may sell between the
+    # stock read and the decrement; the guarded UPDATE must catch it
+    monkeypatch.setattr(sales, "stock_rows", lambda cur, lines: {"1001": (99, "S1"), "1002": (99, "S2")})
+    with pytest.raises(StockShortage):
+        with transaction(db_path) as cur:
+            record_sale(cur, [line("1002", 2), line("1001", 6)])
+    assert stock(db_path, "1001") == 5
+    assert stock(db_path, "1002") == 20
+    assert get_conn(db_path).execute("SELECT COUNT(*) FROM sales_log").fetchone()[0] == 0
+
+
+def test_bill_id_is_written_once(db_path):
+    with transaction(db_path, immediate=True) as cur:
+        first = record_sale(cur, [line("1002", 3)], bill_id="bill-1")
+    with transaction(db_path, immediate=True) as cur:
+        again = record_sale(cur, [line("1002", 3)], bill_id="bill-1")
+    assert again == first
+    assert stock(db_path, "1002") == 17
+
+
+class CountingCursor:
+    """Cursor wrapper counting how many times each statement runs (executemany counts every row)."""
+
+    def __init__(self, cur):
+        self.cur, self.runs = cur, []
+
+    def execute(self, sql, params=()):
+        self.runs.append(sql)
+        return self.cur.execute(sql, params)
+
+    def executemany(self, sql, seq):
+        seq = list(seq)
+        self.runs.extend([sql] * len(seq))
+        return self.cur.executemany(sql, seq)
+
+    def __getattr__(self, name):
+        return getattr(self.cur, name)
+
+
+def test_bill_decrements_stock_in_one_statement(db_path):
+    with transaction(db_path, immediate=True) as cur:
+        counting = CountingCursor(cur)
+        record_sale(counting, [line("1001", 2), line("1002", 3)])
+    assert len([sql for sql in counting.runs if "UPDATE inventory" in sql]) == 1
+    assert stock(db_path, "1001") == 3
+    assert stock(db_path, "1002") == 17
+
+
+def test_replay_floors_stock_at_zero(db_path):
+    with transaction(db_path, immediate=True) as cur:
+        record_sale(cur, [line("1001", 7), line("1002", 1)], strict=False)
+    assert stock(db_path, "1001") == 0
+    assert stock(db_path, "1002") == 19
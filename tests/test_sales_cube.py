@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+from conftest import line
+from core import sales_cube
+from core.db import get_conn, transaction
+from core.sales import record_sale
+from core.sales_cube import SalesCube
+
+
+def sell(path, barcode, qty):
+    with transaction(path, immediate=True) as cur:
+        record_sale(cur, [line(barcode, qty)])
+
+
+def by_supplier(cube):
+    return {labels[0]: revenue for labels, _, revenue in cube.query(by=("supplier",))}
+
+
+def test_new_sales_are_folded_in(db_path):
+    cube = SalesCube(db_path)
+    sell(db_path, "1002", 1)
+    assert by_supplier(cube) == {"S2": 110.0}
+    sell(db_path, "1001", 1)
+    assert by_supplier(cube) == {"S1": 180.0, "S2": 110.0}
+    assert cube.loads == 1
+
+
+def test_interrupted_reload_keeps_the_old_watermark(db_path, monkeypatch):
+    cube = SalesCube(db_path)
+    sell(db_path, "1002", 1)
+    cube.refresh()
+
+    conn = get_conn(db_path)
+    conn.execute("DELETE FROM sales_log")
+    conn.commit()
+    sell(db_path, "1001", 1)
+
+    # The deletion forces a reload, which fails after the watermark read
+    monkeypatch.setattr(sales_cube, "HOUR_SQL", "SELECT * FROM no_such_table")
+    with pytest.raises(sqlite3.OperationalError):
+        cube.refresh()
+    monkeypatch.undo()
+
+    assert by_supplier(cube) == {"S1": 180.0}
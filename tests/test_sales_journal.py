@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from conftest import line, stock
+from core.db import get_conn
+from core.sales_journal import SalesJournal, post_bills, replay_at_startup
+
+WHEN = "2026-10-18 12:00:00"
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return SalesJournal(str(tmp_path / "sales_journal_test.jsonl"))
+
+
+def journal_bill(journal, bill_id, *lines):
+    total = sum(l[5] for l in lines)
+    journal.append(bill_id, lines, total, WHEN)
+
+
+def bill_count(path):
+    return get_conn(path).execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+
+def test_startup_replay_posts_each_bill_once(db_path, journal):
+    journal_bill(journal, "a", line("1002", 2))
+    journal_bill(journal, "b", line("1001", 1), line("1002", 1))
+
+    # Next session: the bills never reached the database
+    replay_at_startup(get_conn(db_path), SalesJournal(journal.path))
+    assert bill_count(db_path) == 2
+    assert stock(db_path, "1002") == 17 and stock(db_path, "1001") == 4
+    assert SalesJournal(journal.path).entries() == []
+
+    # Posting the same bills again changes nothing
+    cur = get_conn(db_path).cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    result = post_bills(cur, [{"bill_id": "a", "date": WHEN, "total": 220.0, "lines": [line("1002", 2)]}])
+    get_conn(db_path).commit()
+    assert result["posted"] == 0 and result["settled"] == ["a"]
+    assert stock(db_path, "1002") == 17
+
+
+def test_startup_replay_records_goods_already_sold(db_path, journal):
+    # An earlier session sold more than the database thinks is left
+    journal_bill(journal, "a", line("1001", 7))
+    replay_at_startup(get_conn(db_path), SalesJournal(journal.path))
+    assert bill_count(db_path) == 1
+    assert stock(db_path, "1001") == 0
+
+
+def test_void_after_append_is_not_replayed(db_path, journal):
+    journal_bill(journal, "a", line("1002", 1))
+    journal_bill(journal, "b", line("1002", 2))
+    journal.void("a")
+
+    with open(journal.path, encoding="utf-8") as f:
+        records = [json.loads(raw) for raw in f]
+    assert [r.get("bill_id", r.get("void")) for r in records] == ["a", "b", "a"]
+    assert [b["bill_id"] for b in SalesJournal(journal.path).entries()] == ["b"]
+
+    replay_at_startup(get_conn(db_path), SalesJournal(journal.path))
+    assert bill_count(db_path) == 1
+    assert stock(db_path, "1002") == 18
+    # The void went out with its bill
+    assert SalesJournal(journal.path)._records() == []
+
+
+def test_strict_replay_voids_short_bills(db_path, journal):
+    journal_bill(journal, "short", line("1001", 6))
+    journal_bill(journal, "ok", line("1001", 5))
+
+    cur = get_conn(db_path).cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    result = post_bills(cur, journal.entries(), strict=True)
+    get_conn(db_path).commit()
+    journal.apply(result)
+
+    assert result["posted"] == 1 and list(result["rejected"]) == ["short"]
+    assert stock(db_path, "1001") == 0
+    # The short bill is voided; the posted one waits for compaction
+    assert [b["bill_id"] for b in SalesJournal(journal.path).entries()] == ["ok"]
+    assert journal.compact() == 0
+    assert SalesJournal(journal.path)._records() == []
+
+
+def test_only_failed_bills_are_retried(journal):
+    journal_bill(journal, "in-flight", line("1002", 1))
+    journal_bill(journal, "failed", line("1002", 1))
+    journal.failed("failed")
+    assert [b["bill_id"] for b in journal.retry_bills()] == ["failed"]
+
+    journal.settled("failed")
+    assert journal.retry_bills() == []
+    # Bills still waiting on the writer survive compaction
+    assert journal.compact() == 1
+    assert [b["bill_id"] for b in SalesJournal(journal.path).entries()] == ["in-flight"]
+
+
+def test_torn_last_line_is_skipped(journal):
+    journal_bill(journal, "a", line("1002", 1))
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"bill_id": "torn", "da')
+    reopened = SalesJournal(journal.path)
+    journal_bill(reopened, "b", line("1002", 1))
+    assert [b["bill_id"] for b in SalesJournal(journal.path).entries()] == ["a", "b"]
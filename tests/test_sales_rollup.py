@@ -0,0 +1,52 @@
+from core import sales_rollup
+from core.db import get_conn
+from core.services import ReferenceService
+
+WHEN = "2026-10-18 12:00:00"
+
+
+def log_sale(conn, barcode, brand, supplier, total):
+    conn.execute("INSERT INTO sales_log (barcode, brand, supplier, qty, total, date) VALUES (?, ?, ?, 1, ?, ?)",
+                 (barcode, brand, supplier, total, WHEN))
+
+
+def rollup(conn):
+    return conn.execute("SELECT day, barcode, brand, category, supplier, size, qty, revenue, lines "
+                        "FROM sales_daily ORDER BY 1, 2, 3, 5").fetchall()
+
+
+def test_supplier_totals_split_one_barcode(db_path):
+    conn = get_conn(db_path)
+    log_sale(conn, "1001", "Kingfisher", "S1", 200.0)
+    log_sale(conn, "1001", "Kingfisher", "ZetaSup", 1000.0)
+    log_sale(conn, "1001", None, None, 50.0)
+    conn.commit()
+
+    assert ReferenceService(db_path).supplier_sales() == [("ZetaSup", 1000.0), ("S1", 200.0), (None, 50.0)]
+    assert sales_rollup.check(conn.cursor()) == []
+
+    # Triggers and a rebuild land on the same rows, labels included
+    by_trigger = rollup(conn)
+    sales_rollup.rebuild(conn.cursor())
+    assert rollup(conn) == by_trigger
+
+
+def test_label_edits_move_the_rollup(db_path):
+    conn = get_conn(db_path)
+    log_sale(conn, "1002", "Tuborg", "S2", 110.0)
+    log_sale(conn, "1002", "Tuborg", "S2", 110.0)
+    conn.commit()
+
+    conn.execute("UPDATE sales_log SET supplier='NEW', brand='Tuborg Strong' WHERE sid=(SELECT MIN(sid) FROM sales_log)")
+    conn.commit()
+    assert [(r[2], r[4], r[8]) for r in rollup(conn)] == [("Tuborg", "S2", 1), ("Tuborg Strong", "NEW", 1)]
+    assert sales_rollup.check(conn.cursor()) == []
+
+
+def test_check_reports_stale_labels(db_path):
+    conn = get_conn(db_path)
+    log_sale(conn, "1002", "Tuborg", "S2", 110.0)
+    conn.commit()
+    conn.execute("UPDATE sales_daily SET supplier='OLD'")
+    conn.commit()
+    assert sorted(r[3] for r in sales_rollup.check(conn.cursor())) == ["OLD", "S2"]